@@ -1,76 +1,94 @@
-from utils.scraper import scrape_static, scrape_dynamic, extract_structured_data
+from utils.scraper import scrape, extract_structured_data
 from utils.analyzer import analyze_business
-from utils.lead_finder import generate_leads, generate_email_content
+from utils.lead_finder import generate_leads, generate_email_content, stream_email_content
+from utils.drafts import stream_draft
+from utils.templates import compile_campaign
 from utils.email_handler import send_email
+from utils.suppression import is_suppressed
 from utils.industry_matcher import identify_industry
+from utils.llm_json import as_object, is_fallback
+from utils import analysis_cache, replay
 import json
 import time
 import os
-from config import OPENAI_API_KEY, GMAIL_USER, GMAIL_PASSWORD
+from utils.metrics import configure_metrics
+from utils.log import configure_logging
+from config import OPENAI_API_KEY, GMAIL_USER, GMAIL_PASSWORD, METRICS_FILE, METRICS_PORT
 
-print(f"API Key Loaded: {OPENAI_API_KEY[:5] if OPENAI_API_KEY else 'NOT FOUND'}...")
-print(f"Gmail User: {GMAIL_USER or 'NOT FOUND'}")
-print(f"Gmail Password: {'CONFIGURED' if GMAIL_PASSWORD else 'NOT FOUND'}")
-
-def main():
-    """Main function to run the lead generation pipeline"""
-    print("\n=== AI Lead Generation & Outreach Agent ===\n")
+def analyze_website(url):
+    """
+    Run the non-interactive part of the pipeline for one website
     
-    # Step 1: Get website URL from user
-    url = input("\nEnter target website URL: ").strip()
+    Scrapes the site, identifies its industry, extracts structured data,
+    analyzes the business and generates leads.
     
-    if not url.startswith(('http://', 'https://')):
-        url = 'https://' + url
-    
-    print(f"\nAnalyzing website: {url}")
-    print("This may take a minute...\n")
+    Returns:
+        Tuple with (scraped_data, leads); either is None if that step failed
+    """
+    replay.record_site(url)
     
     # Step 2: Scrape website data
     print("🔍 Scraping website...")
-    scraped_data = scrape_static(url)
-    
-    if not scraped_data:
-        print("Static scraping failed. Trying dynamic...")
-        scraped_data = scrape_dynamic(url)  # Uses Playwright
+    scraped_data = scrape(url)  # Static, or Playwright for sites that need JavaScript
     
     if not scraped_data:
         print("All scraping attempts failed. Exiting.")
-        return
+        return None, None
     
     # Print basic info
     print(f"✅ Successfully scraped: {scraped_data['business_name']}")
     
-    # Step 3: Use industry matcher for quick industry identification
-    try:
-        industry, confidence = identify_industry(scraped_data)
-        print(f"\n🏢 Industry Identification:")
-        print(f"   Industry: {industry.capitalize()}")
-        print(f"   Confidence: {confidence:.1f}/10")
-    except Exception as e:
-        print(f"Industry identification error: {e}")
-    
-    # Step 4: Extract structured data using LLM
-    print("\n🔄 Extracting business information...")
-    structured_data = extract_structured_data(scraped_data)
-    
-    # Add structured data to the scraped data
-    if structured_data:
-        scraped_data['structured_data'] = structured_data
-        print("✅ Extracted structured business information")
-    
-    # Step 5: Analyze business
-    print("\n🧠 Analyzing business model and potential leads...")
-    analysis_json = analyze_business(scraped_data)
-    
-    try:
-        analysis = json.loads(analysis_json)
+    # Reuse the stored analysis when the site's content hasn't changed
+    cached = analysis_cache.lookup(url, scraped_data)
+    if cached:
+        print("\n♻️ Site content unchanged since the last analysis, reusing it")
+        if cached["industry"]:
+            print(f"   Industry: {cached['industry'].capitalize()}")
+        if cached["structured_data"]:
+            scraped_data['structured_data'] = cached["structured_data"]
+        analysis_json = cached["analysis"]
+    else:
+        # Step 3: Use industry matcher for quick industry identification
+        industry, confidence = None, None
+        try:
+            industry, confidence = identify_industry(scraped_data)
+            print(f"\n🏢 Industry Identification:")
+            print(f"   Industry: {industry.capitalize()}")
+            print(f"   Confidence: {confidence:.1f}/10")
+        except Exception as e:
+            print(f"Industry identification error: {e}")
+    
+        # Step 4: Extract structured data using LLM
+        print("\n🔄 Extracting business information...")
+        structured_data = extract_structured_data(scraped_data)
+    
+        # Add structured data to the scraped data
+        if structured_data:
+            scraped_data['structured_data'] = structured_data
+            print("✅ Extracted structured business information")
+    
+        # Step 5: Analyze business
+        print("\n🧠 Analyzing business model and potential leads...")
+        analysis_json = analyze_business(scraped_data)
+        
+        # Stand-ins from a failed model call would be reused as if they were real
+        if not (is_fallback(structured_data) or is_fallback(analysis_json)):
+            analysis_cache.store(url, scraped_data, {
+                "industry": industry,
+                "confidence": confidence,
+                "structured_data": structured_data,
+                "analysis": analysis_json
+            })
+    
+    # The analysis is decoded once, by analyze_business (or from the cache)
+    analysis = dict(as_object(analysis_json))
+    if analysis:
         print(f"✅ Business Type: {analysis.get('business_type', 'Unknown')}")
         print(f"✅ Identified Lead Types: {', '.join(analysis.get('lead_type', ['Unknown']))}")
         
         # Add the original scraped data to the analysis for enhanced lead generation
         analysis['business_data'] = scraped_data
-        
-    except json.JSONDecodeError:
+    else:
         print("⚠️ Error parsing analysis JSON. Using raw output.")
         analysis = analysis_json
     
@@ -80,6 +98,32 @@ def main():
     
     if not leads:
         print("❌ Failed to generate leads. Exiting.")
+        return scraped_data, None
+    
+    return scraped_data, leads
+
+def main():
+    """Main function to run the lead generation pipeline"""
+    configure_logging()
+    configure_metrics(METRICS_FILE, METRICS_PORT)
+    
+    print(f"API Key Loaded: {OPENAI_API_KEY[:5] if OPENAI_API_KEY else 'NOT FOUND'}...")
+    print(f"Gmail User: {GMAIL_USER or 'NOT FOUND'}")
+    print(f"Gmail Password: {'CONFIGURED' if GMAIL_PASSWORD else 'NOT FOUND'}")
+    
+    print("\n=== AI Lead Generation & Outreach Agent ===\n")
+    
+    # Step 1: Get website URL from user
+    url = input("\nEnter target website URL: ").strip()
+    
+    if not url.startswith(('http://', 'https://')):
+        url = 'https://' + url
+    
+    print(f"\nAnalyzing website: {url}")
+    print("This may take a minute...\n")
+    
+    scraped_data, leads = analyze_website(url)
+    if not leads:
         return
     
     print(f"✅ Generated {len(leads)} potential leads")
@@ -94,40 +138,50 @@ def main():
     
     # Step 7: Generate and send personalized emails
     print("\n📧 Generating personalized emails...")
+    campaign = compile_campaign(scraped_data)
     
     for i, lead in enumerate(leads):
         print(f"\nEmail for Lead {i+1}: {lead['name']} ({lead['email']})")
-        email_content = generate_email_content(scraped_data, lead)
-        
-        # Save email to file
-        with open(f"output/email_{i+1}.txt", "w") as f:
-            f.write(f"To: {lead['email']}\n")
-            f.write(f"Subject: Partnership Opportunity with {scraped_data['business_name']}\n\n")
-            f.write(email_content)
-        
-        print(f"✅ Email saved to output/email_{i+1}.txt")
+        if is_suppressed(lead['email']):
+            print("⏭️ Skipped: address is on the suppression list (opted out or already contacted)")
+            continue
         
-        # Preview the email
+        # Preview the email as it is drafted
         preview_option = input("\nPreview email? (y/n): ").lower()
         if preview_option == 'y':
             print("\n==== Email Preview ====\n")
             print(f"To: {lead['email']}")
             print(f"Subject: Partnership Opportunity with {scraped_data['business_name']}")
             print("")
-            print(email_content)
+        
+        # Stream the email into its file (and the preview) as it is generated
+        email_content = stream_draft(
+            f"output/email_{i+1}.txt",
+            lead['email'],
+            f"Partnership Opportunity with {scraped_data['business_name']}",
+            stream_email_content(scraped_data, lead, campaign),
+            echo=preview_option == 'y',
+            fallback=lambda: generate_email_content(scraped_data, lead, campaign)
+        )
+        
+        if preview_option == 'y':
             print("\n==== End Preview ====\n")
         
+        print(f"✅ Email saved to output/email_{i+1}.txt")
+        
         # Ask if user wants to send this email
         if GMAIL_USER and GMAIL_PASSWORD:
             send_option = input("\nSend this email? (y/n): ").lower()
             if send_option == 'y':
                 try:
-                    send_email(
+                    if send_email(
                         lead['email'],
                         f"Partnership Opportunity with {scraped_data['business_name']}",
                         email_content
-                    )
-                    print(f"✅ Email sent to {lead['email']}")
+                    ):
+                        print(f"✅ Email sent to {lead['email']}")
+                    else:
+                        print(f"❌ Email to {lead['email']} was not sent")
                     time.sleep(1)  # Sleep to avoid rate limiting
                 except Exception as e:
                     print(f"❌ Error sending email: {e}")
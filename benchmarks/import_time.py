@@ -0,0 +1,106 @@
+"""
+Import-time benchmark for the CLI entry points
+
+Runs `python -X importtime -c "import <entry point>"` in a fresh interpreter for
+each tool and reports the cumulative import time along with the heaviest
+modules. Fails if a heavy optional stack is imported at startup or if an entry
+point exceeds the time budget, so startup regressions get caught.
+
+Usage:
+    python benchmarks/import_time.py [--runs 5] [--max-ms 300] [--top 5]
+"""
+
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ENTRY_POINTS = ["app", "menu", "custom_lead_gen", "test_email", "import_leads", "test_smtp", "worker", "suppress", "rescrape"]
+
+# Packages that must only be imported when they are actually used
+DEFERRED_PACKAGES = ["playwright", "openai", "bs4", "requests", "numpy", "lxml"]
+
+LINE_RE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+def measure(module):
+    """
+    Import a module in a fresh interpreter and parse the -X importtime report
+
+    Returns:
+        Tuple with (cumulative import time in microseconds, {module: cumulative us})
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{proc.stderr[-2000:]}")
+
+    rows = []
+    for line in proc.stderr.splitlines():
+        match = LINE_RE.match(line)
+        if match:
+            rows.append((len(match.group(3)), match.group(4), int(match.group(2))))
+
+    # Children are reported before their parent with a deeper indent; keep
+    # only the entry point's subtree so interpreter startup is not counted
+    end = max(i for i, row in enumerate(rows) if row[1] == module)
+    indent = rows[end][0]
+    start = end
+    while start > 0 and rows[start - 1][0] > indent:
+        start -= 1
+
+    modules = {name: us for _, name, us in rows[start:end + 1]}
+    return rows[end][2], modules
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure CLI entry point import time")
+    parser.add_argument("--runs", type=int, default=5, help="Runs per entry point (median is reported)")
+    parser.add_argument("--max-ms", type=float, default=None, help="Fail if an entry point imports slower than this")
+    parser.add_argument("--top", type=int, default=5, help="Number of heaviest modules to list")
+    parser.add_argument("entry_points", nargs="*", default=ENTRY_POINTS)
+    args = parser.parse_args()
+
+    failures = []
+
+    for entry in args.entry_points:
+        timings = []
+        modules = {}
+        for _ in range(args.runs):
+            total, modules = measure(entry)
+            timings.append(total)
+
+        median_ms = statistics.median(timings) / 1000
+        print(f"\n{entry}: {median_ms:.1f} ms (median of {args.runs})")
+
+        heaviest = sorted(
+            ((name, us) for name, us in modules.items() if name != entry and "." not in name),
+            key=lambda x: x[1],
+            reverse=True
+        )
+        for name, us in heaviest[:args.top]:
+            print(f"   {name:<30} {us / 1000:8.1f} ms")
+
+        eager = sorted({name.split(".")[0] for name in modules} & set(DEFERRED_PACKAGES))
+        if eager:
+            failures.append(f"{entry} imports {', '.join(eager)} at startup")
+
+        if args.max_ms is not None and median_ms > args.max_ms:
+            failures.append(f"{entry} took {median_ms:.1f} ms (budget {args.max_ms:.1f} ms)")
+
+    if failures:
+        print("\n❌ Import-time check failed:")
+        for failure in failures:
+            print(f"   {failure}")
+        sys.exit(1)
+
+    print("\n✅ All entry points import within budget")
+
+if __name__ == "__main__":
+    main()
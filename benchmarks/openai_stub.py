@@ -0,0 +1,252 @@
+"""
+Local OpenAI-compatible stub server for load testing
+
+Speaks the /v1/chat/completions protocol (including stream=true) and answers
+the project's four prompt shapes (structured data extraction, business
+analysis, lead generation and email drafting) with schema-valid responses.
+Latency and 429/500 errors can be injected to exercise batching, retries and
+rate limiting without spending money or hitting real rate limits.
+
+Usage:
+    python benchmarks/openai_stub.py --port 8900 --latency lognormal:300:0.5 --rate-429 0.05 --rate-500 0.01
+
+Then point the tools at it:
+    OPENAI_API_BASE=http://127.0.0.1:8900/v1 python app.py
+
+GET /stats returns request counts by prompt kind and status code.
+"""
+
+import argparse
+import json
+import math
+import random
+import re
+import threading
+import time
+import uuid
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FIRST_NAMES = ["Ada", "Bola", "Chen", "Dara", "Eli", "Femi", "Grace", "Hugo", "Ines", "Jon"]
+LAST_NAMES = ["Okafor", "Lee", "Garcia", "Smith", "Adeyemi", "Khan", "Rossi", "Brown"]
+
+def parse_latency(spec):
+    """
+    Build a latency sampler (returning seconds) from a spec string
+
+    fixed:MS | uniform:LOW_MS:HIGH_MS | normal:MEAN_MS:STD_MS | lognormal:MEDIAN_MS:SIGMA
+    """
+    kind, *params = spec.split(":")
+    values = [float(p) for p in params]
+    if kind == "fixed":
+        return lambda: values[0] / 1000
+    if kind == "uniform":
+        return lambda: random.uniform(values[0], values[1]) / 1000
+    if kind == "normal":
+        return lambda: max(0.0, random.gauss(values[0], values[1])) / 1000
+    if kind == "lognormal":
+        return lambda: random.lognormvariate(math.log(values[0]), values[1]) / 1000
+    raise ValueError(f"Unknown latency distribution: {spec}")
+
+def classify_prompt(prompt):
+    """Recognize which of the project's prompts this is"""
+    if "Extract structured information" in prompt:
+        return "extract"
+    if "Analyze this business information" in prompt:
+        return "analyze"
+    if "synthetic leads" in prompt:
+        return "leads"
+    if "cold outreach email" in prompt:
+        return "email"
+    return "other"
+
+def _field(prompt, label, default):
+    match = re.search(rf"{label}:\s*(.+)", prompt)
+    return match.group(1).strip() if match else default
+
+def build_reply(kind, prompt):
+    """Return schema-valid reply content for a prompt kind"""
+    if kind == "extract":
+        name = _field(prompt, "Business Name", "Stub Business")
+        return json.dumps({
+            "business_name": name,
+            "business_type": "SaaS platform",
+            "target_audience": "small businesses",
+            "services": ["Online ordering", "Analytics dashboard", "Customer messaging"],
+            "value_proposition": f"{name} helps small businesses grow with simple tools"
+        })
+
+    if kind == "analyze":
+        return json.dumps({
+            "business_type": "Technology platform for small businesses",
+            "lead_type": ["Small Business Owners", "Technology Consultants"],
+            "lead_search_keywords": ["small business", "software", "automation"],
+            "value_proposition_highlights": "Save time and grow revenue with automation"
+        })
+
+    if kind == "leads":
+        leads = []
+        for _ in range(3):
+            first, last = random.choice(FIRST_NAMES), random.choice(LAST_NAMES)
+            leads.append({
+                "name": f"{first} {last}",
+                "email": f"{first.lower()}.{last.lower()}@example.com",
+                "description": "Owner of a growing small business",
+                "relevance": "Looking for tools to reach more customers"
+            })
+        return json.dumps({"leads": leads})
+
+    if kind == "email":
+        recipient = _field(prompt, "TO", "there").split(",")[0]
+        sender = _field(prompt, "FROM", "our company").replace("A representative of ", "")
+        return (
+            f"Subject: Partnership Opportunity with {sender}\n\n"
+            f"Hi {recipient},\n\n"
+            f"I'm reaching out from {sender} because we help businesses like yours reach more customers. "
+            "Would you be open to a 15-minute call next week?\n\n"
+            f"Best regards,\nMarketing Team\n{sender}"
+        )
+
+    return "OK"
+
+class StubState:
+    def __init__(self, latency, rate_429, rate_500):
+        self.latency = latency
+        self.rate_429 = rate_429
+        self.rate_500 = rate_500
+        self.lock = threading.Lock()
+        self.counts = Counter()
+
+    def count(self, kind, status):
+        with self.lock:
+            self.counts[f"{kind}:{status}"] += 1
+
+def make_handler(state):
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _send_json(self, status, payload, headers=None):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == "/stats":
+                with state.lock:
+                    self._send_json(200, dict(state.counts))
+            else:
+                self._send_json(404, {"error": {"message": "Not found"}})
+
+        def do_POST(self):
+            if not self.path.rstrip("/").endswith("/chat/completions"):
+                self._send_json(404, {"error": {"message": "Not found"}})
+                return
+
+            request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            prompt = "\n".join(m.get("content", "") for m in request.get("messages", []))
+            kind = classify_prompt(prompt)
+
+            time.sleep(state.latency())
+
+            roll = random.random()
+            if roll < state.rate_429:
+                state.count(kind, 429)
+                self._send_json(429, {"error": {"message": "Rate limit reached (stub)", "type": "requests", "code": "rate_limit_exceeded"}},
+                                headers={"Retry-After": "1"})
+                return
+            if roll < state.rate_429 + state.rate_500:
+                state.count(kind, 500)
+                self._send_json(500, {"error": {"message": "Internal server error (stub)", "type": "server_error"}})
+                return
+
+            content = build_reply(kind, prompt)
+            model = request.get("model", "gpt-3.5-turbo")
+            completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+            state.count(kind, 200)
+
+            if request.get("stream"):
+                self._stream(completion_id, model, content)
+                return
+
+            prompt_tokens = len(prompt.split())
+            completion_tokens = len(content.split())
+            self._send_json(200, {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop"
+                }],
+                "usage": {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": completion_tokens,
+                    "total_tokens": prompt_tokens + completion_tokens
+                }
+            })
+
+        def _stream(self, completion_id, model, content):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            self.close_connection = True
+
+            def event(delta, finish_reason=None):
+                chunk = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": model,
+                    "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]
+                }
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+                self.wfile.flush()
+
+            event({"role": "assistant"})
+            for token in re.findall(r"\S+\s*|\s+", content):
+                event({"content": token})
+            event({}, "stop")
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+
+        def log_message(self, format, *args):
+            pass
+
+    return StubHandler
+
+def serve(host="127.0.0.1", port=8900, latency="fixed:0", rate_429=0.0, rate_500=0.0):
+    """Start the stub server in a daemon thread and return the server object"""
+    state = StubState(parse_latency(latency), rate_429, rate_500)
+    server = ThreadingHTTPServer((host, port), make_handler(state))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description="Local OpenAI-compatible stub server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency", default="fixed:0",
+                        help="fixed:MS, uniform:LOW:HIGH, normal:MEAN:STD or lognormal:MEDIAN:SIGMA (milliseconds)")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="Fraction of requests answered with 429")
+    parser.add_argument("--rate-500", type=float, default=0.0, help="Fraction of requests answered with 500")
+    args = parser.parse_args()
+
+    server = serve(args.host, args.port, args.latency, args.rate_429, args.rate_500)
+    print(f"OpenAI stub listening on http://{args.host}:{args.port}/v1 (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
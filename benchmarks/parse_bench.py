@@ -0,0 +1,173 @@
+"""
+HTML parse throughput benchmark
+
+Runs the landing page extraction over a corpus of saved pages with the lxml
+engine (utils/html_extract.py) and with the previous BeautifulSoup
+html.parser implementation, reporting pages/s and MB/s for each.
+
+The corpus is either a directory of saved .html files or the HTTP entries of
+a recorded replay bundle (see pipeline_bench.py). Without either, synthetic
+pages are generated.
+
+With --threads, the lxml extraction is also run from that many threads,
+first in-process (where the GIL serializes it) and then offloaded to
+--processes worker processes (utils/offload.py), as bulk scrapes do.
+
+Usage:
+    python benchmarks/parse_bench.py --corpus saved_pages/ [--repeat 5]
+    python benchmarks/parse_bench.py --bundle fixtures/bundle
+    python benchmarks/parse_bench.py --threads 16 --processes 8
+"""
+
+import argparse
+import base64
+import glob
+import json
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import offload
+from utils.html_extract import extract_page
+
+def load_corpus(corpus_dir=None, bundle=None):
+    """Return (url, bytes, encoding) tuples from saved pages or a replay bundle"""
+    pages = []
+    if corpus_dir:
+        for path in sorted(glob.glob(os.path.join(corpus_dir, "**", "*.htm*"), recursive=True)):
+            with open(path, "rb") as f:
+                pages.append((f"https://example.com/{os.path.basename(path)}", f.read(), None))
+    if bundle:
+        for path in sorted(glob.glob(os.path.join(bundle, "http", "*.json"))):
+            with open(path) as f:
+                entry = json.load(f)
+            data = entry.get("data")
+            if data and "html" in str(data["headers"].get("Content-Type", "html")):
+                pages.append((data["url"], base64.b64decode(data["content"]), data["encoding"]))
+    return pages
+
+def synthetic_corpus(count):
+    """Generate landing pages with navigation, a content container and about links"""
+    pages = []
+    for i in range(count):
+        nav = "".join(f'<li><a href="/section-{j}">Section {j}</a></li>' for j in range(40))
+        paragraphs = "".join(
+            f"<p>Paragraph {j} of page {i}: we build <b>useful</b> products for customers who care "
+            f"about quality, speed and a great experience.</p>" for j in range(30)
+        )
+        html = (
+            f"<!DOCTYPE html><html><head><title>Business {i}</title>"
+            f'<meta name="description" content="Synthetic business number {i}">'
+            f"<script>var data = {{page: {i}}};</script></head><body>"
+            f"<nav><ul>{nav}</ul></nav>"
+            f'<div class="content main-wrapper">{paragraphs}</div>'
+            f'<footer><a href="/about-us">About us</a> <a href="team.html">Our team</a></footer>'
+            f"</body></html>"
+        )
+        pages.append((f"https://business{i}.example.com", html.encode("utf-8"), "utf-8"))
+    return pages
+
+def extract_with_bs4(markup, url, encoding):
+    """The previous scrape_static extraction, kept here as the baseline"""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(markup.decode(encoding or "utf-8", errors="replace"), 'html.parser')
+    business_name = soup.title.string if soup.title else "N/A"
+    description = soup.find("meta", attrs={"name": "description"})
+    description = description.get("content", "N/A") if description else "N/A"
+
+    content_elements = soup.select("main, article, .content, #content, .main, #main")
+    if not content_elements:
+        paragraphs = soup.find_all("p")
+        main_content = " ".join([p.get_text().strip() for p in paragraphs[:10]])
+    else:
+        paragraphs = content_elements[0].find_all("p")
+        main_content = " ".join([p.get_text().strip() for p in paragraphs])
+
+    about_links = []
+    for a in soup.find_all("a", href=True):
+        if re.search(r'about|company|team|who we are', a.get_text().lower()):
+            about_url = a['href']
+            if not about_url.startswith('http'):
+                if about_url.startswith('/'):
+                    about_url = '/'.join(url.split('/')[:3]) + about_url
+                else:
+                    about_url = url.rstrip('/') + '/' + about_url
+            about_links.append(about_url)
+
+    return {"title": business_name, "description": description, "main_content": main_content, "about_links": about_links}
+
+def extract_with_lxml(markup, url, encoding):
+    return extract_page(markup, url, encoding)
+
+def run(extract, pages, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for url, markup, encoding in pages:
+            extract(markup, url, encoding)
+    return time.perf_counter() - start
+
+def run_concurrent(pages, repeat, threads):
+    """Extract every page from a thread pool through offload.run; returns elapsed seconds"""
+    from concurrent.futures import ThreadPoolExecutor
+
+    jobs = [page for _ in range(repeat) for page in pages]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(lambda page: offload.run(extract_page, page[1], page[0], page[2]), jobs))
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark HTML extraction throughput")
+    parser.add_argument("--corpus", help="Directory of saved .html pages")
+    parser.add_argument("--bundle", help="Replay bundle whose HTTP entries form the corpus")
+    parser.add_argument("--synthetic", type=int, default=200, help="Synthetic pages to generate when no corpus is given")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--threads", type=int, default=0, help="Also measure extraction from this many threads")
+    parser.add_argument("--processes", type=int, default=os.cpu_count(), help="Worker processes for the offloaded run")
+    args = parser.parse_args()
+
+    pages = load_corpus(args.corpus, args.bundle)
+    if not pages:
+        if args.corpus or args.bundle:
+            print("No pages found in the corpus; using synthetic pages")
+        pages = synthetic_corpus(args.synthetic)
+
+    total_bytes = sum(len(markup) for _, markup, _ in pages) * args.repeat
+    total_pages = len(pages) * args.repeat
+
+    # Check both engines agree on the about links before timing them
+    mismatches = sum(
+        1 for url, markup, encoding in pages
+        if extract_with_lxml(markup, url, encoding)["about_links"] != extract_with_bs4(markup, url, encoding)["about_links"]
+    )
+
+    print(f"Corpus: {len(pages)} pages, {total_bytes / args.repeat / 1e6:.2f} MB, repeated {args.repeat}x")
+    print(f"{'engine':<22}{'seconds':>10}{'pages/s':>12}{'MB/s':>10}")
+    results = {}
+    for name, extract in (("bs4 html.parser", extract_with_bs4), ("lxml single pass", extract_with_lxml)):
+        elapsed = run(extract, pages, args.repeat)
+        results[name] = elapsed
+        print(f"{name:<22}{elapsed:>10.2f}{total_pages / elapsed:>12,.0f}{total_bytes / elapsed / 1e6:>10.2f}")
+
+    print(f"Speedup: {results['bs4 html.parser'] / results['lxml single pass']:.1f}x")
+    if mismatches:
+        print(f"Warning: about links differ on {mismatches} page(s)")
+
+    if args.threads:
+        print(f"\nConcurrent extraction from {args.threads} threads ({os.cpu_count()} cores)")
+        print(f"{'mode':<22}{'seconds':>10}{'pages/s':>12}{'MB/s':>10}")
+        for name, processes in (("in-process", 0), (f"{args.processes} processes", args.processes)):
+            offload.start(processes)
+            if processes:
+                # Start the workers before timing
+                offload.run(extract_page, pages[0][1], pages[0][0], pages[0][2])
+            elapsed = run_concurrent(pages, args.repeat, args.threads)
+            print(f"{name:<22}{elapsed:>10.2f}{total_pages / elapsed:>12,.0f}{total_bytes / elapsed / 1e6:>10.2f}")
+        offload.shutdown()
+
+if __name__ == "__main__":
+    main()
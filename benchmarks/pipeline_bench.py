@@ -0,0 +1,98 @@
+"""
+End-to-end pipeline benchmark over a recorded fixture bundle
+
+Runs the same steps as app.py (scrape, identify industry, extract, analyze,
+generate leads, draft one email per lead) for every site in the bundle and
+reports per-stage throughput and latency from the metrics registry.
+
+Record a bundle once against live sites (needs network and OPENAI_API_KEY):
+    python benchmarks/pipeline_bench.py --record urls.txt --bundle fixtures/bundle
+
+Replay it offline, with optional injected latency per call:
+    python benchmarks/pipeline_bench.py --bundle fixtures/bundle --latency-ms 20-80 --workers 8
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import offload, replay
+from utils.crawl import CrawlScheduler
+from utils.metrics import REGISTRY
+from config import CRAWL_HOST_DELAY, RESPECT_ROBOTS
+
+def run_site(url):
+    """Run the app.py pipeline for one site with its console output suppressed"""
+    from app import analyze_website
+    from utils.lead_finder import generate_email_content
+
+    with contextlib.redirect_stdout(io.StringIO()), replay.scope(url):
+        scraped_data, leads = analyze_website(url)
+        for lead in leads or []:
+            generate_email_content(scraped_data, lead)
+    return leads is not None
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the lead generation pipeline")
+    parser.add_argument("--bundle", default="fixtures/bundle", help="Fixture bundle directory")
+    parser.add_argument("--record", metavar="URLS_FILE", help="Record a bundle from a file of URLs instead of replaying")
+    parser.add_argument("--latency-ms", default="", help='Injected replay latency, e.g. "50" or "20-200"')
+    parser.add_argument("--workers", type=int, default=1, help="Sites processed concurrently (replay only)")
+    parser.add_argument("--host-delay", type=float, default=None,
+                        help="Seconds between sites on the same host (default: CRAWL_HOST_DELAY when recording, 0 in replay)")
+    parser.add_argument("--parse-processes", type=int, default=None,
+                        help="Parse pages and score industries on this many processes (default: PARSE_PROCESSES)")
+    parser.add_argument("--json", dest="json_path", help="Also write the stage metrics to this file")
+    args = parser.parse_args()
+
+    os.makedirs("output", exist_ok=True)
+    if args.parse_processes is not None:
+        offload.start(args.parse_processes)
+
+    if args.record:
+        replay.configure(mode="record", bundle=args.bundle)
+        with open(args.record) as f:
+            urls = [line.strip() for line in f if line.strip() and not line.startswith("#")]
+        workers = 1  # Playwright's sync API is single-threaded
+    else:
+        replay.configure(mode="replay", bundle=args.bundle, latency_ms=args.latency_ms)
+        urls = replay.load_sites()
+        workers = args.workers
+
+    if not urls:
+        print(f"❌ No sites to process (bundle: {args.bundle})")
+        sys.exit(1)
+
+    REGISTRY.reset()
+    start = time.perf_counter()
+    # Sites on the same host are spaced out; hosts take turns
+    scheduler = CrawlScheduler(
+        workers=workers,
+        min_delay=args.host_delay if args.host_delay is not None else (CRAWL_HOST_DELAY if args.record else 0),
+        respect_robots=RESPECT_ROBOTS if args.record else False
+    )
+    results = [bool(result) for _, result, _ in scheduler.run(run_site, urls)]
+    elapsed = time.perf_counter() - start
+
+    print(f"\n{replay.get_mode().capitalize()}ed {len(urls)} sites in {elapsed:.2f}s "
+          f"({len(urls) / elapsed:.2f} sites/s, {sum(results)} produced leads)\n")
+    print(f"{'stage':<20}{'calls':>8}{'calls/s':>10}{'mean ms':>10}{'p50 ms':>10}{'p99 ms':>10}")
+
+    snapshot = REGISTRY.snapshot()
+    for stage, stats in snapshot.items():
+        print(f"{stage:<20}{stats['count']:>8}{stats['count'] / elapsed:>10.1f}"
+              f"{stats['mean_seconds'] * 1000:>10.1f}{stats['p50_seconds'] * 1000:>10.1f}"
+              f"{stats['p99_seconds'] * 1000:>10.1f}")
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump({"sites": len(urls), "elapsed_seconds": elapsed, "stages": snapshot}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
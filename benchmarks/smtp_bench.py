@@ -0,0 +1,164 @@
+"""
+Bulk email sending benchmark
+
+Runs a local SMTP sink that accepts everything (and advertises PIPELINING),
+then sends the same batch twice: once the old way (build a MIMEText and call
+sendmail for each message, four round trips per message) and once with
+send_bulk (messages rendered up front, commands pipelined). Each batch of
+replies the sink flushes is delayed by --rtt-ms to simulate network latency.
+
+Usage:
+    python benchmarks/smtp_bench.py [--count 500] [--rtt-ms 20] [--reject-every 50]
+"""
+
+import argparse
+import os
+import smtplib
+import socketserver
+import sys
+import tempfile
+import threading
+import time
+from email.mime.text import MIMEText
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Keep benchmark addresses out of the real suppression list
+os.environ["SUPPRESSION_DB"] = os.path.join(tempfile.mkdtemp(prefix="smtp_bench_"), "suppression.db")
+
+from utils.email_handler import send_bulk
+
+class SinkHandler(socketserver.BaseRequestHandler):
+    """Minimal SMTP server: accepts every message, rejects recipients containing "reject" """
+
+    def handle(self):
+        self.pending = []
+        self.in_data = False
+        self.rejected = False
+        buffer = b""
+        self.reply(b"220 sink ESMTP")
+        self.flush()
+        while True:
+            chunk = self.request.recv(65536)
+            if not chunk:
+                return
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\r\n")
+            for line in lines:
+                if self.command(line) == "quit":
+                    self.flush()
+                    return
+            # A pipelining client sends commands back to back; answer everything
+            # received so far in one (delayed) batch
+            self.flush()
+
+    def command(self, line):
+        if self.in_data:
+            if line == b".":
+                self.in_data = False
+                self.server.delivered += 1
+                self.reply(b"250 Queued")
+            return None
+        command = line.strip().upper()
+        if command.startswith((b"EHLO", b"HELO")):
+            self.reply(b"250-sink\r\n250-PIPELINING\r\n250 8BITMIME")
+        elif command.startswith(b"MAIL"):
+            self.rejected = False
+            self.reply(b"250 OK")
+        elif command.startswith(b"RCPT"):
+            self.rejected = b"REJECT" in command
+            self.reply(b"550 No such user" if self.rejected else b"250 OK")
+        elif command == b"DATA":
+            if self.rejected:
+                self.reply(b"554 No valid recipients")
+            else:
+                self.in_data = True
+                self.reply(b"354 End data with <CR><LF>.<CR><LF>")
+        elif command == b"QUIT":
+            self.reply(b"221 Bye")
+            return "quit"
+        elif command.startswith((b"RSET", b"NOOP")):
+            self.rejected = False
+            self.reply(b"250 OK")
+        else:
+            self.reply(b"502 Not implemented")
+        return None
+
+    def reply(self, line):
+        self.pending.append(line + b"\r\n")
+
+    def flush(self):
+        if self.pending:
+            time.sleep(self.server.rtt)
+            self.request.sendall(b"".join(self.pending))
+            self.pending = []
+
+class Sink(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, rtt):
+        super().__init__(("127.0.0.1", 0), SinkHandler)
+        self.rtt = rtt
+        self.delivered = 0
+
+def make_messages(count, reject_every):
+    messages = []
+    for i in range(count):
+        local = f"reject{i}" if reject_every and i % reject_every == reject_every - 1 else f"lead{i}"
+        messages.append((f"{local}@example.com", f"Quick question #{i}", f"Hi there,\n\n.A line starting with a dot\nMessage {i}\n"))
+    return messages
+
+def legacy_send(port, sender, messages):
+    """One MIMEText and one sendmail per message, as send_email does"""
+    server = smtplib.SMTP("127.0.0.1", port)
+    sent = 0
+    for to_email, subject, body in messages:
+        msg = MIMEText(body)
+        msg["Subject"] = subject
+        msg["From"] = sender
+        msg["To"] = to_email
+        try:
+            server.sendmail(sender, [to_email], msg.as_string())
+            sent += 1
+        except smtplib.SMTPException:
+            pass
+    server.quit()
+    return sent
+
+def bulk_send(port, sender, messages):
+    server = smtplib.SMTP("127.0.0.1", port)
+    results = send_bulk(messages, server=server, sender=sender)
+    server.quit()
+    return sum(1 for result in results if result.status == "sent")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark bulk email sending against a local SMTP sink")
+    parser.add_argument("--count", type=int, default=500)
+    parser.add_argument("--rtt-ms", type=float, default=20, help="Simulated round-trip time per reply batch")
+    parser.add_argument("--reject-every", type=int, default=50, help="Make every Nth recipient invalid (0 for none)")
+    args = parser.parse_args()
+
+    sink = Sink(args.rtt_ms / 1000)
+    threading.Thread(target=sink.serve_forever, daemon=True).start()
+    port = sink.server_address[1]
+    sender = "bench@example.com"
+
+    print(f"📨 Sending {args.count:,} messages per run (RTT {args.rtt_ms:g} ms)")
+    print(f"{'mode':<10}{'sent':>8}{'seconds':>10}{'msg/s':>10}")
+    rates = {}
+    for mode, send in (("legacy", legacy_send), ("bulk", bulk_send)):
+        # Fresh addresses per run so send_bulk's suppression of sent addresses doesn't skip them
+        messages = [(f"{mode}.{to}", subject, body) for to, subject, body in make_messages(args.count, args.reject_every)]
+        start = time.perf_counter()
+        sent = send(port, sender, messages)
+        seconds = time.perf_counter() - start
+        rates[mode] = sent / seconds if seconds else 0
+        print(f"{mode:<10}{sent:>8,}{seconds:>10.2f}{rates[mode]:>10,.1f}")
+
+    if rates["legacy"]:
+        print(f"\n⚡ send_bulk is {rates['bulk'] / rates['legacy']:.1f}x faster")
+    sink.shutdown()
+
+if __name__ == "__main__":
+    main()
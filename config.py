@@ -4,5 +4,100 @@ import os
 load_dotenv()  # Load .env file
 
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+# Alternative OpenAI-compatible endpoint (e.g., http://127.0.0.1:8900/v1 for benchmarks/openai_stub.py)
+OPENAI_API_BASE = os.getenv("OPENAI_API_BASE")
 GMAIL_USER = os.getenv("GMAIL_USER")
-GMAIL_PASSWORD = os.getenv("GMAIL_PASSWORD")
\ No newline at end of file
+GMAIL_PASSWORD = os.getenv("GMAIL_PASSWORD")
+
+# Token budgets for scraped page text in LLM prompts, and for text kept per scraped page
+EXTRACT_TOKEN_BUDGET = int(os.getenv("EXTRACT_TOKEN_BUDGET", "700"))
+ANALYZE_TOKEN_BUDGET = int(os.getenv("ANALYZE_TOKEN_BUDGET", "500"))
+SCRAPE_CONTENT_TOKENS = int(os.getenv("SCRAPE_CONTENT_TOKENS", "1200"))
+
+# Static fetch limits: bytes read per page, and paragraphs after which reading stops (0 = no limit)
+SCRAPE_MAX_BYTES = int(os.getenv("SCRAPE_MAX_BYTES", "2000000"))
+SCRAPE_MAX_PARAGRAPHS = int(os.getenv("SCRAPE_MAX_PARAGRAPHS", "50"))
+
+# Domains found to need JavaScript rendering, and how long that verdict is trusted
+SCRAPE_ROUTES_FILE = os.getenv("SCRAPE_ROUTES_FILE", "output/scrape_routes.json")
+SCRAPE_ROUTE_TTL_DAYS = float(os.getenv("SCRAPE_ROUTE_TTL_DAYS", "30"))
+
+# Bulk crawling: concurrent jobs, seconds between jobs on one host, robots.txt handling
+CRAWL_WORKERS = int(os.getenv("CRAWL_WORKERS", "8"))
+CRAWL_HOST_DELAY = float(os.getenv("CRAWL_HOST_DELAY", "2"))
+RESPECT_ROBOTS = os.getenv("RESPECT_ROBOTS", "1").lower() not in ("0", "false", "no")
+ROBOTS_TTL_HOURS = float(os.getenv("ROBOTS_TTL_HOURS", "24"))
+
+# Job queue shared by worker.py processes; JOB_QUEUE_JOURNAL=delete for databases on network storage
+JOB_QUEUE_PATH = os.getenv("JOB_QUEUE_PATH", "output/jobs.db")
+JOB_QUEUE_JOURNAL = os.getenv("JOB_QUEUE_JOURNAL", "wal")
+JOB_VISIBILITY_TIMEOUT = float(os.getenv("JOB_VISIBILITY_TIMEOUT", "300"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+JOB_RETRY_DELAY = float(os.getenv("JOB_RETRY_DELAY", "30"))
+
+# Sharding of queued work by domain: fixed worker names ("w1,w2,w3"), or empty to use
+# the workers that sent a heartbeat within SHARD_WORKER_TTL seconds
+SHARD_WORKERS = [w.strip() for w in os.getenv("SHARD_WORKERS", "").split(",") if w.strip()]
+SHARD_WORKER_TTL = float(os.getenv("SHARD_WORKER_TTL", "60"))
+SHARD_BUCKETS = int(os.getenv("SHARD_BUCKETS", "1024"))
+SHARD_VNODES = int(os.getenv("SHARD_VNODES", "64"))
+
+# Stored analyses are reused when a site's content SimHash differs by at most this many bits
+ANALYSIS_CACHE_PATH = os.getenv("ANALYSIS_CACHE_PATH", "output/analysis_cache.db")
+FINGERPRINT_MAX_DISTANCE = int(os.getenv("FINGERPRINT_MAX_DISTANCE", "3"))
+
+# Adaptive re-scraping: tracked sites are revisited between RECRAWL_MIN_HOURS and
+# RECRAWL_MAX_HOURS apart depending on how often their content changed; the interval
+# grows at most RECRAWL_GROWTH-fold per unchanged visit
+RECRAWL_PATH = os.getenv("RECRAWL_PATH", "output/recrawl.db")
+RECRAWL_MIN_HOURS = float(os.getenv("RECRAWL_MIN_HOURS", "24"))
+RECRAWL_MAX_HOURS = float(os.getenv("RECRAWL_MAX_HOURS", "720"))
+RECRAWL_GROWTH = float(os.getenv("RECRAWL_GROWTH", "2"))
+
+# Addresses never to email (opt-outs) or not to email twice; the Bloom filter is sized
+# for SUPPRESSION_CAPACITY addresses and grows when it fills up
+SUPPRESSION_DB = os.getenv("SUPPRESSION_DB", "output/suppression.db")
+SUPPRESSION_CAPACITY = int(os.getenv("SUPPRESSION_CAPACITY", "1000000"))
+SUPPRESSION_SYNC_SECONDS = float(os.getenv("SUPPRESSION_SYNC_SECONDS", "5"))
+
+# Industry taxonomy: a JSON/YAML file or a directory of them, checked for changes
+# every TAXONOMY_RELOAD_SECONDS (0 loads it once)
+TAXONOMY_PATH = os.getenv("TAXONOMY_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "taxonomy"))
+TAXONOMY_RELOAD_SECONDS = float(os.getenv("TAXONOMY_RELOAD_SECONDS", "2"))
+
+# Processes that parse pages and score industries in bulk modes (0 parses in the calling thread)
+PARSE_PROCESSES = int(os.getenv("PARSE_PROCESSES", "0"))
+
+# Processes that pre-render MIME messages for large send_bulk batches
+BULK_RENDER_WORKERS = int(os.getenv("BULK_RENDER_WORKERS", "4"))
+
+# Speculative about page fetches run alongside the landing page (0 disables them)
+PREFETCH_WORKERS = int(os.getenv("PREFETCH_WORKERS", "8"))
+
+# Email drafting: "llm", "template", or per lead segment ("fashion=llm,*=template")
+EMAIL_DRAFT_MODE = os.getenv("EMAIL_DRAFT_MODE", "llm")
+
+# Optional metrics export: JSON snapshot written at exit and/or Prometheus endpoint
+METRICS_FILE = os.getenv("METRICS_FILE")
+METRICS_PORT = os.getenv("METRICS_PORT")
+
+# Logging: root level, JSON output, per-module levels ("utils.scraper=DEBUG,...")
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_JSON = os.getenv("LOG_JSON", "").lower() in ("1", "true", "yes")
+LOG_LEVELS = os.getenv("LOG_LEVELS", "")
+
+# Record/replay of network calls: REPLAY_MODE is off, record or replay;
+# REPLAY_LATENCY_MS is a fixed delay ("50") or uniform range ("20-200")
+REPLAY_MODE = os.getenv("REPLAY_MODE", "off")
+REPLAY_BUNDLE = os.getenv("REPLAY_BUNDLE", "fixtures/bundle")
+REPLAY_LATENCY_MS = os.getenv("REPLAY_LATENCY_MS", "")
+
+# Dump the full SMTP conversation to stderr (off by default)
+SMTP_DEBUG = os.getenv("SMTP_DEBUG", "").lower() in ("1", "true", "yes")
+
+# Circuit breakers for network calls: an endpoint (a scraped host, the OpenAI API, the
+# SMTP server) fails fast for BREAKER_RESET_SECONDS after BREAKER_FAILURE_THRESHOLD
+# consecutive failures; retry backoff never waits longer than RETRY_MAX_DELAY seconds
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "5"))
+BREAKER_RESET_SECONDS = float(os.getenv("BREAKER_RESET_SECONDS", "30"))
+RETRY_MAX_DELAY = float(os.getenv("RETRY_MAX_DELAY", "30"))
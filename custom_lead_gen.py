@@ -1,7 +1,13 @@
-from utils.scraper import scrape_static, scrape_dynamic, extract_structured_data
+from utils.scraper import scrape, extract_structured_data
 from utils.analyzer import analyze_business
 from utils.lead_finder import generate_leads, generate_email_content
 from utils.email_handler import send_email
+from utils.suppression import is_suppressed
+from utils.templates import compile_campaign
+from utils.llm_json import as_object
+from utils.metrics import configure_metrics
+from utils.log import configure_logging
+from config import METRICS_FILE, METRICS_PORT
 import json
 import os
 import time
@@ -11,6 +17,8 @@ def clear_screen():
     os.system('cls' if os.name == 'nt' else 'clear')
 
 def main():
+    configure_logging()
+    configure_metrics(METRICS_FILE, METRICS_PORT)
     clear_screen()
     print("\n=== Custom Lead Generation Tool ===\n")
     
@@ -31,11 +39,7 @@ def main():
         
         # Scrape website data
         print("🔍 Scraping website...")
-        scraped_data = scrape_static(url)
-        
-        if not scraped_data:
-            print("Static scraping failed. Trying dynamic...")
-            scraped_data = scrape_dynamic(url)
+        scraped_data = scrape(url)
         
         if not scraped_data:
             print("All scraping attempts failed.")
@@ -52,30 +56,28 @@ def main():
             scraped_data['structured_data'] = structured_data
             print("✅ Extracted structured business information")
             
-            # Let's see if we can parse it and show it
-            try:
-                parsed = json.loads(structured_data)
+            # Show what was extracted
+            parsed = as_object(structured_data)
+            if parsed:
                 print(f"\nBusiness Type: {parsed.get('business_type', 'Unknown')}")
                 if 'target_audience' in parsed:
                     print(f"Target Audience: {parsed.get('target_audience', 'Unknown')}")
                 if 'services' in parsed:
                     services = parsed.get('services', [])
                     if isinstance(services, list):
-                        print(f"Services: {', '.join(services[:3])}")
+                        print(f"Services: {', '.join(map(str, services[:3]))}")
                     else:
                         print(f"Services: {services}")
-            except:
-                pass
         
         # Analyze business
         print("\n🧠 Analyzing business model and potential leads...")
         analysis_json = analyze_business(scraped_data)
         
-        try:
-            analysis = json.loads(analysis_json)
+        analysis = dict(as_object(analysis_json))
+        if analysis:
             print(f"✅ Business Type: {analysis.get('business_type', 'Unknown')}")
             print(f"✅ Identified Lead Types: {', '.join(analysis.get('lead_type', ['Unknown']))}")
-        except:
+        else:
             print("⚠️ Error parsing analysis JSON.")
             analysis = analysis_json
     else:
@@ -162,10 +164,15 @@ def main():
     
     # Generate and save emails
     print("\n📧 Generating personalized emails...")
+    campaign = compile_campaign(scraped_data)
     
     for i, lead in enumerate(leads):
         print(f"\nEmail for Lead {i+1}: {lead['name']} ({lead['email']})")
-        email_content = generate_email_content(scraped_data, lead)
+        if is_suppressed(lead['email']):
+            print("⏭️ Skipped: address is on the suppression list (opted out or already contacted)")
+            continue
+        
+        email_content = generate_email_content(scraped_data, lead, campaign)
         
         # Save email to file
         with open(f"output/custom_email_{i+1}.txt", "w") as f:
@@ -207,12 +214,14 @@ def main():
         send_option = input("\nSend this email? (y/n): ").lower()
         if send_option == 'y':
             try:
-                send_email(
+                if send_email(
                     lead['email'],
                     f"Partnership Opportunity with {scraped_data['business_name']}",
                     email_content
-                )
-                print(f"✅ Email sent to {lead['email']}")
+                ):
+                    print(f"✅ Email sent to {lead['email']}")
+                else:
+                    print(f"❌ Email to {lead['email']} was not sent")
                 time.sleep(1)  # Sleep to avoid rate limiting
             except Exception as e:
                 print(f"❌ Error sending email: {e}")
@@ -2,14 +2,22 @@ import csv
 import json
 import os
 import time
-from utils.lead_finder import generate_email_content
-from utils.email_handler import send_email
+from utils.lead_finder import generate_email_content, stream_email_content
+from utils.drafts import stream_draft
+from utils.templates import compile_campaign
+from utils.email_handler import send_email, send_bulk
+from utils.suppression import is_suppressed
+from utils.metrics import configure_metrics
+from utils.log import configure_logging
+from config import METRICS_FILE, METRICS_PORT
 
 def clear_screen():
     """Clear the terminal screen."""
     os.system('cls' if os.name == 'nt' else 'clear')
 
 def main():
+    configure_logging()
+    configure_metrics(METRICS_FILE, METRICS_PORT)
     clear_screen()
     print("\n=== Import Leads Tool ===\n")
     print("This tool lets you import leads from a CSV file and generate personalized emails\n")
@@ -113,26 +121,32 @@ def main():
     
     # Generate emails for each lead
     print("\n📧 Generating personalized emails...")
+    campaign = compile_campaign(business_data)
     
     for i, lead in enumerate(leads):
         print(f"\nEmail for Lead {i+1}: {lead['name']} ({lead['email']})")
-        email_content = generate_email_content(business_data, lead)
+        if is_suppressed(lead['email']):
+            print("⏭️ Skipped: address is on the suppression list (opted out or already contacted)")
+            continue
         
-        # Save email to file
-        with open(f"output/imported_email_{i+1}.txt", "w") as f:
-            f.write(f"To: {lead['email']}\n")
-            f.write(f"Subject: Partnership Opportunity with {business_data['business_name']}\n\n")
-            f.write(email_content)
-        
-        print(f"✅ Email saved to output/imported_email_{i+1}.txt")
-        
-        # Ask if user wants to preview the email
+        # Ask if user wants to preview the email as it is drafted
         preview = input("\nPreview this email? (y/n): ").lower()
         if preview == 'y':
             print("\n=== Email Preview ===\n")
             print(f"To: {lead['email']}")
-            print(f"Subject: Partnership Opportunity with {business_data['business_name']}")
-            print(f"\n{email_content}")
+            print(f"Subject: Partnership Opportunity with {business_data['business_name']}\n")
+        
+        # Stream the email into its file (and the preview) as it is generated
+        email_content = stream_draft(
+            f"output/imported_email_{i+1}.txt",
+            lead['email'],
+            f"Partnership Opportunity with {business_data['business_name']}",
+            stream_email_content(business_data, lead, campaign),
+            echo=preview == 'y',
+            fallback=lambda: generate_email_content(business_data, lead, campaign)
+        )
+        
+        print(f"✅ Email saved to output/imported_email_{i+1}.txt")
         
         # Ask if user wants to modify this email
         modify_email = input("\nModify this email? (y/n): ").lower()
@@ -158,12 +172,14 @@ def main():
         send_option = input("\nSend this email? (y/n): ").lower()
         if send_option == 'y':
             try:
-                send_email(
+                if send_email(
                     lead['email'],
                     f"Partnership Opportunity with {business_data['business_name']}",
                     email_content
-                )
-                print(f"✅ Email sent to {lead['email']}")
+                ):
+                    print(f"✅ Email sent to {lead['email']}")
+                else:
+                    print(f"❌ Email to {lead['email']} was not sent")
                 time.sleep(1)  # Sleep to avoid rate limiting
             except Exception as e:
                 print(f"❌ Error sending email: {e}")
@@ -180,10 +196,15 @@ def main():
                 elif continue_option == '2':
                     # Batch send remaining emails
                     print(f"\nSending remaining {len(leads) - (i+1)} emails...")
+                    batch = []
                     for j in range(i+1, len(leads)):
                         try:
                             lead_j = leads[j]
-                            email_j = generate_email_content(business_data, lead_j)
+                            if is_suppressed(lead_j['email']):
+                                print(f"⏭️ Skipped {lead_j['email']}: on the suppression list")
+                                continue
+                            
+                            email_j = generate_email_content(business_data, lead_j, campaign)
                             
                             # Save email
                             with open(f"output/imported_email_{j+1}.txt", "w") as f:
@@ -191,17 +212,21 @@ def main():
                                 f.write(f"Subject: Partnership Opportunity with {business_data['business_name']}\n\n")
                                 f.write(email_j)
                             
-                            # Send email
-                            send_email(
+                            batch.append((
                                 lead_j['email'],
                                 f"Partnership Opportunity with {business_data['business_name']}",
                                 email_j
-                            )
-                            print(f"✅ Email sent to {lead_j['email']}")
-                            time.sleep(2)  # Longer sleep for batch sending
+                            ))
                         except Exception as e:
                             print(f"❌ Error processing lead {j+1}: {e}")
                     
+                    # Send the drafted emails over one pipelined connection
+                    for result in send_bulk(batch):
+                        if result.status == "sent":
+                            print(f"✅ Email sent to {result.email}")
+                        else:
+                            print(f"❌ Email to {result.email} was not sent ({result.status}: {result.message})")
+                    
                     print("\n✅ Batch email sending completed.")
                     break
     
@@ -1,6 +1,16 @@
 import os
 import sys
-import subprocess
+import importlib
+
+# Menu choice -> (launch message, tool module). Tools run in this process so
+# imports, HTTP sessions, the browser and the SMTP connection stay warm
+# between menu actions.
+TOOLS = {
+    '1': ("Launching standard lead generation tool...", "app"),
+    '2': ("Launching custom lead generation tool...", "custom_lead_gen"),
+    '3': ("Launching email testing tool...", "test_email"),
+    '4': ("Launching import leads tool...", "import_leads"),
+}
 
 def clear_screen():
     """Clear the terminal screen."""
@@ -13,8 +23,28 @@ def print_header():
     print("       AI-Powered Lead Generation & Outreach       ")
     print("=" * 50)
 
+def run_tool(module_name):
+    """Import a tool module (once per session) and run its main() in-process."""
+    try:
+        module = importlib.import_module(module_name)
+        module.main()
+    except KeyboardInterrupt:
+        print("\n\nTool interrupted.")
+    except SystemExit as e:
+        # Tools (and argparse) call sys.exit(); that ends the tool, not the menu
+        if e.code not in (None, 0):
+            print(f"\n❌ Tool exited with status {e.code}")
+    except Exception as e:
+        print(f"\n❌ Tool exited with an error: {e}")
+
 def main_menu():
     """Display the main menu and handle user input."""
+    from config import METRICS_FILE, METRICS_PORT
+    from utils.metrics import configure_metrics
+    from utils.log import configure_logging
+    configure_logging()
+    configure_metrics(METRICS_FILE, METRICS_PORT)
+    
     while True:
         print_header()
         print("\nChoose an option:\n")
@@ -27,28 +57,11 @@ def main_menu():
         
         choice = input("\nEnter your choice (1-6): ").strip()
         
-        if choice == '1':
-            clear_screen()
-            print("\nLaunching standard lead generation tool...\n")
-            subprocess.run([sys.executable, "app.py"])
-            input("\nPress Enter to return to the main menu...")
-        
-        elif choice == '2':
-            clear_screen()
-            print("\nLaunching custom lead generation tool...\n")
-            subprocess.run([sys.executable, "custom_lead_gen.py"])
-            input("\nPress Enter to return to the main menu...")
-        
-        elif choice == '3':
-            clear_screen()
-            print("\nLaunching email testing tool...\n")
-            subprocess.run([sys.executable, "test_email.py"])
-            input("\nPress Enter to return to the main menu...")
-        
-        elif choice == '4':
+        if choice in TOOLS:
+            message, module_name = TOOLS[choice]
             clear_screen()
-            print("\nLaunching import leads tool...\n")
-            subprocess.run([sys.executable, "import_leads.py"])
+            print(f"\n{message}\n")
+            run_tool(module_name)
             input("\nPress Enter to return to the main menu...")
         
         elif choice == '5':
@@ -136,12 +149,11 @@ def check_environment():
     else:
         print("\nAll required packages are installed!")
     
-    # Check if Playwright browsers are installed
+    # Check if Playwright browsers are installed, with the scraper's shared
+    # browser (a second sync_playwright() can't start in the same thread)
     try:
-        from playwright.sync_api import sync_playwright
-        with sync_playwright() as p:
-            browser = p.chromium.launch()
-            browser.close()
+        from utils.scraper import get_browser
+        get_browser()
         print("✅ Playwright browsers installed")
     except Exception as e:
         print(f"❌ Playwright browsers not installed properly: {e}")
@@ -0,0 +1,87 @@
+"""
+Re-scrape tracked sites when they are due
+Each site's next visit is scheduled from how often its content has changed
+(see utils/recrawl.py), so sites that rarely change are fetched rarely.
+
+Usage:
+    python rescrape.py add urls.txt                  # start tracking sites (first visit due now)
+    python rescrape.py due [--limit 50]              # list sites due for a visit
+    python rescrape.py run [--limit 50]              # revisit due sites now
+    python rescrape.py run --enqueue [--send]        # queue due sites as worker.py scrape jobs
+    python rescrape.py stats
+"""
+
+import argparse
+from collections import Counter
+
+from config import METRICS_FILE, METRICS_PORT, RECRAWL_MIN_HOURS
+from utils import recrawl
+from utils.log import configure_logging
+from utils.metrics import configure_metrics
+
+def read_urls(path):
+    with open(path) as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+def run(urls, workers):
+    from utils.crawl import CrawlScheduler
+
+    statuses = Counter()
+    for url, visit, error in CrawlScheduler(workers=workers).run(recrawl.revisit, urls):
+        status = visit.status if visit else "failed"
+        statuses[status] += 1
+        print(f"{status:<14}{url}" + (f"  ({error})" if error else ""))
+    print("\n" + ", ".join(f"{count} {status}" for status, count in statuses.most_common()))
+
+def enqueue(urls, send):
+    from utils.jobqueue import JobQueue
+    from utils.sharding import shard_of
+
+    queue = JobQueue()
+    for url in urls:
+        queue.enqueue("scrape", {"url": url, "send": send, "revisit": True}, shard=shard_of(url))
+    # Not due again until the workers have visited them and rescheduled them
+    recrawl.postpone(urls)
+    print(f"✅ Queued {len(urls)} due sites")
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-scrape tracked sites by change frequency")
+    commands = parser.add_subparsers(dest="command", required=True)
+    add = commands.add_parser("add", help="Track the sites in a file (one URL per line)")
+    add.add_argument("path")
+    due = commands.add_parser("due", help="List sites due for a visit")
+    due.add_argument("--limit", type=int, help="At most this many sites, most overdue first")
+    revisit = commands.add_parser("run", help="Revisit the sites that are due")
+    revisit.add_argument("--limit", type=int, help="At most this many sites, most overdue first")
+    revisit.add_argument("--workers", type=int, default=4, help="Sites visited at once")
+    revisit.add_argument("--enqueue", action="store_true", help="Queue scrape jobs for worker.py instead")
+    revisit.add_argument("--send", action="store_true", help="With --enqueue: send emails for changed sites")
+    commands.add_parser("stats", help="Show the schedule and fetch volume")
+    args = parser.parse_args()
+
+    configure_logging()
+    if args.command == "add":
+        added = recrawl.track(read_urls(args.path))
+        print(f"✅ Tracking {added} new sites")
+    elif args.command == "due":
+        for url in recrawl.due(args.limit):
+            print(url)
+    elif args.command == "run":
+        urls = recrawl.due(args.limit)
+        if not urls:
+            print("Nothing is due")
+        elif args.enqueue:
+            enqueue(urls, args.send)
+        else:
+            configure_metrics(METRICS_FILE, METRICS_PORT)
+            run(urls, args.workers)
+    else:
+        summary = recrawl.stats()
+        print(f"{'sites':<22}{summary['sites']:>12,}")
+        print(f"{'due now':<22}{summary['due']:>12,}")
+        print(f"{'visits':<22}{summary['visits']:>12,}")
+        print(f"{'fetches/day':<22}{summary['fetches_per_day']:>12,.1f}")
+        print(f"{'fixed cadence':<22}{summary['fixed_fetches_per_day']:>12,.1f}  (every {RECRAWL_MIN_HOURS:g}h)")
+
+if __name__ == "__main__":
+    main()
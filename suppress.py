@@ -0,0 +1,55 @@
+"""
+Manage the email suppression list
+
+Usage:
+    python suppress.py add unsubscribes.txt [--reason unsubscribed]   # one address per line (or CSV with an email column)
+    python suppress.py check someone@example.com
+    python suppress.py stats
+"""
+
+import argparse
+import csv
+
+from utils import suppression
+
+def read_addresses(path):
+    """Yield addresses from a plain list or a CSV file with an email column"""
+    with open(path, newline="") as f:
+        if path.lower().endswith(".csv"):
+            reader = csv.DictReader(f)
+            column = next((name for name in reader.fieldnames or [] if "email" in name.lower()), None)
+            if column is None:
+                raise ValueError(f"No email column in {path}")
+            for row in reader:
+                yield row[column]
+        else:
+            for line in f:
+                if line.strip() and not line.startswith("#"):
+                    yield line.strip()
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the email suppression list")
+    commands = parser.add_subparsers(dest="command", required=True)
+    add = commands.add_parser("add", help="Suppress the addresses in a file")
+    add.add_argument("path")
+    add.add_argument("--reason", default="unsubscribed", choices=suppression.DO_NOT_CONTACT + (suppression.SENT,))
+    check = commands.add_parser("check", help="Show whether an address is suppressed")
+    check.add_argument("email")
+    commands.add_parser("stats", help="Count suppressed addresses by reason")
+    args = parser.parse_args()
+
+    if args.command == "add":
+        added = suppression.suppress_many(read_addresses(args.path), args.reason)
+        suppression.save()
+        print(f"✅ Suppressed {added} new addresses ({args.reason})")
+    elif args.command == "check":
+        reason = suppression.lookup(args.email)
+        print(f"{args.email}: {'suppressed (' + reason + ')' if reason else 'not suppressed'}")
+    else:
+        counts = suppression.stats()
+        for reason, count in sorted(counts.items()):
+            print(f"{reason:<14}{count:>12,}")
+        print(f"{'total':<14}{sum(counts.values()):>12,}")
+
+if __name__ == "__main__":
+    main()
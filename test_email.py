@@ -1,5 +1,7 @@
 from utils.email_handler import send_email
 from utils.lead_finder import generate_email_content
+from utils.log import configure_logging
+from utils.templates import compile_campaign
 import json
 import os
 
@@ -8,6 +10,7 @@ def clear_screen():
     os.system('cls' if os.name == 'nt' else 'clear')
 
 def main():
+    configure_logging()
     clear_screen()
     print("\n=== Email Testing Tool ===\n")
     print("This tool lets you test email generation and sending with your own lead data\n")
@@ -77,7 +80,7 @@ def main():
     
     # Generate email
     print("\nGenerating personalized email content...")
-    email_content = generate_email_content(business_data, lead_info)
+    email_content = generate_email_content(business_data, lead_info, compile_campaign(business_data))
     
     # Save email to file
     if not os.path.exists("output"):
@@ -100,12 +103,15 @@ def main():
     send_option = input("\nSend this email? (y/n): ").lower()
     if send_option == 'y':
         try:
-            send_email(
+            if send_email(
                 lead_info['email'],
                 f"Partnership Opportunity with {business_data['business_name']}",
-                email_content
-            )
-            print(f"\n✅ Email sent to {lead_info['email']}")
+                email_content,
+                allow_repeat=True  # Test messages may go to the same address again
+            ):
+                print(f"\n✅ Email sent to {lead_info['email']}")
+            else:
+                print(f"\n❌ Email to {lead_info['email']} was not sent")
         except Exception as e:
             print(f"\n❌ Error sending email: {e}")
             print("\nPlease make sure your .env file contains valid GMAIL_USER and GMAIL_PASSWORD.")
@@ -0,0 +1,26 @@
+"""
+Shared test setup
+Puts the repository root on sys.path and points every state file (caches,
+queues, suppression list) at a temporary directory before config is
+imported, so tests never read or write the real output/ files.
+"""
+
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+_STATE_DIR = tempfile.mkdtemp(prefix="leadgen_tests_")
+for _name, _filename in {
+    "ANALYSIS_CACHE_PATH": "analysis_cache.db",
+    "SUPPRESSION_DB": "suppression.db",
+    "JOB_QUEUE_PATH": "jobs.db",
+    "RECRAWL_PATH": "recrawl.db",
+    "SCRAPE_ROUTES_FILE": "scrape_routes.json",
+}.items():
+    os.environ[_name] = os.path.join(_STATE_DIR, _filename)
+os.environ["REPLAY_MODE"] = "off"
+os.environ["METRICS_FILE"] = ""
+os.environ["METRICS_PORT"] = ""
@@ -0,0 +1,67 @@
+import worker
+from config import FINGERPRINT_MAX_DISTANCE
+from utils import analysis_cache, analyzer, industry_matcher, lead_finder, scraper
+from utils.analysis_cache import fingerprint, hamming_distance, simhash
+from utils.llm_json import JSONText, is_fallback
+from utils.jobqueue import Job, JobQueue
+
+PAGE = " ".join(
+    f"Collection {n}: Stitch Fashion Studio designs made-to-measure suits and dresses for weddings and events. "
+    f"Our tailors fit every garment of collection {n} in the studio and offer alterations, fabric sourcing and "
+    "styling advice for brides, grooms and their families."
+    for n in range(1, 9)
+) + " Book a fitting online or visit us downtown."
+
+def scraped(main_content=PAGE):
+    return {"business_name": "Stitch Fashion Studio", "description": "Bespoke tailoring",
+            "main_content": main_content}
+
+def failing_completion(*args, **kwargs):
+    raise ConnectionError("API unreachable")
+
+def test_small_edits_stay_within_the_distance():
+    edited = PAGE.replace("downtown.", "downtown. Open Saturdays.")
+    assert hamming_distance(simhash(PAGE), simhash(edited)) <= FINGERPRINT_MAX_DISTANCE
+    assert simhash(PAGE) == simhash(PAGE.upper())
+
+def test_different_pages_are_far_apart():
+    other = ("Acme Logistics moves freight between warehouses across the region with a fleet of trucks, "
+             "real-time tracking and same-day pickup for manufacturers and retailers.")
+    assert hamming_distance(simhash(PAGE), simhash(other)) > FINGERPRINT_MAX_DISTANCE
+
+def test_text_without_words_has_no_fingerprint():
+    assert simhash("") == simhash("--- !!!") == 0
+    assert fingerprint({}) == 0
+
+def test_lookup_hits_unchanged_content_only():
+    result = {"industry": "fashion", "confidence": 8.0, "structured_data": "{}", "analysis": "{}"}
+    analysis_cache.store("https://stitch.example/", scraped(), result)
+    assert analysis_cache.lookup("https://www.stitch.example/about", scraped()) == result
+    assert analysis_cache.lookup("https://stitch.example/", scraped("Closed for good. Thanks to all our clients.")) is None
+
+def test_failed_model_calls_return_flagged_fallbacks(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(scraper, "chat_completion", failing_completion)
+    monkeypatch.setattr(analyzer, "chat_completion", failing_completion)
+    assert is_fallback(scraper.extract_structured_data(scraped()))
+    assert is_fallback(analyzer.analyze_business(scraped()))
+
+    monkeypatch.setattr(scraper, "chat_completion", lambda *args, **kwargs: "no JSON here")
+    assert is_fallback(scraper.extract_structured_data(scraped()))
+    assert not is_fallback(JSONText.from_object({"business_type": "Tailoring studio"}))
+
+def test_worker_does_not_cache_fallback_analyses(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(scraper, "chat_completion", failing_completion)
+    monkeypatch.setattr(analyzer, "chat_completion", failing_completion)
+    monkeypatch.setattr(industry_matcher, "identify_industry", lambda data: ("fashion", 8.0))
+    monkeypatch.setattr(lead_finder, "generate_leads", lambda analysis: [])
+    queue = JobQueue(str(tmp_path / "jobs.db"))
+    url = "https://fallback.example/"
+    job = Job(1, "analyze", {"url": url, "scraped_data": scraped()}, 1, 3, "a")
+
+    try:
+        worker.handle_analyze(queue, job)
+    except RuntimeError:
+        pass  # no leads from the stubbed generator
+    assert analysis_cache.lookup(url, scraped()) is None
@@ -0,0 +1,132 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from utils import crawl
+from utils.crawl import CrawlScheduler, RobotsCache
+
+class FakeClock:
+    """Monotonic clock that only moves when a fetch takes time or the scheduler waits"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+class FakeCondition:
+    """Stand-in for the scheduler's condition with a single worker: waiting just moves the clock"""
+
+    def __init__(self, clock):
+        self.clock = clock
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def wait(self, timeout=None):
+        assert timeout is not None, "a single worker never waits for another job"
+        self.clock.now += timeout
+
+    def notify(self):
+        pass
+
+    def notify_all(self):
+        pass
+
+class FakeRobots:
+    def __init__(self, disallowed=(), delays=None):
+        self.disallowed = disallowed
+        self.delays = delays or {}
+
+    def allowed(self, url):
+        return not url.endswith(self.disallowed)
+
+    def crawl_delay(self, url):
+        return self.delays.get(crawl.domain_of(url))
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(crawl, "time", SimpleNamespace(monotonic=clock.monotonic, time=time.time))
+    return clock
+
+def scheduler(clock, min_delay=5.0, robots=None):
+    crawler = CrawlScheduler(workers=1, min_delay=min_delay, respect_robots=False)
+    crawler._cond = FakeCondition(clock)
+    crawler.robots = robots
+    return crawler
+
+def stub_fetcher(clock, seconds=1.0):
+    """Scrape function that takes the given time and records when each URL started"""
+    started = []
+
+    def fetch(url):
+        started.append((url, clock.now - 1000.0))
+        clock.now += seconds
+        return f"page {url}"
+    fetch.started = started
+    return fetch
+
+URLS = ["https://a.example/1", "https://a.example/2", "https://a.example/3",
+        "https://b.example/1", "https://b.example/2", "https://c.example/1"]
+
+def test_hosts_take_turns_and_each_host_is_spaced(clock):
+    fetch = stub_fetcher(clock)
+    results = list(scheduler(clock).run(fetch, URLS))
+
+    assert sorted(results) == sorted((url, f"page {url}", None) for url in URLS)
+    # a, b and c start straight away; a and b come back once their 5 seconds since the last fetch ended are up
+    assert fetch.started == [("https://a.example/1", 0), ("https://b.example/1", 1), ("https://c.example/1", 2),
+                             ("https://a.example/2", 6), ("https://b.example/2", 7), ("https://a.example/3", 12)]
+
+def test_crawl_delay_stretches_the_spacing_and_disallowed_urls_are_skipped(clock):
+    robots = FakeRobots(disallowed=("/2",), delays={"a.example": 20})
+    fetch = stub_fetcher(clock)
+    results = {url: (result, error) for url, result, error in scheduler(clock, robots=robots).run(fetch, URLS)}
+
+    assert results["https://b.example/2"] == (None, "disallowed by robots.txt")
+    assert results["https://a.example/2"] == (None, "disallowed by robots.txt")
+    # The disallowed a.example/2 still took a turn, so a.example/3 waits for two Crawl-delays
+    assert fetch.started == [("https://a.example/1", 0), ("https://b.example/1", 1), ("https://c.example/1", 2),
+                             ("https://a.example/3", 41)]
+
+def test_failed_jobs_are_reported_and_the_crawl_goes_on(clock):
+    def fetch(url):
+        if "b.example" in url:
+            raise ConnectionError("connection reset")
+        return "ok"
+
+    results = {url: (result, error) for url, result, error in scheduler(clock, min_delay=0).run(fetch, URLS)}
+    assert results["https://b.example/1"] == (None, "connection reset")
+    assert results["https://a.example/3"] == ("ok", None)
+
+def robots_for(monkeypatch, status, text=""):
+    robots = RobotsCache()
+    monkeypatch.setattr(robots, "_fetch", lambda base_url: {"status": status, "text": text})
+    return robots
+
+@pytest.mark.parametrize("status", [404, 410, 500, 503])
+def test_missing_robots_or_server_errors_allow_everything(monkeypatch, status):
+    assert robots_for(monkeypatch, status).allowed("https://shop.example/private/orders")
+
+@pytest.mark.parametrize("status", [401, 403])
+def test_forbidden_robots_disallows_everything(monkeypatch, status):
+    assert not robots_for(monkeypatch, status).allowed("https://shop.example/")
+
+def test_unreachable_robots_allows_everything(monkeypatch):
+    robots = RobotsCache()
+
+    def unreachable(base_url):
+        raise ConnectionError("connection refused")
+    monkeypatch.setattr(robots, "_fetch", unreachable)
+    assert robots.allowed("https://shop.example/private/orders")
+
+def test_robots_rules_and_crawl_delay_are_read(monkeypatch):
+    robots = robots_for(monkeypatch, 200, "User-agent: *\nDisallow: /private/\nCrawl-delay: 7\n")
+    assert not robots.allowed("https://shop.example/private/orders")
+    assert robots.allowed("https://shop.example/about")
+    assert robots.crawl_delay("https://shop.example/about") == 7.0
@@ -0,0 +1,47 @@
+import pytest
+
+from utils import lead_finder
+from utils.drafts import INCOMPLETE_SUFFIX, stream_draft
+
+def broken_stream():
+    yield "Hi Jane,\n\nWe make"
+    raise ConnectionError("stream dropped")
+
+def test_complete_stream_is_written(tmp_path):
+    path = str(tmp_path / "email.txt")
+    body = stream_draft(path, "jane@example.com", "Hello", ["Hi ", "Jane"])
+    assert body == "Hi Jane"
+    with open(path) as f:
+        assert f.read() == "To: jane@example.com\nSubject: Hello\n\nHi Jane"
+
+def test_interrupted_stream_without_fallback_is_marked_and_raised(tmp_path):
+    path = tmp_path / "email.txt"
+    with pytest.raises(ConnectionError):
+        stream_draft(str(path), "jane@example.com", "Hello", broken_stream())
+    assert not path.exists()
+    assert (tmp_path / ("email.txt" + INCOMPLETE_SUFFIX)).read_text().endswith("We make")
+
+def test_interrupted_stream_uses_the_fallback(tmp_path):
+    path = tmp_path / "email.txt"
+    body = stream_draft(str(path), "jane@example.com", "Hello", broken_stream(), fallback=lambda: "Complete email")
+    assert body == "Complete email"
+    assert path.read_text().endswith("\n\nComplete email")
+    assert (tmp_path / ("email.txt" + INCOMPLETE_SUFFIX)).exists()
+
+def test_stream_email_content_reraises_after_the_first_chunk(monkeypatch):
+    monkeypatch.setattr(lead_finder, "stream_chat_completion", lambda prompt, stage: broken_stream())
+    lead = {"name": "Jane", "email": "jane@example.com", "description": "tailor", "relevance": "needs clients"}
+    chunks = []
+    with pytest.raises(ConnectionError):
+        for chunk in lead_finder.stream_email_content({"business_name": "Acme"}, lead):
+            chunks.append(chunk)
+    assert chunks == ["Hi Jane,\n\nWe make"]
+
+def test_stream_email_content_falls_back_before_the_first_chunk(monkeypatch):
+    def failing(prompt, stage):
+        raise ConnectionError("no connection")
+        yield  # pragma: no cover
+    monkeypatch.setattr(lead_finder, "stream_chat_completion", failing)
+    lead = {"name": "Jane", "email": "jane@example.com", "description": "tailor", "relevance": "needs clients"}
+    body = "".join(lead_finder.stream_email_content({"business_name": "Acme"}, lead))
+    assert body == lead_finder.fallback_email({"business_name": "Acme"}, lead)
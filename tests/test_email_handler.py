@@ -0,0 +1,145 @@
+import smtplib
+import socketserver
+import threading
+
+import pytest
+
+from utils import email_handler, suppression
+from utils.email_handler import send_bulk
+
+class FakeSMTPHandler(socketserver.StreamRequestHandler):
+    """Scripted SMTP server: rejects recipients containing "reject", logs every packet it reads"""
+
+    def handle(self):
+        self.in_data = False
+        self.rejected = False
+        self.wfile.write(b"220 fake ESMTP\r\n")
+        buffer = b""
+        while True:
+            chunk = self.request.recv(65536)
+            if not chunk:
+                return
+            self.server.packets.append(chunk)
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\r\n")
+            replies = []
+            for line in lines:
+                reply = self.command(line)
+                if reply:
+                    replies.append(reply + b"\r\n")
+            self.wfile.write(b"".join(replies))
+            if b"221 Bye\r\n" in replies:
+                return
+
+    def command(self, line):
+        if self.in_data:
+            if line == b".":
+                self.in_data = False
+                self.server.delivered.append(self.message)
+                return b"250 Queued"
+            self.message.append(line)
+            return None
+        command = line.upper()
+        if command.startswith(b"EHLO"):
+            return b"250-fake\r\n250-PIPELINING\r\n250 8BITMIME" if self.server.pipelining else b"250 fake"
+        if command.startswith(b"MAIL"):
+            self.rejected = False
+            return b"250 OK"
+        if command.startswith(b"RCPT"):
+            self.rejected = b"REJECT" in command
+            return b"550 No such user" if self.rejected else b"250 OK"
+        if command == b"DATA":
+            if self.rejected:
+                return b"554 No valid recipients"
+            self.in_data, self.message = True, []
+            return b"354 Go ahead"
+        if command in (b"RSET", b"NOOP"):
+            self.rejected = False
+            return b"250 OK"
+        if command == b"QUIT":
+            return b"221 Bye"
+        return b"502 Not implemented"
+
+class FakeSMTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, pipelining):
+        super().__init__(("127.0.0.1", 0), FakeSMTPHandler)
+        self.pipelining = pipelining
+        self.packets = []
+        self.delivered = []
+
+@pytest.fixture(params=[True, False], ids=["pipelining", "sequential"])
+def smtp_server(request):
+    server = FakeSMTPServer(request.param)
+    threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def connect(server):
+    return smtplib.SMTP("127.0.0.1", server.server_address[1], timeout=10)
+
+def batch(prefix, count, reject=()):
+    return [(f"{'reject' if i in reject else 'lead'}{i}.{prefix}@example.com", f"Hello {i}", f"Hi,\n.dotted line {i}\n")
+            for i in range(count)]
+
+def test_send_bulk_delivers_and_reports_rejections(smtp_server):
+    prefix = "pipelined" if smtp_server.pipelining else "sequential"
+    messages = batch(prefix, 5, reject={2})
+    connection = connect(smtp_server)
+    results = send_bulk(messages, server=connection, sender="sender@example.com")
+    connection.quit()
+
+    assert [result.status for result in results] == ["sent", "sent", "rejected", "sent", "sent"]
+    assert results[2].code == 550
+    assert len(smtp_server.delivered) == 4
+    # Dot-stuffing survives the trip: the server sees the escaped line
+    assert b"..dotted line 0" in smtp_server.delivered[0]
+    assert suppression.lookup(messages[0][0]) == suppression.SENT
+    assert suppression.lookup(messages[2][0]) is None
+
+def test_pipelining_batches_commands_into_one_round_trip_per_message(smtp_server):
+    if not smtp_server.pipelining:
+        pytest.skip("pipelining only")
+    connection = connect(smtp_server)
+    send_bulk(batch("roundtrips", 10), server=connection, sender="sender@example.com")
+    connection.quit()
+
+    grouped = [packet for packet in smtp_server.packets if b"MAIL FROM" in packet]
+    assert all(b"RCPT TO" in packet and b"DATA\r\n" in packet for packet in grouped)
+    # Greeting, ten groups, the last message's content and QUIT instead of four packets a message
+    assert len(smtp_server.packets) <= 10 + 4
+
+def test_send_bulk_skips_suppressed_addresses(smtp_server):
+    messages = batch(f"suppressed{smtp_server.pipelining}", 2)
+    suppression.suppress(messages[0][0], "unsubscribed")
+    connection = connect(smtp_server)
+    results = send_bulk(messages, server=connection, sender="sender@example.com")
+    connection.quit()
+    assert [result.status for result in results] == ["suppressed", "sent"]
+
+def test_send_bulk_needs_credentials_for_the_pooled_connection(monkeypatch):
+    monkeypatch.setattr(email_handler, "GMAIL_USER", None)
+    monkeypatch.setattr(email_handler, "GMAIL_PASSWORD", None)
+    monkeypatch.setattr(email_handler, "get_connection", lambda: pytest.fail("must not connect"))
+    results = send_bulk(batch("nocredentials", 2))
+    assert [result.status for result in results] == ["error", "error"]
+    assert "credentials" in results[0].message
+
+def test_failed_greeting_drops_the_pooled_connection_and_retries(monkeypatch, smtp_server):
+    class Mute:
+        def ehlo_or_helo_if_needed(self):
+            raise smtplib.SMTPServerDisconnected("Connection unexpectedly closed")
+
+    connections = [Mute(), connect(smtp_server)]
+    closed = []
+    monkeypatch.setattr(email_handler, "GMAIL_USER", "sender@example.com")
+    monkeypatch.setattr(email_handler, "GMAIL_PASSWORD", "secret")
+    monkeypatch.setattr(email_handler, "get_connection", lambda: connections.pop(0))
+    monkeypatch.setattr(email_handler, "close_connection", lambda: closed.append(True))
+
+    results = send_bulk(batch(f"greeting{smtp_server.pipelining}", 2))
+    assert [result.status for result in results] == ["sent", "sent"]
+    assert closed == [True]
@@ -0,0 +1,72 @@
+import pytest
+
+from utils.html_extract import MAX_PARAGRAPHS, extract_page, looks_like_app_shell, parse_html
+
+SHELLS = {
+    "react": '<html><body><div id="root"></div><script src="/static/js/main.3f9a.js"></script></body></html>',
+    "next": ('<html><body><div id="__next"><script>self.__next_f=[]</script></div>'
+             '<script src="/_next/static/chunks/main.js"></script></body></html>'),
+    "angular": '<html><body><app-root></app-root><script src="main.js"></script></body></html>',
+    "noscript": ('<html><body><noscript>You need to enable JavaScript to run this app.</noscript>'
+                 '<div class="wrapper"></div><script src="bundle.js"></script></body></html>'),
+}
+
+NOT_SHELLS = {
+    "short static page with analytics": ('<html><body><h1>Stitch Fashion Studio</h1><p>Tailoring in Leeds.</p>'
+                                         '<script src="https://www.googletagmanager.com/gtag/js"></script></body></html>'),
+    "server-rendered app": ('<html><body><div id="root"><h1>Stitch Fashion Studio</h1><p>Tailoring in Leeds.</p></div>'
+                            '<script src="/static/js/main.js"></script></body></html>'),
+    "unrelated noscript": ('<html><body><p>Bakery</p><noscript><img src="/pixel.gif"></noscript>'
+                           '<script src="/pixel.js"></script></body></html>'),
+    "long page": ('<html><body><div id="app"></div>' + "<p>Fresh sourdough baked every morning.</p>" * 10
+                  + '<script src="/app.js"></script></body></html>'),
+}
+
+@pytest.mark.parametrize("name", SHELLS)
+def test_app_shells_are_detected(name):
+    assert looks_like_app_shell(parse_html(SHELLS[name]))
+
+@pytest.mark.parametrize("name", NOT_SHELLS)
+def test_pages_without_a_mount_point_signal_are_not_shells(name):
+    assert not looks_like_app_shell(parse_html(NOT_SHELLS[name]))
+
+def test_extract_page_flags_shells_only():
+    assert extract_page(SHELLS["react"], "https://example.com")["needs_javascript"]
+    assert not extract_page(NOT_SHELLS["short static page with analytics"], "https://example.com")["needs_javascript"]
+
+LANDING_PAGE = """<html><head>
+<title> Stitch Fashion Studio </title>
+<meta name="description" content="Made-to-measure suits in Leeds">
+<script>var tracking = "<p>not content</p>";</script>
+<style>p { color: red }</style>
+</head><body>
+<nav><a href="/about-us">About us</a><a href="/shop">Shop</a><p>Free delivery over 50</p></nav>
+<p>Suits cut and sewn in our studio.</p>
+<p>Fittings by appointment.</p>
+<footer><p>Copyright 2024 Stitch Ltd</p><a href="https://partner.example/company">Our company</a></footer>
+<script>document.write("Loading widgets")</script>
+</body></html>"""
+
+def test_extract_page_fields():
+    page = extract_page(LANDING_PAGE, "https://stitch.example/shop/")
+    assert page["title"] == "Stitch Fashion Studio"
+    assert page["description"] == "Made-to-measure suits in Leeds"
+    assert page["main_content"] == "Suits cut and sewn in our studio. Fittings by appointment."
+    # Navigation and footer paragraphs are dropped, but their about links are still followed
+    assert page["about_links"] == ["https://stitch.example/about-us", "https://partner.example/company"]
+    assert page["needs_javascript"] is False
+
+def test_extract_page_reads_the_content_container_only():
+    markup = ("<html><body><header><p>Book a fitting today</p></header>"
+              "<main><p>Bridal gowns.</p><footer><p>Prices include VAT</p></footer></main>"
+              "<aside><p>Newsletter signup</p></aside></body></html>")
+    assert extract_page(markup, "https://stitch.example")["main_content"] == "Bridal gowns."
+
+def test_extract_page_defaults():
+    page = extract_page(b"<html><body><p>Hello</p></body></html>", "https://stitch.example", "utf-8")
+    assert (page["title"], page["description"], page["main_content"]) == ("N/A", "N/A", "Hello")
+    assert extract_page("", "https://stitch.example")["main_content"] == ""
+
+def test_extract_page_keeps_at_most_max_paragraphs_without_a_container():
+    markup = "<html><body>" + "".join(f"<p>Paragraph {i}</p>" for i in range(MAX_PARAGRAPHS + 5)) + "</body></html>"
+    assert extract_page(markup, "https://stitch.example")["main_content"].split(" Paragraph ")[-1] == str(MAX_PARAGRAPHS - 1)
@@ -0,0 +1,44 @@
+import re
+
+import pytest
+
+from utils.industry_matcher import DESCRIPTION_TEMPLATES, FIRST_NAMES, LAST_NAMES, generate_bulk_leads
+from utils.taxonomy import get_taxonomy
+
+EMAIL_RE = re.compile(r"[a-z]+@[a-z]+\.(com|co|io)")
+
+def test_same_seed_same_batch():
+    first = generate_bulk_leads("fashion", 200, seed=42).to_list()
+    assert first == generate_bulk_leads("fashion", 200, seed=42).to_list()
+    assert first != generate_bulk_leads("fashion", 200, seed=43).to_list()
+
+@pytest.mark.parametrize("industry", ["fashion", "tech", "ecommerce", "service"])
+def test_leads_are_drawn_from_the_industry_tables(industry):
+    data = get_taxonomy().industry(industry)
+    batch = generate_bulk_leads(industry, 300, seed=7)
+    assert len(batch) == 300 and batch.industry == industry
+    domains = {template.split("@")[1].replace("{biz}", "") for template in data["domain_templates"]}
+    for lead in batch:
+        first, last = lead["name"].split(" ")
+        assert first in FIRST_NAMES and last in LAST_NAMES
+        assert EMAIL_RE.fullmatch(lead["email"]), lead["email"]
+        assert any(lead["email"].endswith(domain) for domain in domains), lead["email"]
+        assert lead["relevance"] in data["value_props"]
+        assert lead["description"]
+        assert "{" not in lead["description"]
+
+def test_descriptions_follow_the_lead_category():
+    categories = get_taxonomy().industry("tech")["lead_categories"]
+    batch = generate_bulk_leads("tech", 300, seed=3)
+    for i, lead in enumerate(batch):
+        category = categories[batch.columns["category"][i]]
+        if category in DESCRIPTION_TEMPLATES:
+            prefixes = [template.split("{")[0] for template, _ in DESCRIPTION_TEMPLATES[category]]
+            assert any(lead["description"].startswith(prefix) for prefix in prefixes), lead["description"]
+        else:
+            assert lead["description"] == f"{category} with expertise in tech solutions"
+
+def test_unknown_industry_uses_the_default_industry_tables():
+    taxonomy = get_taxonomy()
+    default = taxonomy.industry(taxonomy.default_industry)
+    assert all(lead["relevance"] in default["value_props"] for lead in generate_bulk_leads("underwater basket weaving", 50, seed=1))
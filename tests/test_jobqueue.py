@@ -0,0 +1,116 @@
+import smtplib
+import time
+
+import pytest
+
+import worker
+from utils import email_handler, suppression
+from utils.jobqueue import JobQueue
+
+def make_queue(tmp_path, **kwargs):
+    return JobQueue(str(tmp_path / "jobs.db"), **kwargs)
+
+def status_of(queue, job_id):
+    return queue._connect().execute("SELECT status FROM jobs WHERE id = ?", (job_id,)).fetchone()[0]
+
+def expire_leases(queue):
+    queue._connect().execute("UPDATE jobs SET lease_expires = ? WHERE status = 'leased'", (time.time() - 1,))
+
+def test_leased_job_is_hidden_until_completed(tmp_path):
+    queue = make_queue(tmp_path)
+    job_id = queue.enqueue("scrape", {"url": "https://example.com"})
+    job = queue.lease("a")
+    assert (job.id, job.payload, job.attempts) == (job_id, {"url": "https://example.com"}, 1)
+    assert queue.lease("b") is None
+    assert queue.complete(job)
+    assert status_of(queue, job_id) == "done"
+    assert queue.lease("b") is None
+
+def test_expired_lease_moves_to_another_worker(tmp_path):
+    queue = make_queue(tmp_path)
+    job_id = queue.enqueue("scrape", {"url": "https://example.com"})
+    stale = queue.lease("a")
+    expire_leases(queue)
+    job = queue.lease("b")
+    assert (job.id, job.lease_owner, job.attempts) == (job_id, "b", 2)
+    # The first worker finishing late must not touch the new lease
+    assert not queue.complete(stale)
+    assert not queue.fail(stale, "too late")
+    assert queue.complete(job)
+
+def test_failures_retry_then_dead_letter(tmp_path, monkeypatch):
+    monkeypatch.setattr("utils.jobqueue.JOB_RETRY_DELAY", 0)
+    queue = make_queue(tmp_path, max_attempts=2)
+    job_id = queue.enqueue("send", {"to": "jane@example.com"})
+    assert queue.fail(queue.lease("a"), "timeout")
+    assert status_of(queue, job_id) == "ready"
+    assert queue.fail(queue.lease("a"), "timeout")
+    assert status_of(queue, job_id) == "dead"
+    assert queue.dead_letters()[0]["error"] == "timeout"
+
+def test_expired_lease_with_no_attempts_left_is_dead_lettered(tmp_path):
+    queue = make_queue(tmp_path, max_attempts=1)
+    job_id = queue.enqueue("scrape", {"url": "https://example.com"})
+    queue.lease("a")
+    expire_leases(queue)
+    assert queue.lease("b") is None
+    assert status_of(queue, job_id) == "dead"
+
+def test_defer_gives_the_attempt_back(tmp_path):
+    queue = make_queue(tmp_path)
+    job_id = queue.enqueue("analyze", {"url": "https://example.com"})
+    assert queue.defer(queue.lease("a"), 0, "circuit open")
+    assert queue.lease("a").attempts == 1
+    assert status_of(queue, job_id) == "leased"
+
+def send_job(queue, to):
+    return queue.enqueue("send", {"to": to, "subject": "Hello", "body": "Hi"})
+
+@pytest.fixture
+def credentials(monkeypatch):
+    monkeypatch.setattr(worker, "GMAIL_USER", "sender@example.com")
+    monkeypatch.setattr(worker, "GMAIL_PASSWORD", "secret")
+
+def test_redelivered_send_job_completes_without_sending_again(tmp_path, monkeypatch, credentials):
+    sent = []
+    monkeypatch.setattr(email_handler, "deliver", lambda to, subject, body: sent.append(to))
+    queue = make_queue(tmp_path)
+    job_id = queue.enqueue("send", {"to": "resend@example.com", "subject": "Hello", "body": "Hi"})
+
+    worker.run_job(queue, queue.lease("a"))
+    suppression.suppress("resend@example.com", suppression.SENT)  # what the real deliver records
+    # A second delivery of the same job, as after a lease expired mid-send
+    queue._connect().execute("UPDATE jobs SET status = 'ready' WHERE id = ?", (job_id,))
+    worker.run_job(queue, queue.lease("b"))
+
+    assert sent == ["resend@example.com"]
+    assert status_of(queue, job_id) == "done"
+
+@pytest.mark.parametrize("error", [
+    smtplib.SMTPRecipientsRefused({"nobody@example.com": (550, b"No such user")}),
+    smtplib.SMTPDataError(554, b"Message rejected"),
+], ids=["refused", "5xx"])
+def test_permanent_smtp_failures_are_dead_lettered_at_once(tmp_path, monkeypatch, credentials, error):
+    def refuse(to, subject, body):
+        raise error
+    monkeypatch.setattr(email_handler, "deliver", refuse)
+    queue = make_queue(tmp_path)
+    job_id = send_job(queue, f"nobody.{type(error).__name__}@example.com")
+    worker.run_job(queue, queue.lease("a"))
+    assert status_of(queue, job_id) == "dead"
+
+def test_temporary_smtp_failures_are_retried(tmp_path, monkeypatch, credentials):
+    def busy(to, subject, body):
+        raise smtplib.SMTPDataError(451, b"Try again later")
+    monkeypatch.setattr(email_handler, "deliver", busy)
+    queue = make_queue(tmp_path)
+    job_id = send_job(queue, "busy@example.com")
+    worker.run_job(queue, queue.lease("a"))
+    assert status_of(queue, job_id) == "ready"
+
+def test_send_without_credentials_is_dead_lettered(tmp_path, monkeypatch):
+    monkeypatch.setattr(worker, "GMAIL_PASSWORD", None)
+    queue = make_queue(tmp_path)
+    job_id = send_job(queue, "nocreds@example.com")
+    worker.run_job(queue, queue.lease("a"))
+    assert status_of(queue, job_id) == "dead"
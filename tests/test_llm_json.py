@@ -0,0 +1,39 @@
+from utils.llm_json import ANALYSIS_SCHEMA, STRUCTURED_DATA_SCHEMA, JSONText, as_object, extract_json, schema_errors
+
+def test_plain_json_response():
+    parsed = extract_json('{"business_type": "Tailoring studio", "services": ["Suits"]}')
+    assert isinstance(parsed, JSONText)
+    assert parsed.obj == {"business_type": "Tailoring studio", "services": ["Suits"]}
+
+def test_json_wrapped_in_prose_and_code_fences():
+    response = 'Here is the analysis:\n```json\n{"business_type": "Bakery", "lead_type": ["Cafes"]}\n```\nHope it helps!'
+    parsed = extract_json(response, ANALYSIS_SCHEMA)
+    assert parsed == '{"business_type": "Bakery", "lead_type": ["Cafes"]}'
+    assert parsed.obj["lead_type"] == ["Cafes"]
+
+def test_braces_inside_strings_do_not_end_the_object():
+    response = 'Result: {"business_type": "Templates like {name} and }", "services": "Printing"} done'
+    assert extract_json(response, STRUCTURED_DATA_SCHEMA).obj["business_type"] == "Templates like {name} and }"
+
+def test_objects_that_miss_the_schema_are_skipped():
+    response = 'Example: {"foo": 1}. Answer: {"business_type": "Florist", "lead_type": "Wedding planners"}'
+    assert extract_json(response, ANALYSIS_SCHEMA).obj["business_type"] == "Florist"
+    assert extract_json('{"business_type": 3, "lead_type": []}', ANALYSIS_SCHEMA) is None
+
+def test_no_valid_object():
+    for response in ("", None, "No JSON at all", '{"unterminated": "value"', "{not json}"):
+        assert extract_json(response) is None
+
+def test_schema_errors():
+    assert schema_errors([], ANALYSIS_SCHEMA) == ["expected an object, got list"]
+    assert schema_errors({"business_type": "Cafe"}, ANALYSIS_SCHEMA) == ["missing lead_type"]
+    assert schema_errors({"business_type": "Cafe", "services": 2}, STRUCTURED_DATA_SCHEMA) == ["services has type int"]
+
+def test_as_object_decodes_each_kind_of_value_once():
+    text = JSONText.from_object({"business_type": "Cafe"})
+    assert as_object(text) is text.obj
+    assert as_object({"a": 1}) == {"a": 1}
+    assert as_object('Cached: {"a": 1}') == {"a": 1}
+    assert as_object("[1, 2]") == {} and as_object(None) == {}
+    # Already-parsed text is passed through without decoding again
+    assert extract_json(text, STRUCTURED_DATA_SCHEMA) is text
@@ -0,0 +1,40 @@
+from utils.prompt_budget import clean_sentences, compact_text, count_tokens, fit_sections
+
+def test_boilerplate_sentences_are_dropped():
+    text = ("We use cookies to improve your experience on this site. "
+            "Read our privacy policy before you continue. "
+            "Copyright 2024 Acme Bakery, all rights reserved. "
+            "Log in to see your past orders here.")
+    assert clean_sentences(text) == []
+
+def test_near_miss_sentences_are_kept():
+    sentences = [
+        "We bake fresh cookies every morning in our kitchen.",
+        "Browse our product catalog in the store today.",
+        "Our design interns sign off every drawing by hand.",
+    ]
+    kept = clean_sentences(" ".join(sentences))
+    assert kept == sentences
+
+def test_duplicates_and_short_fragments_are_dropped():
+    text = "Home\nAbout us\nWe tailor suits for every occasion.\nWe tailor suits for every occasion!"
+    assert clean_sentences(text) == ["We tailor suits for every occasion."]
+
+def test_compact_text_respects_the_token_budget():
+    text = " ".join(f"Sentence number {i} talks about tailoring and fabrics." for i in range(50))
+    compacted = compact_text(text, 40)
+    assert 0 < count_tokens(compacted) <= 40
+    assert compacted.startswith("Sentence number 0")
+
+def test_oversized_top_sentence_is_truncated_not_dropped():
+    run_on = "Our tailoring studio " + " ".join(f"makes suits and dresses for client {i} and" for i in range(60)) + " more."
+    assert count_tokens(run_on) > 100
+    for keywords in (None, ["tailoring"]):
+        compacted = compact_text(run_on, 100, keywords)
+        assert compacted.startswith("Our tailoring studio")
+        assert 0 < count_tokens(compacted) <= 100
+
+def test_fit_sections_keeps_a_run_on_main_section():
+    run_on = "Bespoke tailoring " + " ".join(f"for wedding party {i} with fittings and" for i in range(80)) + " alterations."
+    sections = fit_sections([("about", ""), ("main", run_on)], 100, ["tailoring"])
+    assert sections["main"].startswith("Bespoke tailoring")
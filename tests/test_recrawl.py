@@ -0,0 +1,85 @@
+import math
+import random
+
+import pytest
+
+import worker
+from config import RECRAWL_GROWTH
+from utils import recrawl, scraper
+from utils.jobqueue import Job, JobQueue
+from utils.recrawl import estimate_rate, next_interval
+
+DAY = 86400.0
+
+def page_content(text, etag='"v1"'):
+    return {"business_name": "Stitch Fashion Studio", "main_content": text, "validators": {"etag": etag}}
+
+def simulate(rate, interval, visits, seed=7):
+    """Visits at a fixed interval to a site changing as a Poisson process; returns detected changes"""
+    rng = random.Random(seed)
+    return sum(rng.expovariate(rate) < interval for _ in range(visits))
+
+def test_no_history_no_estimate():
+    assert estimate_rate(0, 0, 0) is None
+    assert estimate_rate(5, 0, 0) is None
+    assert estimate_rate(10, 0, 10 * DAY) == 0
+
+def test_estimate_recovers_the_change_rate():
+    rate = 1 / (2 * DAY)
+    for interval in (DAY, 2 * DAY, 4 * DAY):
+        changes = simulate(rate, interval, 4000)
+        assert math.isclose(estimate_rate(4000, changes, 4000 * interval), rate, rel_tol=0.1)
+
+def test_estimate_beats_counting_when_changes_hide_each_other():
+    rate, interval, visits = 1 / DAY, 2 * DAY, 4000
+    changes = simulate(rate, interval, visits)
+    naive = changes / (visits * interval)
+    assert naive < rate * 0.6  # several changes between visits count once
+    assert abs(estimate_rate(visits, changes, visits * interval) - rate) < abs(naive - rate)
+
+def test_a_site_that_changed_every_time_still_has_a_finite_rate():
+    assert 0 < estimate_rate(5, 5, 5 * DAY) < math.inf
+
+def test_next_interval_bounds_and_growth():
+    assert next_interval(1 / (3 * DAY), 10 * DAY, DAY, 30 * DAY) == 3 * DAY
+    assert next_interval(1 / 3600, DAY, DAY, 30 * DAY) == DAY
+    assert next_interval(0, DAY, DAY, 30 * DAY) == DAY * RECRAWL_GROWTH
+    assert next_interval(None, 29 * DAY, DAY, 30 * DAY) == 30 * DAY
+
+def test_observe_schedules_unchanged_sites_further_out():
+    url = "https://observe.example/"
+    text = " ".join(f"Tailored suit number {i} cut and sewn in our studio." for i in range(30))
+    assert recrawl.observe(url, page_content(text), now=1000.0) == "new"
+    assert recrawl.observe(url, page_content(text), now=1000.0 + DAY) == "unchanged"
+    assert recrawl.observe(url, page_content("Closed for renovation until spring."), now=1000.0 + 2 * DAY) == "changed"
+
+def test_revisit_reuses_the_revalidated_page(monkeypatch):
+    url = "https://revisit.example/"
+    recrawl.observe(url, page_content("Bespoke tailoring since 1990."))
+    fresh = scraper.Page(url, 200, {"ETag": '"v2"'}, b"<html><p>New collection</p></html>", "utf-8")
+    monkeypatch.setattr(recrawl, "_revalidate", lambda url, etag, last_modified: fresh)
+    calls = []
+
+    def scrape_fn(url, page=None):
+        calls.append(page)
+        return page_content("New collection of made-to-measure coats.", '"v2"')
+
+    assert recrawl.revisit(url, scrape_fn).status == "changed"
+    assert calls == [fresh]
+
+def test_revisit_stops_at_not_modified(monkeypatch):
+    url = "https://unchanged.example/"
+    recrawl.observe(url, page_content("Bespoke tailoring since 1990."))
+    monkeypatch.setattr(recrawl, "_revalidate", lambda url, etag, last_modified: scraper.Page(url, 304, {}, b"", None))
+    visit = recrawl.revisit(url, lambda url, page=None: pytest.fail("scraped a 304"))
+    assert (visit.status, visit.data) == ("not_modified", None)
+
+def test_worker_tracks_scraped_sites_only_when_asked(monkeypatch, tmp_path):
+    monkeypatch.setattr(worker, "_robots", None)
+    monkeypatch.setattr(scraper, "scrape", lambda url, page=None: page_content(f"Made-to-measure suits from {url}"))
+    queue = JobQueue(str(tmp_path / "jobs.db"))
+    for host, track in (("untracked.example", False), ("tracked.example", True)):
+        url = f"https://{host}/"
+        worker.handle_scrape(queue, Job(1, "scrape", {"url": url, "track": track}, 1, 3, "a"))
+    tracked = recrawl.due(now=math.inf)
+    assert "https://tracked.example/" in tracked and "https://untracked.example/" not in tracked
@@ -0,0 +1,115 @@
+import socket
+
+import pytest
+import requests
+
+from utils import resilience
+from utils.resilience import CircuitBreaker, CircuitOpen, DeadlineExceeded, RetryPolicy
+
+@pytest.fixture(autouse=True)
+def no_sleep(monkeypatch):
+    """Record backoff sleeps instead of waiting, and start every test with closed circuits"""
+    sleeps = []
+    monkeypatch.setattr(resilience.time, "sleep", sleeps.append)
+    resilience.reset()
+    yield sleeps
+    resilience.reset()
+
+def http_error(status):
+    response = requests.Response()
+    response.status_code = status
+    return requests.HTTPError(f"{status} error", response=response)
+
+def failing(*errors, result="ok"):
+    """A function that raises the given errors in turn, then returns result"""
+    errors = list(errors)
+    calls = []
+
+    def fn():
+        calls.append(1)
+        if errors:
+            raise errors.pop(0)
+        return result
+    fn.calls = calls
+    return fn
+
+def test_backoff_is_full_jitter_within_the_cap(monkeypatch):
+    policy = RetryPolicy(5, 1.0, 8.0)
+    monkeypatch.setattr(resilience.random, "uniform", lambda low, high: high)
+    assert [resilience.backoff(policy, attempt) for attempt in range(5)] == [1.0, 2.0, 4.0, 8.0, 8.0]
+    monkeypatch.setattr(resilience.random, "uniform", lambda low, high: low)
+    assert resilience.backoff(policy, 3) == 0
+
+def test_transient_errors():
+    for error in (requests.ConnectionError("reset"), requests.Timeout("slow"), requests.exceptions.ChunkedEncodingError(),
+                  ConnectionResetError(), TimeoutError(), socket.gaierror("no such host"), http_error(503), http_error(429)):
+        assert resilience.transient(error), error
+    for error in (requests.exceptions.InvalidURL("bad"), requests.exceptions.MissingSchema("no scheme"),
+                  requests.exceptions.InvalidSchema("ftp"), requests.exceptions.TooManyRedirects(),
+                  FileNotFoundError(), PermissionError(), ValueError(), http_error(404),
+                  CircuitOpen("http:example.com", 5), DeadlineExceeded()):
+        assert not resilience.transient(error), error
+
+def test_call_retries_transient_errors_with_backoff(no_sleep):
+    fn = failing(requests.ConnectionError("reset"), requests.Timeout("slow"))
+    assert resilience.call("http:retry.example", fn, "http") == "ok"
+    assert len(fn.calls) == 3 and len(no_sleep) == 2
+    assert resilience.breaker("http:retry.example").failures == 0
+
+def test_permanent_errors_are_raised_at_once_and_not_held_against_the_endpoint():
+    fn = failing(requests.exceptions.MissingSchema("no scheme"))
+    with pytest.raises(requests.exceptions.MissingSchema):
+        resilience.call("http:permanent.example", fn, "http")
+    assert len(fn.calls) == 1
+    assert resilience.breaker("http:permanent.example").state == "closed"
+
+def test_breaker_opens_fails_fast_and_probes(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(resilience.time, "monotonic", lambda: clock[0])
+    circuit = CircuitBreaker(failure_threshold=3, reset_seconds=30)
+    assert not circuit.failure() and not circuit.failure()
+    assert circuit.failure() and circuit.state == "open"
+    assert circuit.acquire() == 30
+
+    clock[0] += 31
+    assert circuit.state == "half-open"
+    assert circuit.acquire() is None   # the probe
+    assert circuit.acquire() == 30     # everyone else waits for it
+    circuit.failure()
+    assert circuit.state == "open"
+
+    clock[0] += 31
+    assert circuit.acquire() is None
+    circuit.success()
+    assert circuit.state == "closed" and circuit.acquire() is None
+
+def test_open_circuit_stops_calls(no_sleep):
+    endpoint = "http:down.example"
+    down = failing(*[requests.ConnectionError("refused")] * 20)
+    for _ in range(resilience.BREAKER_FAILURE_THRESHOLD):
+        with pytest.raises((requests.ConnectionError, CircuitOpen)):
+            resilience.call(endpoint, down, "http", attempts=1)
+    calls = len(down.calls)
+    with pytest.raises(CircuitOpen):
+        resilience.call(endpoint, down, "http")
+    with pytest.raises(CircuitOpen):
+        resilience.check(endpoint)
+    assert len(down.calls) == calls
+
+def test_deadline_limits_retries_and_timeouts(monkeypatch, no_sleep):
+    clock = [0.0]
+    monkeypatch.setattr(resilience.time, "monotonic", lambda: clock[0])
+    monkeypatch.setattr(resilience.random, "uniform", lambda low, high: high)
+    with resilience.deadline(1.5):
+        assert resilience.timeout(10) == 1.5
+        with resilience.deadline(60):
+            assert resilience.remaining() == 1.5  # nested deadlines never extend
+        fn = failing(requests.Timeout("slow"), requests.Timeout("slow"))
+        with pytest.raises(requests.Timeout):
+            # The second backoff (2s) would overrun the deadline
+            resilience.call("http:slow.example", fn, "http")
+        assert len(fn.calls) == 2 and no_sleep == [1.0]
+        clock[0] += 2
+        with pytest.raises(DeadlineExceeded):
+            resilience.call("http:slow.example", failing(), "http")
+    assert resilience.remaining() is None
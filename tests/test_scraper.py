@@ -0,0 +1,116 @@
+import pytest
+
+from utils import crawl, scraper
+
+class FakeRobots:
+    def __init__(self, disallowed=(), delay=None):
+        self.disallowed = disallowed
+        self.delay = delay
+
+    def allowed(self, url):
+        return not url.endswith(self.disallowed)
+
+    def crawl_delay(self, url):
+        return self.delay
+
+def fetch_recorder(monkeypatch):
+    fetched = []
+
+    def fake_fetch(url, *args, **kwargs):
+        fetched.append(url)
+        return scraper.Page(url, 200, {}, b"<html></html>", "utf-8")
+
+    monkeypatch.setattr(scraper, "fetch_page", fake_fetch)
+    return fetched
+
+def settle(prefetch):
+    for future in list(prefetch._futures.values()):
+        try:
+            future.result(timeout=5)
+        except Exception:
+            pass
+
+def test_one_prefetch_serves_static_and_dynamic_attempts(monkeypatch):
+    created, seen = [], []
+
+    class CountingPrefetch:
+        def __init__(self, url):
+            created.append(url)
+
+        def take(self, url):
+            return None
+
+        def discard(self):
+            pass
+
+    def fake_static_attempt(url, max_retries=3, prefetch=None, page=None):
+        seen.append(prefetch)
+        return None
+
+    def fake_render(url, prefetch=None):
+        seen.append(prefetch)
+        return {"url": url, "main_content": "rendered"}
+
+    monkeypatch.setattr(scraper, "AboutPrefetch", CountingPrefetch)
+    monkeypatch.setattr(scraper, "_static_attempt", fake_static_attempt)
+    monkeypatch.setattr(scraper, "_render_dynamic", fake_render)
+    monkeypatch.setattr(scraper.site_routes, "remember_javascript", lambda url, reason: None)
+
+    assert scraper.scrape("https://example.com")["main_content"] == "rendered"
+    assert created == ["https://example.com"]
+    assert len(seen) == 2 and seen[0] is seen[1] is not None
+
+def test_prefetch_skips_paths_robots_disallows(monkeypatch):
+    fetched = fetch_recorder(monkeypatch)
+    monkeypatch.setattr(scraper, "RESPECT_ROBOTS", True)
+    monkeypatch.setattr(crawl, "_shared_robots", FakeRobots(disallowed=("/team", "/company")))
+
+    prefetch = scraper.AboutPrefetch("https://example.com/shop")
+    settle(prefetch)
+    assert fetched == ["https://example.com/about", "https://example.com/about-us"]
+    assert prefetch.take("https://example.com/about").url == "https://example.com/about"
+    assert prefetch.take("https://example.com/team") is None
+    prefetch.discard()
+
+def test_prefetch_stays_away_from_sites_with_crawl_delay(monkeypatch):
+    fetched = fetch_recorder(monkeypatch)
+    monkeypatch.setattr(scraper, "RESPECT_ROBOTS", True)
+    monkeypatch.setattr(crawl, "_shared_robots", FakeRobots(delay=10))
+
+    prefetch = scraper.AboutPrefetch("https://example.com")
+    settle(prefetch)
+    assert fetched == []
+    assert prefetch.take("https://example.com/about") is None
+
+def test_unrenderable_static_failures_skip_the_browser(monkeypatch):
+    monkeypatch.setattr(scraper, "RESPECT_ROBOTS", False)
+    rendered = []
+    monkeypatch.setattr(scraper, "_render_dynamic", lambda url, prefetch=None: rendered.append(url))
+    for error in (scraper.UnsupportedContent("https://example.com/report.pdf is application/pdf, not HTML"),
+                  scraper.resilience.CircuitOpen("http:example.com", 30)):
+        def failing_fetch(url, *args, error=error, **kwargs):
+            raise error
+        monkeypatch.setattr(scraper, "fetch_page", failing_fetch)
+        assert scraper.scrape("https://example.com/report.pdf") is None
+        assert scraper.scrape_static("https://example.com/report.pdf") is None
+    assert rendered == []
+
+def test_other_static_failures_fall_back_to_rendering(monkeypatch):
+    def failing_fetch(url, *args, **kwargs):
+        raise ConnectionError("connection reset")
+    monkeypatch.setattr(scraper, "RESPECT_ROBOTS", False)
+    monkeypatch.setattr(scraper, "fetch_page", failing_fetch)
+    monkeypatch.setattr(scraper, "_render_dynamic", lambda url, prefetch=None: {"main_content": "rendered"})
+    monkeypatch.setattr(scraper.site_routes, "remember_javascript", lambda url, reason: None)
+    assert scraper.scrape("https://example.com")["main_content"] == "rendered"
+
+def test_scrape_uses_a_page_that_was_already_fetched(monkeypatch):
+    monkeypatch.setattr(scraper, "PREFETCH_WORKERS", 0)
+    monkeypatch.setattr(scraper, "fetch_page", lambda url, *args, **kwargs: pytest.fail(f"fetched {url} again"))
+    html = (b"<html><head><title>Stitch Fashion Studio</title></head><body>"
+            + b"<p>Made-to-measure suits and dresses, fitted in our studio for weddings and events.</p>" * 5
+            + b"</body></html>")
+    page = scraper.Page("https://example.com/", 200, {"ETag": '"v2"'}, html, "utf-8")
+    result = scraper.scrape("https://example.com/", page=page)
+    assert result["business_name"] == "Stitch Fashion Studio"
+    assert result["validators"]["etag"] == '"v2"'
@@ -0,0 +1,43 @@
+from config import SHARD_BUCKETS
+from utils.sharding import HashRing, moved_buckets, owned_buckets, registrable_domain, shard_of
+
+WORKERS = ["worker-a", "worker-b", "worker-c", "worker-d"]
+
+def test_registrable_domain():
+    assert registrable_domain("https://shop.example.co.uk/about") == "example.co.uk"
+    assert registrable_domain("https://www.example.com:8443/") == "example.com"
+    assert registrable_domain("blog.example.com") == "example.com"
+    assert registrable_domain("http://127.0.0.1:8765/") == "127.0.0.1"
+    assert registrable_domain("localhost") == "localhost"
+
+def test_subdomains_share_a_shard():
+    assert shard_of("https://www.example.com/") == shard_of("https://shop.example.com/cart")
+    assert 0 <= shard_of("https://example.org/") < SHARD_BUCKETS
+
+def test_every_bucket_has_exactly_one_owner():
+    ring = HashRing(WORKERS)
+    owned = [ring.buckets_of(worker) for worker in WORKERS]
+    assert sum(len(buckets) for buckets in owned) == SHARD_BUCKETS
+    assert set().union(*owned) == set(range(SHARD_BUCKETS))
+    # Virtual nodes keep the split roughly even
+    assert all(len(buckets) > SHARD_BUCKETS / len(WORKERS) / 2 for buckets in owned)
+
+def test_ring_ignores_order_and_duplicates():
+    assert HashRing(WORKERS).buckets_of("worker-b") == HashRing(WORKERS[::-1] + ["worker-b"]).buckets_of("worker-b")
+    assert HashRing([]).owner(0) is None
+
+def test_joining_worker_only_takes_buckets():
+    before, after = HashRing(WORKERS), HashRing(WORKERS + ["worker-e"])
+    moved = moved_buckets(WORKERS, WORKERS + ["worker-e"])
+    assert moved and all(after.owner(bucket) == "worker-e" for bucket in moved)
+    # About a fifth of the buckets move, not a reshuffle of everything
+    assert len(moved) < SHARD_BUCKETS / 2
+    assert all(before.owner(bucket) == after.owner(bucket) for bucket in set(range(SHARD_BUCKETS)) - set(moved))
+
+def test_leaving_worker_hands_over_only_its_own_buckets():
+    gone = HashRing(WORKERS).buckets_of("worker-c")
+    assert set(moved_buckets(WORKERS, [w for w in WORKERS if w != "worker-c"])) == gone
+
+def test_owned_buckets_includes_the_asking_worker():
+    others = frozenset(WORKERS[1:])
+    assert owned_buckets("worker-a", others) == frozenset(HashRing(WORKERS).buckets_of("worker-a"))
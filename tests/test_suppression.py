@@ -0,0 +1,89 @@
+import os
+import threading
+
+import pytest
+
+from utils import suppression
+from utils.suppression import BloomFilter
+
+@pytest.fixture
+def fresh_process(tmp_path, monkeypatch):
+    """Point the suppression list at a new file; calling the result forgets the in-memory state like a restart"""
+    monkeypatch.setattr(suppression, "SUPPRESSION_DB", str(tmp_path / "suppression.db"))
+    monkeypatch.setattr(suppression, "SUPPRESSION_CAPACITY", 1000)
+
+    def restart():
+        suppression.save()
+        conn = getattr(suppression._local, "conn", None)
+        if conn is not None:
+            conn.close()
+        monkeypatch.setattr(suppression, "_local", threading.local())
+        monkeypatch.setattr(suppression, "_bloom", None)
+        monkeypatch.setattr(suppression, "_synced_rowid", 0)
+        monkeypatch.setattr(suppression, "_source_id", None)
+
+    restart()
+    yield restart
+    restart()
+
+def test_bloom_filter_has_no_false_negatives_and_few_false_positives():
+    bloom = BloomFilter(2000, error_rate=0.01)
+    for i in range(2000):
+        bloom.add(f"lead{i}@example.com")
+    assert all(f"lead{i}@example.com" in bloom for i in range(2000))
+    false_positives = sum(f"other{i}@example.org" in bloom for i in range(10000))
+    assert false_positives < 300
+
+def test_bloom_filter_round_trips_through_a_file(tmp_path):
+    bloom = BloomFilter(100)
+    bloom.add("jane@example.com")
+    path = str(tmp_path / "filter.bloom")
+    bloom.save(path, 7, b"0123456789abcdef")
+    loaded, synced_rowid, source = BloomFilter.load(path)
+    assert "jane@example.com" in loaded and "john@example.com" not in loaded
+    assert (loaded.count, synced_rowid, source) == (1, 7, b"0123456789abcdef")
+    assert BloomFilter.load(str(tmp_path / "missing.bloom")) == (None, 0, None)
+
+def test_lookup_normalizes_and_honors_reasons(fresh_process):
+    suppression.suppress(" Jane@Example.com ", suppression.SENT)
+    suppression.suppress("gone@example.com", "unsubscribed")
+    assert suppression.lookup("jane@example.com") == suppression.SENT
+    assert suppression.is_suppressed("JANE@example.com")
+    assert not suppression.is_suppressed("jane@example.com", allow_repeat=True)
+    assert suppression.is_suppressed("gone@example.com", allow_repeat=True)
+    assert suppression.lookup("new@example.com") is None
+
+def test_saved_filter_catches_up_with_rows_added_elsewhere(fresh_process):
+    suppression.suppress_many(["a@example.com", "b@example.com"])
+    fresh_process()
+    # Another process adds a row while this one is not running
+    conn = suppression._db()
+    with conn:
+        conn.execute("INSERT INTO suppressed (email, reason, added_at) VALUES ('c@example.com', 'bounced', 0)")
+    fresh_process()
+    assert suppression.is_suppressed("a@example.com")
+    assert suppression.is_suppressed("c@example.com")
+
+def test_recreated_database_rebuilds_the_saved_filter(fresh_process):
+    suppression.suppress_many(["a@example.com", "b@example.com", "c@example.com"])
+    fresh_process()
+    # The database is replaced but the .bloom file next to it stays behind
+    os.remove(suppression.SUPPRESSION_DB)
+    for suffix in ("-wal", "-shm"):
+        if os.path.exists(suppression.SUPPRESSION_DB + suffix):
+            os.remove(suppression.SUPPRESSION_DB + suffix)
+    assert os.path.exists(suppression._bloom_path())
+
+    conn = suppression._db()
+    with conn:
+        conn.execute("INSERT INTO suppressed (email, reason, added_at) VALUES ('new@example.com', 'unsubscribed', 0)")
+    assert suppression.is_suppressed("new@example.com")
+    assert not suppression.is_suppressed("a@example.com")
+
+def test_filter_from_an_older_format_is_rebuilt(fresh_process):
+    suppression.suppress("a@example.com")
+    fresh_process()
+    with open(suppression._bloom_path(), "r+b") as f:
+        f.write(b"BLM1")
+    fresh_process()
+    assert suppression.is_suppressed("a@example.com")
@@ -0,0 +1,40 @@
+import pytest
+
+from utils.industry_matcher import identify_industry
+from utils.taxonomy import Taxonomy, get_taxonomy
+
+# Fixed pages and the (industry, confidence) the shipped taxonomy gives them
+PAGES = [
+    ({"business_name": "Stitch Fashion Studio", "description": "Bespoke tailoring and boutique clothing",
+      "main_content": "We are a fashion boutique offering tailoring and alterations."}, ("fashion", 3.75)),
+    ({"business_name": "Corner Shop", "description": "Online store",
+      "main_content": "Shop our ecommerce store for home goods."}, ("ecommerce", 6.25)),
+    ({"business_name": "ByteWorks", "description": "Software development agency",
+      "main_content": "We build SaaS and mobile apps for startups."}, ("tech", 2.0)),
+    ({"business_name": "LofAI", "main_content": "Lo-fi looks for every wardrobe."}, ("fashion", 8.5)),
+    ({"business_name": "Harbour Bakery", "main_content": "Welcome to our website."}, ("service", 3.0)),
+    ({"main_content": "Bespoke suits", "structured_data": '{"business_type": "Fashion design studio and clothing brand"}'},
+     ("fashion", 6.25)),
+]
+
+@pytest.mark.parametrize("page, expected", PAGES, ids=[page.get("business_name", "structured") for page, _ in PAGES])
+def test_identify_industry_on_fixed_pages(page, expected):
+    industry, confidence = identify_industry(page)
+    assert (industry, confidence) == (expected[0], pytest.approx(expected[1]))
+
+def test_phrases_match_whole_words_once():
+    scores = get_taxonomy().score_industries("apps, apparel and more apparel said the analytics team")
+    # "apps" is not "app", "said" holds no "ai", and the repeated "apparel" counts once
+    assert scores == {"fashion": pytest.approx(10 / 8), "tech": pytest.approx(1.0)}
+
+def test_scores_are_normalized_by_business_type_count():
+    taxonomy = Taxonomy([("test.json", {"industries": {
+        "bakery": {"business_types": ["bakery", "patisserie"]},
+        "catering": {"business_types": ["catering", "events", "weddings", "buffets", "banquets"]},
+    }, "brands": {"crumbs": {"industry": "bakery", "scores": {"catering": 9.0}}}})])
+    assert taxonomy.score_industries("a patisserie doing weddings and events") == {"bakery": 5.0, "catering": 4.0}
+    # The industry name counts as NAME_WEIGHT business types
+    assert taxonomy.score_industries("bakery") == {"bakery": 20.0}
+    # A brand raises its industries to at least its scores
+    assert taxonomy.score_industries("crumbs catering") == {"catering": 9.0}
+    assert taxonomy.score_industries("nothing relevant") == {}
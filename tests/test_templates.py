@@ -0,0 +1,59 @@
+from utils.llm_json import JSONText, is_placeholder
+from utils.taxonomy import get_taxonomy
+from utils.templates import CampaignTemplates, parse_draft_modes
+
+LEAD = {"name": "Jane Doe", "email": "jane@example.com", "description": "Owner of a tailoring studio",
+        "relevance": "looking for new clients"}
+
+def failed_extraction(value):
+    return {
+        "business_name": "Acme",
+        "main_content": "Bespoke tailoring and custom suits made to measure.",
+        "structured_data": JSONText.from_object({
+            "business_name": "Acme",
+            "business_type": value,
+            "target_audience": value,
+            "services": [value],
+            "value_proposition": value
+        })
+    }
+
+def test_placeholders_are_recognized():
+    for value in ("Could not determine - insufficient data", "GUESS: possibly a fashion platform",
+                  "Error in parsing LLM response", "Unknown", "N/A", "", None):
+        assert is_placeholder(value)
+    for value in ("Fashion marketplace", "Unknown-brand sourcing for tailors", "Guesswork-free fitting"):
+        assert not is_placeholder(value)
+
+def test_failed_extraction_renders_without_placeholders():
+    for value in ("Could not determine - insufficient data", "GUESS: Integration of fashion and AI technology",
+                  "Error in parsing LLM response"):
+        campaign = CampaignTemplates(failed_extraction(value), {"*": "template"})
+        for email in ("jane@example.com", "joe@example.com", "ann@example.com", "bo@example.com"):
+            body = campaign.render(dict(LEAD, email=email))
+            assert "GUESS" not in body
+            assert "Could not determine" not in body
+            assert "Error in parsing" not in body
+            assert "from Acme." in body or "introduce Acme." in body
+
+def test_failed_extraction_uses_taxonomy_value_props():
+    campaign = CampaignTemplates(failed_extraction("Could not determine - insufficient data"), {"*": "template"})
+    value_props = get_taxonomy().industry(campaign.industry)["value_props"]
+    assert len(campaign.variants) == 2 * len(value_props)
+
+def test_real_structured_data_is_used():
+    data = failed_extraction("unused")
+    data["structured_data"] = JSONText.from_object({"business_type": "bespoke tailoring studio",
+                                                    "value_proposition": "suits cut to your measurements"})
+    campaign = CampaignTemplates(data, {"*": "template"})
+    body = campaign.render(LEAD)
+    assert "Acme, a bespoke tailoring studio" in body
+    assert "Suits cut to your measurements" in body
+
+def test_same_lead_gets_the_same_variant():
+    campaign = CampaignTemplates(failed_extraction("Unknown"), {"*": "template"})
+    assert campaign.render(LEAD) == campaign.render(dict(LEAD))
+
+def test_parse_draft_modes():
+    assert parse_draft_modes("template") == {"*": "template"}
+    assert parse_draft_modes("fashion=llm,*=template") == {"fashion": "llm", "*": "template"}
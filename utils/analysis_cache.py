@@ -0,0 +1,116 @@
+"""
+Reuse of stored analyses for sites whose content has not changed
+Each analyzed site's scraped text is fingerprinted with a 64-bit SimHash and
+stored per domain with the industry, structured data and business analysis.
+When a later scrape's fingerprint is within FINGERPRINT_MAX_DISTANCE bits of
+the stored one (small edits such as a new date or promo line), the stored
+results are reused and the extraction and analysis LLM calls are skipped.
+
+The cache is bypassed while record/replay is active so replayed runs stay
+comparable.
+"""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import time
+from collections import Counter
+from typing import Any, Dict, Optional
+
+from config import ANALYSIS_CACHE_PATH, FINGERPRINT_MAX_DISTANCE
+from utils import replay
+from utils.site_routes import domain_of
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+# Scraped fields that make up a site's content fingerprint
+FINGERPRINT_FIELDS = ("business_name", "description", "main_content", "about_content")
+
+def simhash(text: str, shingle_size: int = 3) -> int:
+    """64-bit SimHash of the word shingles in text (0 for text without words)"""
+    words = _WORD_RE.findall((text or "").lower())
+    if not words:
+        return 0
+    shingles = Counter(" ".join(words[i:i + shingle_size]) for i in range(max(len(words) - shingle_size + 1, 1)))
+
+    weights = [0] * 64
+    for shingle, count in shingles.items():
+        value = int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "big")
+        for bit in range(64):
+            weights[bit] += count if value >> bit & 1 else -count
+    return sum(1 << bit for bit in range(64) if weights[bit] > 0)
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+def fingerprint(scraped_data: Dict[str, Any]) -> int:
+    """SimHash of a scrape result's text fields"""
+    return simhash(" ".join(str(scraped_data.get(field) or "") for field in FINGERPRINT_FIELDS))
+
+def _enabled() -> bool:
+    return bool(ANALYSIS_CACHE_PATH) and replay.get_mode() == "off"
+
+def _connect() -> sqlite3.Connection:
+    directory = os.path.dirname(ANALYSIS_CACHE_PATH)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    conn = sqlite3.connect(ANALYSIS_CACHE_PATH, timeout=30)
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS analyses (domain TEXT PRIMARY KEY, fingerprint TEXT NOT NULL, "
+        "result TEXT NOT NULL, updated_at REAL NOT NULL)"
+    )
+    return conn
+
+def lookup(url: str, scraped_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Return the stored analysis for a site if its content is unchanged
+
+    Args:
+        url: Site URL
+        scraped_data: Fresh scrape result
+
+    Returns:
+        Dictionary with industry, confidence, structured_data and analysis,
+        or None if the site has no stored analysis or its content changed
+    """
+    if not _enabled():
+        return None
+    current = fingerprint(scraped_data)
+    if not current:
+        return None
+
+    conn = _connect()
+    try:
+        row = conn.execute("SELECT fingerprint, result FROM analyses WHERE domain = ?", (domain_of(url),)).fetchone()
+    finally:
+        conn.close()
+    if row is None or hamming_distance(int(row[0], 16), current) > FINGERPRINT_MAX_DISTANCE:
+        return None
+    return json.loads(row[1])
+
+def store(url: str, scraped_data: Dict[str, Any], result: Dict[str, Any]):
+    """
+    Save a site's analysis with the fingerprint of the scrape it came from
+
+    Args:
+        url: Site URL
+        scraped_data: Scrape result that was analyzed
+        result: Dictionary with industry, confidence, structured_data and analysis
+    """
+    if not _enabled():
+        return
+    current = fingerprint(scraped_data)
+    if not current:
+        return
+
+    conn = _connect()
+    try:
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO analyses (domain, fingerprint, result, updated_at) VALUES (?, ?, ?, ?)",
+                (domain_of(url), format(current, "016x"), json.dumps(result), time.time())
+            )
+    finally:
+        conn.close()
@@ -1,9 +1,11 @@
-from config import OPENAI_API_KEY
-import openai
-import json
-import re
+from utils.llm import chat_completion
+from utils.llm_json import ANALYSIS_SCHEMA, JSONText, as_object, extract_json
+from utils.prompt_budget import fit_sections, relevance_keywords
+from utils.taxonomy import get_taxonomy
+from config import ANALYZE_TOKEN_BUDGET
+import logging
 
-openai.api_key = OPENAI_API_KEY
+logger = logging.getLogger(__name__)
 
 def analyze_business(business_data):
     """
@@ -13,7 +15,8 @@ def analyze_business(business_data):
         business_data: Dictionary containing scraped business information
         
     Returns:
-        String containing JSON with business_type and lead_type list
+        JSONText (a JSON string with the decoded object in .obj) with
+        business_type and lead_type list
     """
     # Extract relevant fields for analysis
     business_name = business_data.get('business_name', 'Unknown Business')
@@ -21,14 +24,8 @@ def analyze_business(business_data):
     main_content = business_data.get('main_content', '')
     about_content = business_data.get('about_content', '')
     
-    # Try to parse structured data if it exists (from extract_structured_data)
-    structured_data = {}
-    if 'structured_data' in business_data and isinstance(business_data['structured_data'], str):
-        try:
-            structured_data = json.loads(business_data['structured_data'])
-        except:
-            print("Error parsing structured_data JSON")
-            structured_data = {}
+    # Structured data from extract_structured_data, decoded once upstream
+    structured_data = as_object(business_data.get('structured_data'))
     
     # If we have image alt texts, add them to the analysis
     image_alt_texts = business_data.get('images_alt_text', [])
@@ -41,11 +38,18 @@ def analyze_business(business_data):
     Description: {description}
     """
     
-    if about_content:
-        combined_text += f"\nAbout Content: {about_content[:1000]}...\n"
+    # Fit about and main content into the token budget, keeping the most relevant sentences
+    page_text = fit_sections(
+        [("about", about_content), ("main", main_content)],
+        ANALYZE_TOKEN_BUDGET,
+        relevance_keywords(business_data)
+    )
     
-    if main_content:
-        combined_text += f"\nMain Content: {main_content[:1000]}...\n"
+    if page_text["about"]:
+        combined_text += f"\nAbout Content: {page_text['about']}\n"
+    
+    if page_text["main"]:
+        combined_text += f"\nMain Content: {page_text['main']}\n"
     
     if image_alt_texts:
         combined_text += f"\nImage Descriptions: {', '.join(image_alt_texts)}\n"
@@ -53,44 +57,30 @@ def analyze_business(business_data):
     if possible_services:
         combined_text += f"\nPossible Services/Features: {', '.join(possible_services)}\n"
     
-    # Look for specific keywords that might indicate business type
-    fashion_indicators = ["fashion", "clothing", "apparel", "wear", "tailor", "designer", "outfit", "garment", "style"]
-    tech_indicators = ["ai", "tech", "technology", "digital", "software", "app", "platform", "automation"]
-    
-    fashion_score = 0
-    tech_score = 0
-    
-    # Check business name for indicators
-    for term in fashion_indicators:
-        if re.search(rf'\b{term}\b', business_name.lower()) or re.search(rf'\b{term}\b', description.lower()):
-            fashion_score += 3  # Higher weight for name and description
+    # Look for taxonomy indicator terms that might indicate business type;
+    # terms in the name or description weigh more than terms in the content
+    taxonomy = get_taxonomy()
+    headline_terms = taxonomy.indicator_terms(f"{business_name} {description}")
+    content_terms = taxonomy.indicator_terms(main_content + " " + about_content)
     
-    for term in tech_indicators:
-        if re.search(rf'\b{term}\b', business_name.lower()) or re.search(rf'\b{term}\b', description.lower()):
-            tech_score += 3  # Higher weight for name and description
-    
-    # Check other content
-    all_text = (main_content + " " + about_content).lower()
-    for term in fashion_indicators:
-        if re.search(rf'\b{term}\b', all_text):
-            fashion_score += 1
-    
-    for term in tech_indicators:
-        if re.search(rf'\b{term}\b', all_text):
-            tech_score += 1
+    findings = []
+    for industry, data in taxonomy.industries.items():
+        score = 3 * len(headline_terms.get(industry, ())) + len(content_terms.get(industry, ()))
+        if score > 0:
+            findings.append(f"{data.get('label', industry.title())}-related terms detected ({score} occurrences).")
     
     # Use this information to enhance the prompt
     heuristic_insights = ""
-    if fashion_score > 0 or tech_score > 0:
-        heuristic_insights += f"\nKeyword Analysis: "
-        if fashion_score > 0:
-            heuristic_insights += f"Fashion-related terms detected ({fashion_score} occurrences). "
-        if tech_score > 0:
-            heuristic_insights += f"Technology-related terms detected ({tech_score} occurrences)."
+    if findings:
+        heuristic_insights += "\nKeyword Analysis: " + " ".join(findings)
     
-    # If the business name is LOFAI, it may be related to fashion + AI
-    if "lofai" in business_name.lower():
-        heuristic_insights += "\nBusiness Name Analysis: The name 'LOFAI' might suggest a combination of fashion (LO for 'look' or clothing) and AI (Artificial Intelligence), indicating a fashion-tech platform that likely connects fashion designers or tailors with customers using AI technology."
+    # Brands with known positioning (e.g. a name that hints at the industry)
+    brands = [taxonomy.brands[name] for name in taxonomy.brands_in(business_name)]
+    for brand in brands:
+        if brand.get("insight"):
+            heuristic_insights += f"\nBusiness Name Analysis: {brand['insight']}"
+    brand_fallback = next((brand["analysis"] for brand in brands if brand.get("analysis")), None)
+    brand_hints = "\n    ".join(brand["prompt_hint"] for brand in taxonomy.brands.values() if brand.get("prompt_hint"))
     
     # If we have structured data, include it
     if structured_data:
@@ -112,7 +102,7 @@ def analyze_business(business_data):
     
     {heuristic_insights}
     
-    If this is "LOFAI" or "lofai.ng", it is likely a fashion-tech platform that connects tailors and fashion designers with customers using AI technology.
+    {brand_hints}
     
     Analyze the information and respond ONLY in this valid JSON format: 
     {{
@@ -124,62 +114,38 @@ def analyze_business(business_data):
     """
     
     try:
-        response = openai.ChatCompletion.create(
-            model="gpt-3.5-turbo",  # Fallback to GPT-3.5 if 4 is unavailable
-            messages=[{"role": "user", "content": prompt}]
-        )
-        
-        result = response.choices[0].message.content
+        result = chat_completion(prompt, stage="llm.analyze")
         
-        # Validate JSON
-        try:
-            json_obj = json.loads(result)
-            return result
-        except json.JSONDecodeError as e:
-            print(f"Error parsing API response JSON: {e}")
-            # Try to extract just the JSON part if there's extra text
-            match = re.search(r'({.+})', result.replace('\n', ' '), re.DOTALL)
-            if match:
-                try:
-                    json_str = match.group(1)
-                    json.loads(json_str)  # Validate
-                    return json_str
-                except:
-                    pass
+        # Parse and validate the JSON, skipping any extra text around it
+        parsed = extract_json(result, ANALYSIS_SCHEMA)
+        if parsed is not None:
+            return parsed
+        else:
+            logger.warning("No valid analysis JSON in the API response")
             
-            # Fallback to custom detection for Lofai
-            if "lofai" in business_name.lower():
-                return json.dumps({
-                    "business_type": "Fashion-Tech Platform combining clothing/fashion with AI technology",
-                    "lead_type": ["Fashion Designers", "Tailors", "Clothing Manufacturers"],
-                    "lead_search_keywords": ["tailor", "fashion designer", "clothing maker", "garment producer"],
-                    "value_proposition_highlights": "Connect with potential customers through an AI-powered platform specifically designed for fashion businesses"
-                })
+            # Fallback to the stored analysis of a known brand
+            if brand_fallback:
+                return JSONText.from_object(brand_fallback, fallback=True)
             else:
                 # Fall back to simpler format with what we know
-                return json.dumps({
+                return JSONText.from_object({
                     "business_type": "Unknown - please check website directly",
                     "lead_type": ["Business Owners", "Service Providers"],
                     "lead_search_keywords": ["business", "entrepreneur", "service provider"],
                     "value_proposition_highlights": "Unknown - please check website directly"
-                })
+                }, fallback=True)
             
     except Exception as e:
-        print(f"Error in business analysis: {e}")
+        logger.error("Error in business analysis: %s", e)
         
-        # Special case for LOFAI
-        if "lofai" in business_name.lower():
-            return json.dumps({
-                "business_type": "Fashion-Tech Platform combining clothing/fashion with AI technology",
-                "lead_type": ["Fashion Designers", "Tailors", "Clothing Manufacturers"],
-                "lead_search_keywords": ["tailor", "fashion designer", "clothing maker", "garment producer"],
-                "value_proposition_highlights": "Connect with potential customers through an AI-powered platform specifically designed for fashion businesses"
-            })
+        # Known brand
+        if brand_fallback:
+            return JSONText.from_object(brand_fallback, fallback=True)
         
         # Return fallback JSON
-        return json.dumps({
+        return JSONText.from_object({
             "business_type": "Unknown",
             "lead_type": ["General Business Owner"],
             "lead_search_keywords": ["business", "entrepreneur"],
             "value_proposition_highlights": "Unknown"
-        })
\ No newline at end of file
+        }, fallback=True)
\ No newline at end of file
@@ -0,0 +1,227 @@
+"""
+Polite crawling of many sites
+CrawlScheduler runs a scrape function (scrape, scrape_static or
+scrape_dynamic) over a list of URLs with a global worker limit while keeping
+every host polite: one job per host at a time, a minimum delay between jobs
+on the same host (or the robots.txt Crawl-delay if longer), and URLs that
+robots.txt disallows are skipped. Hosts take turns in round-robin order, so
+a long list for one host does not hold up the others.
+
+HostThrottle and RobotsCache can also be used on their own; shared_robots()
+is the RobotsCache shared by the scheduler, the queue worker and the
+scraper's about page prefetch.
+"""
+
+import heapq
+import itertools
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+from config import CRAWL_HOST_DELAY, CRAWL_WORKERS, ROBOTS_TTL_HOURS, RESPECT_ROBOTS
+from utils import replay, resilience
+from utils.metrics import record
+from utils.site_routes import domain_of
+
+logger = logging.getLogger(__name__)
+
+class RobotsCache:
+    """
+    Parsed robots.txt per site, refreshed after ttl seconds
+
+    Missing robots.txt (4xx) allows everything, 401/403 disallow everything,
+    and network or server errors are treated as allowed until the next refresh.
+    """
+
+    def __init__(self, ttl: float = ROBOTS_TTL_HOURS * 3600):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._parsers: Dict[str, Tuple[float, Any]] = {}
+
+    def _fetch(self, base_url: str) -> Dict[str, Any]:
+        from utils.scraper import get_session, host_endpoint
+
+        response = resilience.call(
+            host_endpoint(base_url),
+            lambda: get_session().get(base_url + "/robots.txt", timeout=resilience.timeout(10)),
+            "robots"
+        )
+        return {"status": response.status_code, "text": response.text if response.status_code < 400 else ""}
+
+    def _parser(self, url: str):
+        from urllib.robotparser import RobotFileParser
+
+        base_url = '/'.join(url.split('/')[:3])
+        with self._lock:
+            cached = self._parsers.get(base_url)
+        if cached and time.time() - cached[0] < self.ttl:
+            return cached[1]
+
+        parser = RobotFileParser(base_url + "/robots.txt")
+        try:
+            robots = replay.replay_or_call("robots", base_url, lambda: self._fetch(base_url))
+            if robots["status"] in (401, 403):
+                parser.disallow_all = True
+            elif robots["status"] >= 400:
+                parser.allow_all = True
+            else:
+                parser.parse(robots["text"].splitlines())
+        except Exception as e:
+            logger.debug("Could not read robots.txt for %s: %s", base_url, e, extra={"url": base_url})
+            parser.allow_all = True
+
+        with self._lock:
+            self._parsers[base_url] = (time.time(), parser)
+        return parser
+
+    def allowed(self, url: str) -> bool:
+        """Return True if robots.txt lets the scraper fetch url"""
+        from utils.scraper import USER_AGENT
+        return self._parser(url).can_fetch(USER_AGENT, url)
+
+    def crawl_delay(self, url: str) -> Optional[float]:
+        """Return the site's Crawl-delay in seconds, if it sets one"""
+        from utils.scraper import USER_AGENT
+        delay = self._parser(url).crawl_delay(USER_AGENT)
+        return float(delay) if delay is not None else None
+
+_shared_robots: Optional[RobotsCache] = None
+_shared_robots_lock = threading.Lock()
+
+def shared_robots() -> RobotsCache:
+    """The process-wide RobotsCache, so robots.txt is fetched once per site whoever asks"""
+    global _shared_robots
+    if _shared_robots is None:
+        with _shared_robots_lock:
+            if _shared_robots is None:
+                _shared_robots = RobotsCache()
+    return _shared_robots
+
+class HostThrottle:
+    """
+    Minimum delay between requests to the same host, for callers that fetch
+    one URL at a time (e.g., queue workers)
+    """
+
+    def __init__(self, min_delay: float = CRAWL_HOST_DELAY):
+        self.min_delay = min_delay
+        self._lock = threading.Lock()
+        self._next_slot: Dict[str, float] = {}
+
+    def acquire(self, url: str, delay: Optional[float] = None):
+        """Block until url's host may be requested again, then reserve the next slot"""
+        host = domain_of(url)
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = start + max(self.min_delay, delay or 0)
+        if start > now:
+            record("politeness_wait_seconds", start - now)
+            time.sleep(start - now)
+
+class CrawlScheduler:
+    """
+    Round-robin, per-host polite execution of a scrape function over URLs
+
+    Args:
+        workers: Jobs running at once across all hosts
+        min_delay: Seconds between the end of one job and the start of the next on the same host
+        respect_robots: Skip URLs disallowed by robots.txt and honor its Crawl-delay
+    """
+
+    def __init__(self, workers: int = CRAWL_WORKERS, min_delay: float = CRAWL_HOST_DELAY,
+                 respect_robots: bool = RESPECT_ROBOTS):
+        self.workers = max(1, workers)
+        self.min_delay = min_delay
+        self.robots = shared_robots() if respect_robots else None
+        self._queues: Dict[str, deque] = {}
+        self._ready = []  # (available_at, seq, host) for hosts with queued URLs and no job running
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._running = 0
+
+    def add(self, url: str):
+        """Queue a URL; its host joins the rotation if it is not already in it"""
+        host = domain_of(url)
+        with self._cond:
+            if host not in self._queues:
+                self._queues[host] = deque()
+                heapq.heappush(self._ready, (time.monotonic(), next(self._seq), host))
+            self._queues[host].append(url)
+            self._cond.notify()
+
+    def _next_job(self) -> Optional[Tuple[str, str]]:
+        with self._cond:
+            while True:
+                if self._ready:
+                    available_at, _, host = self._ready[0]
+                    wait = available_at - time.monotonic()
+                    if wait <= 0:
+                        heapq.heappop(self._ready)
+                        self._running += 1
+                        return host, self._queues[host].popleft()
+                    self._cond.wait(wait)
+                elif self._running:
+                    self._cond.wait()
+                else:
+                    return None
+
+    def _finish_job(self, host: str, delay: float):
+        with self._cond:
+            self._running -= 1
+            if self._queues[host]:
+                heapq.heappush(self._ready, (time.monotonic() + delay, next(self._seq), host))
+            else:
+                del self._queues[host]
+            self._cond.notify_all()
+
+    def _work(self, fn: Callable[[str], Any], results: "queue.Queue"):
+        while True:
+            job = self._next_job()
+            if job is None:
+                return
+            host, url = job
+            delay = self.min_delay
+            try:
+                if self.robots is not None:
+                    delay = max(delay, self.robots.crawl_delay(url) or 0)
+                    if not self.robots.allowed(url):
+                        record("robots_disallowed")
+                        logger.info("robots.txt disallows %s, skipping", url, extra={"url": url})
+                        results.put((url, None, "disallowed by robots.txt"))
+                        continue
+                results.put((url, fn(url), None))
+            except Exception as e:
+                logger.warning("Crawl of %s failed: %s", url, e, extra={"url": url})
+                results.put((url, None, str(e)))
+            finally:
+                self._finish_job(host, delay)
+
+    def run(self, fn: Callable[[str], Any], urls: Iterable[str] = ()) -> Iterator[Tuple[str, Any, Optional[str]]]:
+        """
+        Run fn over the queued URLs (plus urls) and yield results as jobs finish
+
+        Args:
+            fn: Scrape function taking a URL
+            urls: Additional URLs to queue first
+
+        Yields:
+            (url, result, error) tuples; error is None on success
+        """
+        for url in urls:
+            self.add(url)
+        with self._cond:
+            total = sum(len(q) for q in self._queues.values())
+
+        results = queue.Queue()
+        threads = [threading.Thread(target=self._work, args=(fn, results), daemon=True)
+                   for _ in range(min(self.workers, total))]
+        for thread in threads:
+            thread.start()
+        for _ in range(total):
+            yield results.get()
+        for thread in threads:
+            thread.join()
@@ -0,0 +1,58 @@
+"""
+Email draft files written incrementally from streamed content
+"""
+
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+INCOMPLETE_SUFFIX = ".incomplete"
+
+def stream_draft(path, to_email, subject, chunks, echo=False, fallback=None):
+    """
+    Write an email draft to disk as its body streams in
+    
+    If the chunks fail midway, the partial draft is renamed to
+    <path>.incomplete so it is never mistaken for a finished email. With a
+    fallback, the complete body it returns is then written to path instead;
+    without one, the error is raised.
+    
+    Args:
+        path: Draft file path
+        to_email: Recipient email address
+        subject: Email subject
+        chunks: Iterable of body text chunks (e.g., from stream_email_content)
+        echo: Also print each chunk to the terminal as it arrives
+        fallback: Function returning a complete body (e.g., generate_email_content)
+        
+    Returns:
+        The complete email body
+    """
+    parts = []
+    try:
+        with open(path, "w") as f:
+            f.write(f"To: {to_email}\n")
+            f.write(f"Subject: {subject}\n\n")
+            f.flush()
+            
+            for chunk in chunks:
+                parts.append(chunk)
+                f.write(chunk)
+                f.flush()
+                if echo:
+                    print(chunk, end="", flush=True)
+    except Exception as e:
+        if os.path.exists(path):
+            os.replace(path, path + INCOMPLETE_SUFFIX)
+        if fallback is None:
+            raise
+        logger.warning("Draft %s was interrupted (%s); partial text kept in %s%s", path, e, path, INCOMPLETE_SUFFIX)
+        if echo:
+            print("\n\n⚠️ Generation was interrupted; complete draft:\n")
+        return stream_draft(path, to_email, subject, [fallback()], echo=echo)
+    
+    if echo:
+        print()
+    
+    return "".join(parts)
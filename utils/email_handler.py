@@ -1,72 +1,365 @@
-from config import GMAIL_USER, GMAIL_PASSWORD
+from config import GMAIL_USER, GMAIL_PASSWORD, SMTP_DEBUG, BULK_RENDER_WORKERS
+import atexit
+import logging
+import re
 import smtplib
+from collections import namedtuple
+from email import policy
 from email.mime.text import MIMEText
 import sys
+from utils import resilience, suppression
+from utils.metrics import timed, record
 
-def send_email(to_email, subject, body):
+logger = logging.getLogger(__name__)
+
+# Authenticated SMTP connection reused across sends in the same process
+_connection = None
+
+# Circuit breaker key of the SMTP server
+SMTP_ENDPOINT = "smtp:smtp.gmail.com"
+
+def _connect():
+    """
+    Open and authenticate a new Gmail SMTP connection
+    
+    Tries STARTTLS on port 587 first, then SSL on port 465.
+    Errors from the SSL attempt are raised to the caller.
+    """
+    try:
+        # First try with standard port 587
+        logger.info("Connecting to Gmail SMTP server...")
+        server = smtplib.SMTP("smtp.gmail.com", 587, timeout=resilience.timeout(60))
+        server.set_debuglevel(1 if SMTP_DEBUG else 0)  # Protocol trace only when SMTP_DEBUG is set
+        logger.debug("Starting TLS encryption...")
+        server.starttls()
+        logger.debug("Attempting login for %s...", GMAIL_USER)
+        server.login(GMAIL_USER, GMAIL_PASSWORD)
+        return server
+    except Exception as e:
+        logger.warning("Error using port 587: %s", e)
+        logger.info("Attempting alternative method...")
+    
+    # Try alternate port 465 with SSL
+    server_ssl = smtplib.SMTP_SSL("smtp.gmail.com", 465, timeout=resilience.timeout(60))
+    server_ssl.set_debuglevel(1 if SMTP_DEBUG else 0)
+    logger.debug("Attempting login for %s using SSL...", GMAIL_USER)
+    server_ssl.login(GMAIL_USER, GMAIL_PASSWORD)
+    return server_ssl
+
+def get_connection():
+    """Return the pooled SMTP connection, reconnecting if it has gone stale"""
+    global _connection
+    if _connection is not None:
+        try:
+            if _connection.noop()[0] == 250:
+                record("cache_hits")
+                return _connection
+        except (smtplib.SMTPException, OSError):
+            pass
+        close_connection()
+    
+    _connection = _connect()
+    return _connection
+
+def close_connection():
+    """Close the pooled SMTP connection if one is open"""
+    global _connection
+    if _connection is not None:
+        try:
+            _connection.quit()
+        except (smtplib.SMTPException, OSError):
+            pass
+        _connection = None
+
+atexit.register(close_connection)
+
+def _smtp_retryable(error):
+    """Retry dropped connections and temporary (4xx) replies, not logins or refused recipients"""
+    if isinstance(error, (smtplib.SMTPAuthenticationError, smtplib.SMTPRecipientsRefused)):
+        return False
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 400 <= error.smtp_code < 500
+    return isinstance(error, OSError)
+
+def _send_once(to_email, data):
+    """One send attempt on the pooled connection; a connection in an unknown state is dropped"""
+    server = get_connection()
+    try:
+        server.sendmail(GMAIL_USER, [to_email], data)
+    except (smtplib.SMTPResponseException, smtplib.SMTPRecipientsRefused):
+        raise
+    except (smtplib.SMTPException, OSError) as e:
+        logger.warning("SMTP connection lost: %s", e)
+        close_connection()
+        raise
+
+AUTH_HELP = """Gmail Authentication Error
+-----------------------------
+1. Check that your Gmail account has 'Less secure app access' enabled
+   or preferably use an App Password
+2. Verify the App Password is correctly copied to your .env file
+3. Make sure there are no extra spaces in the password
+4. If using 2FA, you MUST use an App Password
+
+To generate an App Password:
+1. Go to https://myaccount.google.com/security
+2. Under 'Signing in to Google', select 'App Passwords'
+3. Generate a new App Password for 'Mail' and 'Other'
+4. Copy the 16-character password (with spaces) to your .env file"""
+
+@timed("send_email")
+def send_email(to_email, subject, body, allow_repeat=False):
     """
     Send an email using Gmail SMTP
     
+    The SMTP connection is kept open and reused by later calls. Addresses on
+    the suppression list are skipped, and sent addresses are added to it.
+    
     Args:
         to_email: Recipient email address
         subject: Email subject
         body: Email body text
+        allow_repeat: Allow mailing an address that was already contacted
+                      (opt-outs are still honored)
     
     Returns:
         bool: True if email was sent successfully, False otherwise
     """
     if not GMAIL_USER or not GMAIL_PASSWORD:
-        print("\n❌ Email configuration error:")
-        print("Missing Gmail credentials in .env file")
-        print("Make sure you have both GMAIL_USER and GMAIL_PASSWORD set")
+        logger.error("Email configuration error: missing Gmail credentials in .env file. "
+                     "Make sure you have both GMAIL_USER and GMAIL_PASSWORD set")
+        return False
+    
+    if suppression.is_suppressed(to_email, allow_repeat=allow_repeat):
+        record("suppressed")
+        logger.warning("Not sending to %s: address is on the suppression list", to_email, extra={"recipient": to_email})
         return False
     
+    try:
+        deliver(to_email, subject, body)
+    except smtplib.SMTPAuthenticationError as e:
+        record("errors")
+        logger.error("SMTP login failed: %s\n%s", e, AUTH_HELP)
+        return False
+    except Exception as e:
+        record("errors")
+        logger.error("Error sending email to %s: %s", to_email, e, extra={"recipient": to_email})
+        return False
+    return True
+
+def deliver(to_email, subject, body):
+    """
+    Send one email on the pooled connection and add the address to the suppression list
+    
+    Unlike send_email, this neither checks credentials nor the suppression
+    list, and failures are raised so callers can tell a refused recipient or
+    a 5xx reply (final) from a dropped connection (worth retrying).
+    
+    Raises:
+        smtplib.SMTPException or OSError: If the message was not accepted
+        resilience.CircuitOpen: If the SMTP server has been failing
+    """
     msg = MIMEText(body)
     msg['Subject'] = subject
     msg['From'] = GMAIL_USER
     msg['To'] = to_email
     
+    # Dropped connections and temporary failures are retried on a fresh
+    # connection under the "smtp" policy; an SMTP server that keeps failing
+    # trips its circuit breaker and later sends fail fast
+    resilience.call(SMTP_ENDPOINT, lambda: _send_once(to_email, msg.as_string()), "smtp",
+                    retryable=_smtp_retryable)
+    
+    logger.info("Email sent to %s", to_email, extra={"recipient": to_email})
+    suppression.suppress(to_email, suppression.SENT)
+
+# Per-recipient outcome of send_bulk: status is "sent", "suppressed", "rejected" or "error"
+SendResult = namedtuple("SendResult", ["email", "status", "code", "message"])
+
+_LEADING_DOT_RE = re.compile(rb"^\.", re.MULTILINE)
+
+def render_message(to_email, subject, body, sender=None):
+    """Build a message and return its wire bytes (CRLF line endings, ready for DATA)"""
+    msg = MIMEText(body)
+    msg['Subject'] = subject
+    msg['From'] = sender or GMAIL_USER
+    msg['To'] = to_email
+    return msg.as_bytes(policy=policy.SMTP)
+
+def _render(args):
+    return render_message(*args)
+
+def _render_all(messages, sender, workers):
+    """Render message bytes, on a process pool for large batches"""
+    jobs = [(to_email, subject, body, sender) for to_email, subject, body in messages]
+    if workers <= 1 or len(jobs) < 200:
+        return [_render(job) for job in jobs]
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_render, jobs, chunksize=64))
+
+def _data_block(data):
+    """Dot-stuff message bytes and terminate them for the DATA phase"""
+    data = _LEADING_DOT_RE.sub(b"..", data)
+    if not data.endswith(b"\r\n"):
+        data += b"\r\n"
+    return data + b".\r\n"
+
+def _send_pipelined(server, sender, batch, results):
+    """
+    Send (index, email, data) items with ESMTP PIPELINING (RFC 2920)
+    
+    Each round trip carries the previous message's content together with the
+    next message's MAIL, RCPT and DATA commands, so a message costs about one
+    round trip instead of four. Returns the items that were not attempted
+    because the connection dropped.
+    """
+    pending = None  # (index, email) whose content is in the next group
+    reset = False   # a failed transaction must be RSET before the next MAIL
+    position = 0
     try:
-        # First try with standard port 587
-        print("\nConnecting to Gmail SMTP server...")
-        server = smtplib.SMTP("smtp.gmail.com", 587)
-        server.set_debuglevel(1)  # Enable debug output
-        print("Starting TLS encryption...")
-        server.starttls()
-        print(f"Attempting login for {GMAIL_USER}...")
-        server.login(GMAIL_USER, GMAIL_PASSWORD)
-        print("Sending email...")
-        server.sendmail(GMAIL_USER, [to_email], msg.as_string())
-        server.quit()
-        print("✅ Email sent successfully!")
-        return True
-    except Exception as e:
-        print(f"\n❌ Error using port 587: {e}")
-        print("\nAttempting alternative method...")
+        for position, (index, email, data) in enumerate(batch):
+            group = b""
+            if pending is not None:
+                group += pending[2]
+            if reset:
+                group += b"RSET\r\n"
+            group += f"MAIL FROM:<{sender}>\r\nRCPT TO:<{email}>\r\nDATA\r\n".encode("utf-8")
+            server.send(group)
+            
+            if pending is not None:
+                code, message = server.getreply()
+                results[pending[0]] = SendResult(pending[1], "sent" if code == 250 else "rejected", code, message.decode(errors="replace"))
+                pending = None
+            if reset:
+                server.getreply()
+                reset = False
+            
+            mail_reply = server.getreply()
+            rcpt_reply = server.getreply()
+            data_code, data_message = server.getreply()
+            if data_code == 354:
+                pending = (index, email, _data_block(data))
+            else:
+                # Report the first failing step of the transaction
+                code, message = next((r for r in (mail_reply, rcpt_reply) if r[0] not in (250, 251)), (data_code, data_message))
+                results[index] = SendResult(email, "rejected", code, message.decode(errors="replace"))
+                reset = True
+        position = len(batch)
         
+        if pending is not None:
+            server.send(pending[2])
+            code, message = server.getreply()
+            results[pending[0]] = SendResult(pending[1], "sent" if code == 250 else "rejected", code, message.decode(errors="replace"))
+            pending = None
+        if reset:
+            server.rset()
+        return []
+    except (smtplib.SMTPServerDisconnected, OSError) as e:
+        # A message whose content was sent may or may not have been delivered, so
+        # it isn't resent; messages that only got as far as DATA are retried
+        if pending is not None:
+            results[pending[0]] = SendResult(pending[1], "error", None, f"Connection lost after DATA: {e}")
+        return [item for item in batch[position:] if item[0] not in results]
+
+def _send_sequential(server, sender, batch, results):
+    """Send (index, email, data) items one transaction at a time; returns unattempted items on disconnect"""
+    for position, (index, email, data) in enumerate(batch):
         try:
-            # Try alternate port 465 with SSL
-            server_ssl = smtplib.SMTP_SSL("smtp.gmail.com", 465)
-            server_ssl.set_debuglevel(1)  # Enable debug output
-            print(f"Attempting login for {GMAIL_USER} using SSL...")
-            server_ssl.login(GMAIL_USER, GMAIL_PASSWORD)
-            print("Sending email...")
-            server_ssl.sendmail(GMAIL_USER, [to_email], msg.as_string())
-            server_ssl.quit()
-            print("✅ Email sent successfully using SSL!")
-            return True
-        except Exception as e2:
-            print(f"\n❌ Error using SSL port 465: {e2}")
-            print("\n✘ Gmail Authentication Error")
-            print("-----------------------------")
-            print("1. Check that your Gmail account has 'Less secure app access' enabled")
-            print("   or preferably use an App Password")
-            print("2. Verify the App Password is correctly copied to your .env file")
-            print("3. Make sure there are no extra spaces in the password")
-            print("4. If using 2FA, you MUST use an App Password")
-            print("\nTo generate an App Password:")
-            print("1. Go to https://myaccount.google.com/security")
-            print("2. Under 'Signing in to Google', select 'App Passwords'")
-            print("3. Generate a new App Password for 'Mail' and 'Other'")
-            print("4. Copy the 16-character password (with spaces) to your .env file")
-            return False
\ No newline at end of file
+            server.sendmail(sender, [email], data)
+            results[index] = SendResult(email, "sent", 250, "")
+        except smtplib.SMTPRecipientsRefused as e:
+            code, message = e.recipients.get(email, (None, b""))
+            results[index] = SendResult(email, "rejected", code, message.decode(errors="replace"))
+        except smtplib.SMTPResponseException as e:
+            results[index] = SendResult(email, "rejected", e.smtp_code, str(e.smtp_error))
+        except (smtplib.SMTPServerDisconnected, OSError) as e:
+            results[index] = SendResult(email, "error", None, f"Connection lost: {e}")
+            return batch[position + 1:]
+    return []
+
+@timed("send_bulk")
+def send_bulk(messages, server=None, sender=None, workers=BULK_RENDER_WORKERS):
+    """
+    Send a batch of emails over one SMTP connection
+    
+    Message bytes are rendered up front (on a process pool for large
+    batches), then sent with ESMTP PIPELINING when the server advertises it.
+    Suppressed addresses are skipped and sent ones are added to the
+    suppression list. If the connection drops, unsent messages are retried
+    once on a new connection.
+    
+    Args:
+        messages: Iterable of (to_email, subject, body) tuples
+        server: Connected smtplib.SMTP to use instead of the pooled Gmail connection
+        sender: Envelope and From address (default: GMAIL_USER)
+        workers: Processes used to render large batches
+    
+    Returns:
+        List of SendResult in the order of messages
+    """
+    messages = list(messages)
+    sender = sender or GMAIL_USER
+    results = {}
+    
+    sendable = []
+    for index, (to_email, subject, body) in enumerate(messages):
+        if suppression.is_suppressed(to_email):
+            results[index] = SendResult(to_email, "suppressed", None, "Address is on the suppression list")
+        else:
+            sendable.append(index)
+    
+    # Without a sender every MAIL FROM would be <None>; without a password the pooled login fails
+    if not sender or (server is None and not (GMAIL_USER and GMAIL_PASSWORD)):
+        logger.error("Email configuration error: missing Gmail credentials in .env file. "
+                     "Make sure you have both GMAIL_USER and GMAIL_PASSWORD set")
+        for index in sendable:
+            results[index] = SendResult(messages[index][0], "error", None, "Not sent: missing Gmail credentials")
+        sendable = []
+    
+    rendered = _render_all([messages[i] for i in sendable], sender, workers)
+    batch = [(index, messages[index][0], data) for index, data in zip(sendable, rendered)]
+    
+    for attempt in range(2):
+        if not batch:
+            break
+        try:
+            connection = server or resilience.call(SMTP_ENDPOINT, get_connection, "smtp", retryable=_smtp_retryable)
+        except Exception as e:
+            record("errors")
+            logger.error("Error connecting to the SMTP server: %s%s", e,
+                         "\n" + AUTH_HELP if isinstance(e, smtplib.SMTPAuthenticationError) else "")
+            break
+        
+        try:
+            connection.ehlo_or_helo_if_needed()
+        except (smtplib.SMTPException, OSError) as e:
+            # A pooled connection that can't even greet is dropped and reopened once
+            logger.warning("SMTP greeting failed: %s", e)
+        else:
+            if connection.has_extn("pipelining"):
+                batch = _send_pipelined(connection, sender, batch, results)
+            else:
+                batch = _send_sequential(connection, sender, batch, results)
+            if not batch:
+                break
+            logger.warning("SMTP connection lost with %d messages unsent", len(batch))
+        
+        if server is not None:
+            break
+        close_connection()
+    
+    for index, email, _ in batch:
+        results[index] = SendResult(email, "error", None, "Not sent: connection lost")
+    
+    ordered = [results[index] for index in range(len(messages))]
+    sent = [result.email for result in ordered if result.status == "sent"]
+    if sent:
+        suppression.suppress_many(sent, suppression.SENT)
+    record("sent", len(sent))
+    failed = sum(1 for result in ordered if result.status in ("rejected", "error"))
+    if failed:
+        record("errors", failed)
+    logger.info("Bulk send finished: %d sent, %d failed, %d suppressed", len(sent), failed,
+                sum(1 for result in ordered if result.status == "suppressed"))
+    return ordered
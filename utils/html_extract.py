@@ -0,0 +1,188 @@
+"""
+Single-pass HTML extraction for the scraper
+Pages are parsed once with lxml's C parser instead of BeautifulSoup's
+pure-Python html.parser backend. The title, meta description, paragraphs and
+candidate about links are collected in one walk over just those tags, and
+the about link pattern is compiled once at import.
+This module imports lxml at the top, so import it lazily from CLI code paths.
+"""
+
+import re
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+from lxml import etree
+from lxml import html as lxml_html
+
+ABOUT_LINK_RE = re.compile(r"about|company|team|who we are")
+
+# First main content container in document order, i.e. the first match of
+# "main, article, .content, #content, .main, #main"
+_CONTAINER_XPATH = etree.XPath(
+    '(//main | //article | //*[@id="content" or @id="main"'
+    ' or contains(concat(" ", normalize-space(@class), " "), " content ")'
+    ' or contains(concat(" ", normalize-space(@class), " "), " main ")])[1]'
+)
+
+# Paragraphs kept from pages without a content container
+MAX_PARAGRAPHS = 10
+# Site-wide chrome whose paragraphs (cookie notices, copyright lines) are not page content
+BOILERPLATE_TAGS = ("nav", "footer")
+
+# A page with less visible text than this is checked for being a JavaScript app shell
+SPA_MIN_TEXT = 200
+APP_ROOT_IDS = {"root", "app", "__next", "__nuxt", "svelte", "ember-app", "main-app"}
+APP_ROOT_ATTRIBUTES = ("ng-app", "ng-version", "data-reactroot", "data-server-rendered")
+NOSCRIPT_HINT_RE = re.compile(r"enable javascript|javascript (is )?(required|disabled)|requires javascript|turn on javascript", re.IGNORECASE)
+
+_VISIBLE_TEXT_XPATH = etree.XPath(
+    "//body//text()[not(ancestor::script or ancestor::style or ancestor::noscript or ancestor::template)]"
+)
+_ELEMENT_TEXT_XPATH = etree.XPath(
+    ".//text()[not(ancestor::script or ancestor::style or ancestor::noscript or ancestor::template)]"
+)
+
+def parse_html(markup: Union[str, bytes], encoding: Optional[str] = None):
+    """
+    Parse an HTML document with lxml
+
+    Args:
+        markup: Page source as text or raw bytes
+        encoding: Character encoding of raw bytes (detected by lxml when omitted)
+
+    Returns:
+        Root element, or None for empty or unparseable documents
+    """
+    if isinstance(markup, str):
+        markup, encoding = markup.encode("utf-8"), "utf-8"
+    if not markup or not markup.strip():
+        return None
+
+    try:
+        # Parsers keep state, so each call gets its own (scrapes run on several threads)
+        parser = lxml_html.HTMLParser(encoding=encoding) if encoding else lxml_html.HTMLParser()
+        return lxml_html.document_fromstring(markup, parser=parser)
+    except (etree.ParserError, ValueError, LookupError):
+        return None
+
+def _resolve_link(page_url: str, href: str) -> str:
+    if href.startswith('http'):
+        return href
+    if href.startswith('/'):
+        return '/'.join(page_url.split('/')[:3]) + href  # http(s)://domain.com
+    return page_url.rstrip('/') + '/' + href
+
+def _in_boilerplate(element) -> bool:
+    return next(element.iterancestors(*BOILERPLATE_TAGS), None) is not None
+
+def extract_page(markup: Union[str, bytes], url: str, encoding: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Extract the fields scrape_static needs from a landing page
+
+    The main content is the paragraphs of the first content container, or the
+    first MAX_PARAGRAPHS of the page without one. Paragraphs in navigation
+    and footers are left out, but their about links are kept.
+
+    Args:
+        markup: Page source as text or raw bytes
+        url: Page URL, used to resolve relative links
+        encoding: Character encoding of raw bytes
+
+    Returns:
+        Dictionary with title, description, main_content, about_links and
+        needs_javascript (True for app shells that need dynamic rendering)
+    """
+    result = {"title": "N/A", "description": "N/A", "main_content": "", "about_links": [], "needs_javascript": False}
+    root = parse_html(markup, encoding)
+    if root is None:
+        return result
+
+    containers = _CONTAINER_XPATH(root)
+    container = containers[0] if containers else None
+
+    title = None
+    description = None
+    paragraphs: List[str] = []
+    about_links: List[str] = []
+
+    for element in root.iter("title", "meta", "p", "a"):
+        tag = element.tag
+        if tag == "a":
+            href = element.get("href")
+            if href is not None and ABOUT_LINK_RE.search(element.text_content().lower()):
+                about_links.append(_resolve_link(url, href))
+        elif tag == "p":
+            if container is None and len(paragraphs) < MAX_PARAGRAPHS and not _in_boilerplate(element):
+                paragraphs.append(element.text_content().strip())
+        elif tag == "title":
+            if title is None:
+                title = element.text_content().strip()
+        elif description is None and element.get("name") == "description":
+            description = element.get("content")
+
+    if container is not None:
+        paragraphs = [p.text_content().strip() for p in container.iter("p") if not _in_boilerplate(p)]
+    main_content = " ".join(paragraphs)
+
+    result.update(
+        title=title or "N/A",
+        description=description if description is not None else "N/A",
+        main_content=main_content,
+        about_links=about_links,
+        needs_javascript=len(main_content) < SPA_MIN_TEXT and looks_like_app_shell(root)
+    )
+    return result
+
+def looks_like_app_shell(root) -> bool:
+    """
+    Decide whether a parsed page is a client-rendered app shell
+
+    A shell has little visible text plus a sign that a script fills the
+    page in: a <noscript> asking for JavaScript, or an empty app mount point
+    (e.g. <div id="root"></div>). Script bundles alone are not enough, since
+    short static pages load scripts too.
+    """
+    visible = sum(len(text.strip()) for text in _VISIBLE_TEXT_XPATH(root))
+    if visible >= SPA_MIN_TEXT:
+        return False
+
+    for element in root.iter("noscript"):
+        if NOSCRIPT_HINT_RE.search(element.text_content()):
+            return True
+    for element in root.iter("div", "main", "section", "app-root"):
+        if (element.tag == "app-root" or element.get("id") in APP_ROOT_IDS
+                or any(element.get(a) is not None for a in APP_ROOT_ATTRIBUTES)):
+            if not any(text.strip() for text in _ELEMENT_TEXT_XPATH(element)):
+                return True
+    return False
+
+def text_blocks(markup: Union[str, bytes], encoding: Optional[str] = None,
+                tags: Sequence[str] = ("p",), limit: Optional[int] = None,
+                min_length: int = 0) -> List[str]:
+    """
+    Collect the stripped text of the given tags in document order
+
+    Script, style and noscript content is ignored.
+
+    Args:
+        markup: Page source as text or raw bytes
+        encoding: Character encoding of raw bytes
+        tags: Element names to collect
+        limit: Maximum number of blocks to return
+        min_length: Skip blocks with this many characters or fewer
+
+    Returns:
+        List of text blocks
+    """
+    root = parse_html(markup, encoding)
+    if root is None:
+        return []
+    etree.strip_elements(root, "script", "style", "noscript", with_tail=False)
+
+    blocks = []
+    for element in root.iter(*tags):
+        text = element.text_content().strip()
+        if len(text) > min_length:
+            blocks.append(text)
+            if limit is not None and len(blocks) >= limit:
+                break
+    return blocks
@@ -2,100 +2,25 @@
 Industry-specific lead generation and matching module
 This module provides specialized logic for mapping business types to potential lead categories
 and generating targeted lead profiles based on industry-specific knowledge.
+Industry data comes from the taxonomy files (see utils/taxonomy.py).
 """
 
-import json
-import re
 import random
 from typing import Dict, List, Tuple, Any
+from utils.llm_json import as_object
+from utils import offload
+from utils.metrics import timed
+from utils.taxonomy import get_taxonomy
 
-# Industry mapping: Map business types to potential lead categories and relevant keywords
-INDUSTRY_MAPPING = {
-    "fashion": {
-        "business_types": [
-            "fashion platform", "clothing marketplace", "apparel", "fashion tech", 
-            "style platform", "clothing brand", "fashion design", "fashion retail"
-        ],
-        "lead_categories": [
-            "Fashion Designers", "Tailors", "Clothing Manufacturers", "Fashion Retailers",
-            "Textile Suppliers", "Fashion Influencers", "Boutique Owners"
-        ],
-        "value_props": [
-            "Expand your customer reach through our fashion platform",
-            "Connect directly with customers seeking custom clothing",
-            "Showcase your designs to a larger audience",
-            "Reduce marketing costs while increasing sales"
-        ],
-        "search_keywords": [
-            "fashion designer", "tailor", "bespoke clothing", "custom garments",
-            "clothing manufacturer", "fashion retailer", "boutique owner", "textile supplier"
-        ]
-    },
-    "tech": {
-        "business_types": [
-            "tech platform", "software", "saas", "technology", "app", "digital platform", 
-            "ai", "artificial intelligence", "machine learning", "analytics"
-        ],
-        "lead_categories": [
-            "Software Developers", "Tech Startups", "IT Consultants", "Data Scientists",
-            "Product Managers", "UX/UI Designers", "Technology Companies"
-        ],
-        "value_props": [
-            "Integrate cutting-edge technology into your business",
-            "Enhance your product capabilities with our AI solutions",
-            "Scale your technology infrastructure efficiently",
-            "Access advanced analytics to drive decision making"
-        ],
-        "search_keywords": [
-            "software developer", "tech startup", "it consultant", "technology company",
-            "product manager", "data scientist", "ai specialist", "tech entrepreneur"
-        ]
-    },
-    "ecommerce": {
-        "business_types": [
-            "ecommerce", "online store", "e-commerce", "online marketplace", "digital store",
-            "online retail", "webshop", "online sales"
-        ],
-        "lead_categories": [
-            "Product Suppliers", "Online Retailers", "Dropshippers", "Brand Owners",
-            "Logistics Companies", "Marketplace Sellers", "E-commerce Entrepreneurs"
-        ],
-        "value_props": [
-            "Expand your online sales channels",
-            "Reach a wider customer base with our platform",
-            "Simplify your e-commerce operations",
-            "Increase your online visibility and sales"
-        ],
-        "search_keywords": [
-            "online retailer", "product supplier", "e-commerce business", "dropshipper",
-            "brand owner", "marketplace seller", "e-commerce entrepreneur"
-        ]
-    },
-    "service": {
-        "business_types": [
-            "service provider", "consulting", "professional service", "agency", 
-            "freelance", "service marketplace", "consulting firm"
-        ],
-        "lead_categories": [
-            "Consultants", "Freelancers", "Service Providers", "Agencies",
-            "Professional Service Firms", "Experts", "Specialists"
-        ],
-        "value_props": [
-            "Connect with clients seeking your specific expertise",
-            "Expand your service offering through our platform",
-            "Find qualified clients more efficiently",
-            "Grow your service business with minimal marketing"
-        ],
-        "search_keywords": [
-            "consultant", "freelancer", "service provider", "agency",
-            "professional service", "expert", "specialist", "service firm"
-        ]
-    }
-}
+# Texts at least this long are scored on the parse process pool in bulk mode;
+# shorter ones cost less to score than to send to another process
+OFFLOAD_MIN_CHARS = 4096
 
-# Additional industry categories to be expanded over time
-# Add more industries with their specific lead types here
+def score_text(text: str) -> Dict[str, float]:
+    """Industry scores of a text (module-level so it can run in a worker process)"""
+    return get_taxonomy().score_industries(text)
 
+@timed("identify_industry")
 def identify_industry(business_data: Dict[str, Any]) -> Tuple[str, float]:
     """
     Identify the primary industry category based on business data
@@ -117,37 +42,19 @@ def identify_industry(business_data: Dict[str, Any]) -> Tuple[str, float]:
         ).lower()
         
         # Try to get structured data if available
-        if 'structured_data' in business_data:
-            try:
-                structured = json.loads(business_data['structured_data']) if isinstance(business_data['structured_data'], str) else business_data['structured_data']
-                business_text += ' ' + structured.get('business_type', '') + ' ' + structured.get('value_proposition', '')
-            except:
-                pass
+        structured = as_object(business_data.get('structured_data'))
+        if structured:
+            business_text += ' ' + str(structured.get('business_type', '')) + ' ' + str(structured.get('value_proposition', ''))
     else:
         # If it's not a dict, try to use it as a string
         business_text = str(business_data).lower()
     
-    # Score each industry based on keyword matches
-    industry_scores = {}
-    
-    for industry, data in INDUSTRY_MAPPING.items():
-        score = 0
-        for keyword in data['business_types']:
-            if re.search(r'\b' + re.escape(keyword.lower()) + r'\b', business_text):
-                score += 1
-                
-        # Check for the industry name itself
-        if re.search(r'\b' + re.escape(industry.lower()) + r'\b', business_text):
-            score += 3  # Higher weight for direct industry mention
-                
-        # Normalize score based on number of keywords
-        if score > 0:
-            industry_scores[industry] = score / len(data['business_types']) * 10
-    
-    # Special case for LOFAI (fashion tech platform)
-    if "lofai" in business_text:
-        industry_scores["fashion"] = max(industry_scores.get("fashion", 0), 8.5)
-        industry_scores["tech"] = max(industry_scores.get("tech", 0), 6.0)
+    # Score each industry from the compiled taxonomy index (one pass over the text)
+    taxonomy = get_taxonomy()
+    if offload.active() and len(business_text) >= OFFLOAD_MIN_CHARS:
+        industry_scores = offload.run(score_text, business_text)
+    else:
+        industry_scores = taxonomy.score_industries(business_text)
     
     # Get highest scoring industry
     if industry_scores:
@@ -155,7 +62,49 @@ def identify_industry(business_data: Dict[str, Any]) -> Tuple[str, float]:
         return top_industry
     
     # Default to a generic industry with low confidence if no matches
-    return ("service", 3.0)
+    return (taxonomy.default_industry, 3.0)
+
+# Name and description tables shared by the lead generators.
+# Built once at import so neither generator rebuilds them per call or per lead.
+# Per-industry email domains and business name parts come from the taxonomy.
+FIRST_NAMES = ["Emma", "James", "Sophia", "Michael", "Olivia", "William", "Ava", "John", 
+               "Isabella", "Robert", "Charlotte", "David", "Amelia", "Daniel", "Harper",
+               "Joseph", "Evelyn", "Thomas", "Abigail", "Richard", "Emily", "Charles",
+               "Elizabeth", "Christopher", "Sofia", "Matthew", "Avery", "Anthony", "Ella"]
+
+LAST_NAMES = ["Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis",
+              "Rodriguez", "Martinez", "Hernandez", "Lopez", "Gonzalez", "Wilson", "Anderson",
+              "Thomas", "Taylor", "Moore", "Jackson", "Martin", "Lee", "Perez", "Thompson",
+              "White", "Harris", "Sanchez", "Clark", "Ramirez", "Lewis", "Robinson", "Walker"]
+
+# Description templates by lead category as (template, slot options) pairs.
+# "{choice}" is filled from the slot options, "{years}" with 5-20 years.
+DESCRIPTION_TEMPLATES = {
+    "Fashion Designers": [
+        ("Independent fashion designer with a focus on sustainable clothing", []),
+        ("Designer and founder of a boutique fashion label specializing in custom pieces", []),
+        ("Fashion designer with expertise in {choice}", ['evening wear', 'casual wear', 'bridal', 'formal wear'])
+    ],
+    "Tailors": [
+        ("Master tailor with over {years} years of experience in bespoke clothing", []),
+        ("Owner of a custom tailoring business specializing in {choice}", ['suits', 'formal wear', 'alterations', 'wedding attire']),
+        ("Tailor with expertise in {choice}", ['mens suits', 'womens formal wear', 'traditional garments', 'denim'])
+    ],
+    "Software Developers": [
+        ("Senior software developer specializing in {choice}", ['mobile apps', 'web development', 'cloud solutions', 'AI applications']),
+        ("Lead developer at a tech startup focusing on {choice} solutions", ['fintech', 'healthtech', 'edtech', 'e-commerce']),
+        ("Full-stack developer with expertise in {choice}", ['React', 'Node.js', 'Python', 'Java'])
+    ]
+}
+
+def _format_email(template: str, first_name: str, last_name: str, business: str) -> str:
+    """Fill an email domain template from lead name parts"""
+    return template.format(
+        name=first_name.lower(),
+        initial=first_name[0].lower(),
+        last=last_name.lower(),
+        biz=business.lower()
+    )
 
 def get_industry_leads(industry: str, count: int = 3) -> List[Dict[str, str]]:
     """
@@ -168,49 +117,22 @@ def get_industry_leads(industry: str, count: int = 3) -> List[Dict[str, str]]:
     Returns:
         List of lead profiles as dictionaries
     """
-    industry_data = INDUSTRY_MAPPING.get(industry, INDUSTRY_MAPPING["service"])
+    industry_data = get_taxonomy().industry(industry)
     
     leads = []
     # Get lead categories for this industry
     lead_categories = industry_data["lead_categories"]
     
-    # Create realistic names
-    first_names = ["Emma", "James", "Sophia", "Michael", "Olivia", "William", "Ava", "John", 
-                   "Isabella", "Robert", "Charlotte", "David", "Amelia", "Daniel", "Harper",
-                   "Joseph", "Evelyn", "Thomas", "Abigail", "Richard", "Emily", "Charles",
-                   "Elizabeth", "Christopher", "Sofia", "Matthew", "Avery", "Anthony", "Ella"]
-    
-    last_names = ["Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis",
-                  "Rodriguez", "Martinez", "Hernandez", "Lopez", "Gonzalez", "Wilson", "Anderson",
-                  "Thomas", "Taylor", "Moore", "Jackson", "Martin", "Lee", "Perez", "Thompson",
-                  "White", "Harris", "Sanchez", "Clark", "Ramirez", "Lewis", "Robinson", "Walker"]
-    
-    # Domain templates for industry-specific email addresses
-    domain_templates = {
-        "fashion": ["{name}@{biz}design.com", "{name}@{biz}fashion.com", "{name}@{biz}style.co", "{initial}{last}@{biz}fashion.com"],
-        "tech": ["{name}@{biz}tech.com", "{name}@{biz}digital.io", "{name}@{biz}solutions.co", "{initial}{last}@{biz}tech.io"],
-        "ecommerce": ["{name}@{biz}retail.com", "{name}@{biz}store.com", "{name}@{biz}market.co", "{initial}{last}@{biz}shop.com"],
-        "service": ["{name}@{biz}consulting.com", "{name}@{biz}services.com", "{name}@{biz}experts.co", "{initial}{last}@{biz}group.com"]
-    }
-    
-    # Business name components by industry
-    business_components = {
-        "fashion": ["Style", "Trend", "Stitch", "Fashion", "Thread", "Design", "Apparel", "Mode", "Vogue", "Textile"],
-        "tech": ["Tech", "Byte", "Digital", "Smart", "Code", "Cyber", "Data", "Logic", "Cloud", "Pixel"],
-        "ecommerce": ["Market", "Store", "Shop", "Commerce", "Retail", "Trade", "Deal", "Buy", "Seller", "Mart"],
-        "service": ["Consult", "Advisor", "Expert", "Pro", "Service", "Solution", "Group", "Partner", "Team", "Specialist"]
-    }
-    
-    industry_domains = domain_templates.get(industry, domain_templates["service"])
-    industry_businesses = business_components.get(industry, business_components["service"])
+    industry_domains = industry_data["domain_templates"]
+    industry_businesses = industry_data["business_components"]
     
     for i in range(count):
         # Select a lead category
         category = random.choice(lead_categories)
         
         # Generate name
-        first_name = random.choice(first_names)
-        last_name = random.choice(last_names)
+        first_name = random.choice(FIRST_NAMES)
+        last_name = random.choice(LAST_NAMES)
         full_name = f"{first_name} {last_name}"
         
         # Create business name component
@@ -219,36 +141,15 @@ def get_industry_leads(industry: str, count: int = 3) -> List[Dict[str, str]]:
             business += random.choice(industry_businesses).lower()
         
         # Generate email
-        email_template = random.choice(industry_domains)
-        email = email_template.format(
-            name=first_name.lower(),
-            initial=first_name[0].lower(),
-            last=last_name.lower(),
-            biz=business.lower()
-        )
-        
-        # Create description based on category
-        descriptions = {
-            "Fashion Designers": [
-                f"Independent fashion designer with a focus on sustainable clothing",
-                f"Designer and founder of a boutique fashion label specializing in custom pieces",
-                f"Fashion designer with expertise in {random.choice(['evening wear', 'casual wear', 'bridal', 'formal wear'])}"
-            ],
-            "Tailors": [
-                f"Master tailor with over {random.randint(5, 20)} years of experience in bespoke clothing",
-                f"Owner of a custom tailoring business specializing in {random.choice(['suits', 'formal wear', 'alterations', 'wedding attire'])}",
-                f"Tailor with expertise in {random.choice(['mens suits', 'womens formal wear', 'traditional garments', 'denim'])}"
-            ],
-            "Software Developers": [
-                f"Senior software developer specializing in {random.choice(['mobile apps', 'web development', 'cloud solutions', 'AI applications'])}",
-                f"Lead developer at a tech startup focusing on {random.choice(['fintech', 'healthtech', 'edtech', 'e-commerce'])} solutions",
-                f"Full-stack developer with expertise in {random.choice(['React', 'Node.js', 'Python', 'Java'])}"
-            ]
-        }
+        email = _format_email(random.choice(industry_domains), first_name, last_name, business)
         
         # Get description based on category or generate a generic one
-        if category in descriptions:
-            description = random.choice(descriptions[category])
+        if category in DESCRIPTION_TEMPLATES:
+            template, choices = random.choice(DESCRIPTION_TEMPLATES[category])
+            description = template.format(
+                choice=random.choice(choices) if choices else "",
+                years=random.randint(5, 20)
+            )
         else:
             description = f"{category} with expertise in {industry} solutions"
         
@@ -264,6 +165,105 @@ def get_industry_leads(industry: str, count: int = 3) -> List[Dict[str, str]]:
     
     return leads
 
+class LeadBatch:
+    """
+    Columnar batch of synthetic leads produced by generate_bulk_leads
+    
+    Each field is stored as an array of table indices; lead dictionaries are
+    only built when the batch is iterated or indexed. The batch keeps the
+    taxonomy entry it was drawn from, so a taxonomy reload can't shift its
+    indices.
+    """
+    
+    def __init__(self, industry: str, columns: Dict[str, Any], industry_data: Dict[str, Any] = None):
+        self.industry = industry
+        self.columns = columns
+        industry_data = industry_data or get_taxonomy().industry(industry)
+        self._categories = industry_data["lead_categories"]
+        self._value_props = industry_data["value_props"]
+        self._domains = industry_data["domain_templates"]
+        self._businesses = industry_data["business_components"]
+    
+    def __len__(self) -> int:
+        return len(self.columns["first"])
+    
+    def __getitem__(self, i: int) -> Dict[str, str]:
+        cols = self.columns
+        first_name = FIRST_NAMES[cols["first"][i]]
+        last_name = LAST_NAMES[cols["last"][i]]
+        
+        business = self._businesses[cols["biz"][i]]
+        if cols["biz_suffix"][i] >= 0:
+            business += self._businesses[cols["biz_suffix"][i]].lower()
+        
+        category = self._categories[cols["category"][i]]
+        if category in DESCRIPTION_TEMPLATES:
+            variants = DESCRIPTION_TEMPLATES[category]
+            template, choices = variants[cols["desc"][i] % len(variants)]
+            description = template.format(
+                choice=choices[cols["desc_choice"][i] % len(choices)] if choices else "",
+                years=int(cols["years"][i])
+            )
+        else:
+            description = f"{category} with expertise in {self.industry} solutions"
+        
+        return {
+            "name": f"{first_name} {last_name}",
+            "email": _format_email(self._domains[cols["domain"][i]], first_name, last_name, business),
+            "description": description,
+            "relevance": self._value_props[cols["relevance"][i]]
+        }
+    
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+    
+    def to_list(self) -> List[Dict[str, str]]:
+        """Materialize every lead in the batch as a dictionary"""
+        return list(self)
+
+def generate_bulk_leads(industry: str, count: int, seed: Any = None) -> LeadBatch:
+    """
+    Generate a large batch of synthetic leads with vectorized random draws
+    
+    Intended for load-testing the send path. The same seed always yields the
+    same batch.
+    
+    Args:
+        industry: Industry name (e.g., "fashion", "tech")
+        count: Number of leads to generate
+        seed: Seed for numpy's random generator (None for a fresh one)
+        
+    Returns:
+        LeadBatch that materializes lead dictionaries lazily
+    """
+    import numpy as np
+    
+    industry_data = get_taxonomy().industry(industry)
+    n_businesses = len(industry_data["business_components"])
+    rng = np.random.default_rng(seed)
+    
+    biz_suffix = rng.integers(0, n_businesses, size=count)
+    # Same 50% chance of a two-part business name as get_industry_leads
+    biz_suffix[rng.random(count) <= 0.5] = -1
+    
+    columns = {
+        "first": rng.integers(0, len(FIRST_NAMES), size=count),
+        "last": rng.integers(0, len(LAST_NAMES), size=count),
+        "category": rng.integers(0, len(industry_data["lead_categories"]), size=count),
+        "biz": rng.integers(0, n_businesses, size=count),
+        "biz_suffix": biz_suffix,
+        "domain": rng.integers(0, len(industry_data["domain_templates"]), size=count),
+        # Description variant and slot are drawn wide and reduced modulo the
+        # table sizes when a lead is materialized
+        "desc": rng.integers(0, 1 << 30, size=count),
+        "desc_choice": rng.integers(0, 1 << 30, size=count),
+        "years": rng.integers(5, 21, size=count),
+        "relevance": rng.integers(0, len(industry_data["value_props"]), size=count)
+    }
+    
+    return LeadBatch(industry, columns, industry_data)
+
 def enhance_lead_generation(business_data: Dict[str, Any], analysis: Dict[str, Any], count: int = 3) -> List[Dict[str, str]]:
     """
     Enhanced lead generation using industry-specific knowledge
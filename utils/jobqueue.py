@@ -0,0 +1,273 @@
+"""
+Persistent job queue for distributing pipeline work across worker processes
+Jobs (scrape a URL, analyze a business, draft an email, send a message) are
+rows in a SQLite database. A worker leases a job for a visibility timeout;
+if it crashes or stalls, the lease expires and another worker picks the job
+up. Failed jobs are retried with exponential backoff and moved to the dead
+letter state after max_attempts.
+
+Jobs can carry a shard (see utils/sharding.py); a worker that passes its
+owned shards to lease() only receives jobs for its own domains. Workers
+announce themselves with heartbeat() so the others can compute the same
+shard assignment.
+
+The database uses WAL journaling so many worker processes on one host can
+share it. For workers on several hosts, put the database on a filesystem with
+working POSIX locks and set JOB_QUEUE_JOURNAL=delete (WAL needs shared memory
+on a single host).
+"""
+
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from collections import namedtuple
+from typing import Any, Dict, Iterable, List, Optional
+
+from config import JOB_QUEUE_PATH, JOB_QUEUE_JOURNAL, JOB_VISIBILITY_TIMEOUT, JOB_MAX_ATTEMPTS, JOB_RETRY_DELAY
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'ready',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    available_at REAL NOT NULL,
+    lease_owner TEXT,
+    lease_expires REAL,
+    last_error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    shard INTEGER
+);
+CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (status, available_at);
+CREATE TABLE IF NOT EXISTS workers (
+    name TEXT PRIMARY KEY,
+    last_seen REAL NOT NULL
+);
+"""
+
+class Job(namedtuple("Job", ["id", "kind", "payload", "attempts", "max_attempts", "lease_owner"])):
+    """A leased job; attempts and lease_owner identify the lease when completing or failing it"""
+    __slots__ = ()
+
+def worker_id() -> str:
+    """A queue-wide unique name for the current process"""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+class JobQueue:
+    """
+    SQLite-backed job queue with leases, retries and dead-lettering
+
+    Args:
+        path: Database file (created on first use)
+        visibility_timeout: Seconds a leased job stays invisible to other workers
+        max_attempts: Default attempts before a job is dead-lettered
+    """
+
+    def __init__(self, path: str = JOB_QUEUE_PATH, visibility_timeout: float = JOB_VISIBILITY_TIMEOUT,
+                 max_attempts: int = JOB_MAX_ATTEMPTS):
+        self.path = path
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+        self._local = threading.local()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._connect()
+        conn.executescript(_SCHEMA)
+        # Queues created before sharding lack the shard column
+        if "shard" not in [row[1] for row in conn.execute("PRAGMA table_info(jobs)")]:
+            conn.execute("ALTER TABLE jobs ADD COLUMN shard INTEGER")
+
+    def _connect(self) -> sqlite3.Connection:
+        # sqlite3 connections can't be shared between threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute(f"PRAGMA journal_mode={JOB_QUEUE_JOURNAL}")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def enqueue(self, kind: str, payload: Dict[str, Any], delay: float = 0,
+                max_attempts: Optional[int] = None, shard: Optional[int] = None) -> int:
+        """
+        Add a job
+
+        Args:
+            kind: Job type (e.g., "scrape")
+            payload: JSON-serializable job data
+            delay: Seconds before the job becomes available
+            max_attempts: Attempts before dead-lettering (default: the queue's)
+            shard: Shard of the job's domain, or None if any worker may run it
+
+        Returns:
+            Job id
+        """
+        now = time.time()
+        cursor = self._connect().execute(
+            "INSERT INTO jobs (kind, payload, max_attempts, available_at, created_at, updated_at, shard) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (kind, json.dumps(payload), max_attempts or self.max_attempts, now + delay, now, now, shard)
+        )
+        return cursor.lastrowid
+
+    def lease(self, owner: str, kinds: Optional[Iterable[str]] = None,
+              shards: Optional[Iterable[int]] = None) -> Optional[Job]:
+        """
+        Lease the next available job
+
+        Ready jobs whose time has come and leased jobs whose lease expired are
+        both available. An expired job that has used all its attempts is
+        dead-lettered instead of being handed out again.
+
+        Args:
+            owner: Worker name (see worker_id())
+            kinds: Only lease jobs of these types
+            shards: Only lease unsharded jobs and jobs in these shards
+
+        Returns:
+            The leased Job, or None if nothing is available
+        """
+        kinds = list(kinds or [])
+        kind_filter = f"AND kind IN ({', '.join('?' * len(kinds))})" if kinds else ""
+        filter_params: List[Any] = list(kinds)
+        if shards is not None:
+            kind_filter += " AND (shard IS NULL OR shard IN (SELECT value FROM json_each(?)))"
+            filter_params.append(json.dumps(sorted(shards)))
+        conn = self._connect()
+
+        while True:
+            now = time.time()
+            # IMMEDIATE takes the write lock up front so two workers can't lease the same row
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    f"""SELECT id, kind, payload, attempts, max_attempts FROM jobs
+                        WHERE ((status = 'ready' AND available_at <= ?) OR (status = 'leased' AND lease_expires <= ?))
+                        {kind_filter}
+                        ORDER BY available_at, id LIMIT 1""",
+                    (now, now, *filter_params)
+                ).fetchone()
+                if row is None:
+                    conn.execute("COMMIT")
+                    return None
+
+                job_id, kind, payload, attempts, max_attempts = row
+                if attempts >= max_attempts:
+                    conn.execute(
+                        "UPDATE jobs SET status = 'dead', last_error = COALESCE(last_error, 'lease expired'), "
+                        "lease_owner = NULL, updated_at = ? WHERE id = ?",
+                        (now, job_id)
+                    )
+                    conn.execute("COMMIT")
+                    continue
+
+                conn.execute(
+                    "UPDATE jobs SET status = 'leased', attempts = attempts + 1, lease_owner = ?, "
+                    "lease_expires = ?, updated_at = ? WHERE id = ?",
+                    (owner, now + self.visibility_timeout, now, job_id)
+                )
+                conn.execute("COMMIT")
+                return Job(job_id, kind, json.loads(payload), attempts + 1, max_attempts, owner)
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    def _update_lease(self, job: Job, sql: str, params: tuple) -> bool:
+        # Only the current lease holder may change the job; a worker whose lease
+        # expired and was taken over gets False
+        cursor = self._connect().execute(
+            f"{sql} WHERE id = ? AND status = 'leased' AND lease_owner = ? AND attempts = ?",
+            (*params, job.id, job.lease_owner, job.attempts)
+        )
+        return cursor.rowcount == 1
+
+    def extend(self, job: Job, seconds: Optional[float] = None) -> bool:
+        """Push a leased job's expiry out (heartbeat for long jobs)"""
+        now = time.time()
+        return self._update_lease(job, "UPDATE jobs SET lease_expires = ?, updated_at = ?",
+                                  (now + (seconds or self.visibility_timeout), now))
+
+    def defer(self, job: Job, seconds: float, reason: str) -> bool:
+        """Put a leased job back for later without counting the attempt (e.g. its endpoint is down)"""
+        now = time.time()
+        return self._update_lease(
+            job,
+            "UPDATE jobs SET status = 'ready', attempts = attempts - 1, lease_owner = NULL, last_error = ?, "
+            "available_at = ?, updated_at = ?",
+            (reason, now + seconds, now)
+        )
+
+    def complete(self, job: Job) -> bool:
+        """Mark a leased job as done"""
+        return self._update_lease(job, "UPDATE jobs SET status = 'done', lease_owner = NULL, updated_at = ?",
+                                  (time.time(),))
+
+    def fail(self, job: Job, error: str, retry: bool = True) -> bool:
+        """
+        Record a failed attempt
+
+        The job is retried after JOB_RETRY_DELAY * 2^(attempts - 1) seconds, or
+        dead-lettered once it has used max_attempts (or when retry is False).
+        """
+        now = time.time()
+        if retry and job.attempts < job.max_attempts:
+            return self._update_lease(
+                job,
+                "UPDATE jobs SET status = 'ready', lease_owner = NULL, last_error = ?, available_at = ?, updated_at = ?",
+                (error, now + JOB_RETRY_DELAY * 2 ** (job.attempts - 1), now)
+            )
+        return self._update_lease(job, "UPDATE jobs SET status = 'dead', lease_owner = NULL, last_error = ?, updated_at = ?",
+                                  (error, now))
+
+    def heartbeat(self, name: str):
+        """Record that a worker is alive"""
+        self._connect().execute(
+            "INSERT INTO workers (name, last_seen) VALUES (?, ?) ON CONFLICT(name) DO UPDATE SET last_seen = excluded.last_seen",
+            (name, time.time())
+        )
+
+    def live_workers(self, ttl: float) -> List[str]:
+        """Names of workers with a heartbeat in the last ttl seconds"""
+        rows = self._connect().execute("SELECT name FROM workers WHERE last_seen >= ? ORDER BY name", (time.time() - ttl,))
+        return [row[0] for row in rows]
+
+    def leave(self, name: str):
+        """Remove a worker so its shards move to the others right away"""
+        self._connect().execute("DELETE FROM workers WHERE name = ?", (name,))
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Job counts by kind and status"""
+        counts: Dict[str, Dict[str, int]] = {}
+        for kind, status, count in self._connect().execute("SELECT kind, status, COUNT(*) FROM jobs GROUP BY kind, status"):
+            counts.setdefault(kind, {})[status] = count
+        return counts
+
+    def dead_letters(self, limit: int = 100) -> List[Dict[str, Any]]:
+        """Dead-lettered jobs, most recent first"""
+        rows = self._connect().execute(
+            "SELECT id, kind, payload, attempts, last_error FROM jobs WHERE status = 'dead' ORDER BY updated_at DESC LIMIT ?",
+            (limit,)
+        )
+        return [{"id": r[0], "kind": r[1], "payload": json.loads(r[2]), "attempts": r[3], "error": r[4]} for r in rows]
+
+    def requeue_dead(self, job_ids: Optional[Iterable[int]] = None) -> int:
+        """Give dead-lettered jobs (all, or the given ids) a fresh set of attempts"""
+        now = time.time()
+        sql = "UPDATE jobs SET status = 'ready', attempts = 0, available_at = ?, updated_at = ? WHERE status = 'dead'"
+        params: List[Any] = [now, now]
+        if job_ids is not None:
+            job_ids = list(job_ids)
+            if not job_ids:
+                return 0
+            sql += f" AND id IN ({', '.join('?' * len(job_ids))})"
+            params.extend(job_ids)
+        return self._connect().execute(sql, params).rowcount
@@ -1,10 +1,12 @@
-import json
-import openai
+import logging
 import random
-from config import OPENAI_API_KEY
-from utils.industry_matcher import identify_industry, get_industry_leads, enhance_lead_generation, INDUSTRY_MAPPING
+from utils.llm import chat_completion, stream_chat_completion
+from utils.metrics import timed
+from utils.industry_matcher import identify_industry, enhance_lead_generation
+from utils.llm_json import LEADS_SCHEMA, as_object, extract_json
+from utils.taxonomy import get_taxonomy
 
-openai.api_key = OPENAI_API_KEY
+logger = logging.getLogger(__name__)
 
 # Dictionary of fallback leads for common business types
 FALLBACK_LEADS = {
@@ -70,6 +72,13 @@ FALLBACK_LEADS = {
     ]
 }
 
+def fallback_leads(text):
+    """Fixed leads for the industry a text points to (by brand or indicator terms)"""
+    industry = get_taxonomy().classify(text)
+    logger.info("Using %s fallback leads", industry if industry in FALLBACK_LEADS else "general")
+    return FALLBACK_LEADS.get(industry, FALLBACK_LEADS["general"])
+
+@timed("generate_leads")
 def generate_leads(business_analysis):
     """
     Generate synthetic leads based on business analysis
@@ -78,26 +87,19 @@ def generate_leads(business_analysis):
     """
     # Parse analysis if it's a string
     if isinstance(business_analysis, str):
-        try:
-            analysis = json.loads(business_analysis)
-        except Exception as e:
-            print(f"Error parsing analysis JSON: {e}")
-            # If we can't parse, try checking for lofai in the string
-            if "lofai" in business_analysis.lower() or "fashion" in business_analysis.lower():
-                print("Using fashion fallback leads")
-                return FALLBACK_LEADS["fashion"]
-            elif "tech" in business_analysis.lower() or "software" in business_analysis.lower() or "ai" in business_analysis.lower():
-                print("Using tech fallback leads")
-                return FALLBACK_LEADS["tech"]
-            else:
-                print("Using general fallback leads")
-                return FALLBACK_LEADS["general"]
+        parsed = extract_json(business_analysis)
+        if parsed is not None:
+            analysis = parsed.obj
+        else:
+            logger.warning("No valid JSON in the analysis")
+            # If we can't parse, pick fallbacks from the keywords in the string
+            return fallback_leads(business_analysis)
     else:
         analysis = business_analysis
     
     # If this is empty or not a dictionary, use fallbacks
     if not analysis or not isinstance(analysis, dict):
-        print("Invalid analysis data, using general fallback leads")
+        logger.warning("Invalid analysis data, using general fallback leads")
         return FALLBACK_LEADS["general"]
     
     # Step 1: Try our industry-specific lead generation first
@@ -108,47 +110,32 @@ def generate_leads(business_analysis):
             business_data = analysis['business_data']
             leads = enhance_lead_generation(business_data, analysis, count=3)
             if leads:
-                print("Generated industry-specific leads based on business type")
+                logger.info("Generated industry-specific leads based on business type")
                 return leads
     except Exception as e:
-        print(f"Error in industry-specific lead generation: {e}")
+        logger.warning("Error in industry-specific lead generation: %s", e)
     
     # Step 2: Check if we have a business_type to work with
     business_type = analysis.get("business_type", "").lower() if isinstance(analysis, dict) else ""
     
     # Use fallbacks if we have insufficient information
     if (not business_type or "unknown" in business_type or "insufficient" in business_type) and isinstance(analysis, dict):
-        # Look for "lofai" or fashion/tech keywords in any part of the analysis
-        analysis_str = str(analysis).lower()
-        if "lofai" in analysis_str or "fashion" in analysis_str or "clothing" in analysis_str or "tailor" in analysis_str:
-            print("Using fashion fallback leads based on keywords")
-            return FALLBACK_LEADS["fashion"]
-        elif "tech" in analysis_str or "software" in analysis_str or "ai" in analysis_str or "digital" in analysis_str:
-            print("Using tech fallback leads based on keywords")
-            return FALLBACK_LEADS["tech"]
-        else:
-            print("Using general fallback leads - no clear business type")
-            return FALLBACK_LEADS["general"]
+        # Look for brand or industry keywords in any part of the analysis
+        return fallback_leads(str(analysis))
     
     # Step 3: If we get here, try OpenAI API to generate leads
     # Create prompt for lead generation
     lead_types = ", ".join(analysis.get("lead_type", [])) if isinstance(analysis.get("lead_type"), list) else analysis.get("lead_type", "")
     
     if not lead_types or "unknown" in lead_types.lower() or "insufficient" in lead_types.lower():
-        # Special case for LOFAI
-        if "lofai" in str(analysis).lower():
-            lead_types = "Fashion Designers, Tailors, Clothing Manufacturers"
+        # Infer lead types from a brand mention or the business type
+        taxonomy = get_taxonomy()
+        brands = taxonomy.brands_in(str(analysis))
+        industry = taxonomy.brands[brands[0]].get("industry") if brands else taxonomy.classify(business_type)
+        if industry in taxonomy.industries:
+            lead_types = ", ".join(taxonomy.industry(industry)["lead_categories"][:3])
         else:
-            # Try to infer lead types from business type
-            business_type_str = str(business_type).lower()
-            if "fashion" in business_type_str or "clothing" in business_type_str or "apparel" in business_type_str:
-                lead_types = "Fashion Designers, Tailors, Clothing Brands"
-            elif "tech" in business_type_str or "software" in business_type_str or "ai" in business_type_str:
-                lead_types = "Technology Companies, Software Developers, AI Specialists"
-            elif "ecommerce" in business_type_str or "retail" in business_type_str or "shop" in business_type_str:
-                lead_types = "Product Suppliers, Brand Owners, Manufacturers"
-            else:
-                lead_types = "Business Owners, Service Providers"
+            lead_types = "Business Owners, Service Providers"
     
     prompt = f"""
     Generate 3 synthetic leads (potential partners/customers) for a {analysis.get("business_type", "business")} 
@@ -173,98 +160,57 @@ def generate_leads(business_analysis):
     """
     
     try:
-        response = openai.ChatCompletion.create(
-            model="gpt-3.5-turbo",
-            messages=[{"role": "user", "content": prompt}]
-        )
+        result = chat_completion(prompt, stage="llm.leads")
         
-        result = response.choices[0].message.content
+        parsed = extract_json(result, LEADS_SCHEMA)
+        if parsed is not None:
+            return parsed.obj["leads"]
+        logger.warning("No valid leads JSON in the response")
         
-        try:
-            parsed = json.loads(result)
-            return parsed["leads"]
-        except (json.JSONDecodeError, KeyError) as e:
-            print(f"Error parsing leads response: {e}")
-            
-            # Try to extract the JSON with regex
-            import re
-            json_match = re.search(r'(\{.*"leads":\s*\[.*\].*\})', result.replace('\n', ' '), re.DOTALL)
-            if json_match:
-                try:
-                    matched_json = json_match.group(1)
-                    parsed = json.loads(matched_json)
-                    if "leads" in parsed:
-                        return parsed["leads"]
-                except:
-                    pass
-            
-            # Special case for LOFAI
-            if "lofai" in str(analysis).lower():
-                return FALLBACK_LEADS["fashion"]
-            
-            # Fallback based on keywords in the business type
-            if isinstance(analysis, dict) and "business_type" in analysis:
-                business_type = analysis["business_type"].lower()
-                if "fashion" in business_type or "clothing" in business_type or "apparel" in business_type:
-                    return FALLBACK_LEADS["fashion"]
-                elif "tech" in business_type or "software" in business_type or "ai" in business_type:
-                    return FALLBACK_LEADS["tech"]
-            
-            # Default fallback
-            return FALLBACK_LEADS["general"]
+        # Fallback based on brand or industry keywords in the analysis
+        return fallback_leads(str(analysis))
             
     except Exception as e:
-        print(f"Error generating leads: {e}")
-        
-        # Special case for LOFAI
-        if isinstance(analysis, dict) and "business_type" in analysis:
-            business_type = analysis["business_type"].lower()
-            if "fashion" in business_type or "clothing" in business_type or "apparel" in business_type or "lofai" in str(analysis).lower():
-                return FALLBACK_LEADS["fashion"]
-            elif "tech" in business_type or "software" in business_type or "ai" in business_type:
-                return FALLBACK_LEADS["tech"]
+        logger.warning("Error generating leads: %s", e)
         
-        # Final fallback
-        return FALLBACK_LEADS["general"]
+        # Fallback based on brand or industry keywords in the analysis
+        return fallback_leads(str(analysis))
 
-def generate_email_content(business_data, lead_info):
+def build_email_prompt(business_data, lead_info):
     """
-    Generate personalized email content for a specific lead
+    Build the LLM prompt for a personalized outreach email
     """
     # Get business name and add a fallback
     business_name = business_data.get('business_name', 'our company')
     
-    # Special case for LOFAI
-    is_lofai = "lofai" in business_name.lower()
+    # Brand-specific context from the taxonomy
+    taxonomy = get_taxonomy()
+    brand = next((taxonomy.brands[name] for name in taxonomy.brands_in(business_name)), None)
     
     # Extract business_type from structured data if available
     business_type = ""
     value_prop = ""
     
-    if 'structured_data' in business_data and isinstance(business_data['structured_data'], str):
-        try:
-            structured = json.loads(business_data['structured_data'])
-            business_type = structured.get('business_type', '')
-            value_prop = structured.get('value_proposition', '')
-        except:
-            pass
+    structured = as_object(business_data.get('structured_data'))
+    if structured:
+        business_type = structured.get('business_type', '')
+        value_prop = structured.get('value_proposition', '')
     
-    # Add LOFAI-specific context if needed
-    lofai_context = ""
-    if is_lofai:
-        lofai_context = "LOFAI is a fashion-tech platform that connects tailors and fashion designers with potential clients using AI technology."
+    # Add brand-specific context if needed
+    brand_context = ""
+    if brand and brand.get("email_context"):
+        brand_context = brand["email_context"]
         
-        # If lead is fashion-related, add specific value proposition
-        lead_desc = lead_info.get('description', '').lower()
-        if any(word in lead_desc for word in ['tailor', 'fashion', 'design', 'clothing', 'apparel']):
-            lofai_context += " Our platform helps fashion professionals like you reach more clients and grow your business through our AI-powered matching system."
+        # If the lead works in the brand's industry, add its specific value proposition
+        if brand.get("lead_email_context") and taxonomy.classify(lead_info.get('description', '')) == brand.get("industry"):
+            brand_context += " " + brand["lead_email_context"]
     
     # Identify industry for specialized email templates
     try:
         industry, _ = identify_industry(business_data)
         
         # Get industry-specific value propositions
-        industry_data = INDUSTRY_MAPPING.get(industry, {})
+        industry_data = taxonomy.industries.get(industry, {})
         industry_value_props = industry_data.get('value_props', [])
         
         if industry_value_props and not value_prop:
@@ -278,7 +224,7 @@ def generate_email_content(business_data, lead_info):
     FROM: A representative of {business_name}
     TO: {lead_info['name']}, who is {lead_info['description']}
     
-    {lofai_context}
+    {brand_context}
     
     Business type: {business_type}
     Value proposition: {value_prop}
@@ -296,38 +242,71 @@ def generate_email_content(business_data, lead_info):
     Format response as plain text email only, no explanation, include a professional signature.
     """
     
+    return prompt
+
+def generate_email_content(business_data, lead_info, campaign=None):
+    """
+    Generate personalized email content for a specific lead
+    
+    If a compiled campaign (utils.templates.compile_campaign) is given and puts
+    this lead's segment in template mode, the email is rendered offline.
+    """
+    if campaign is not None and campaign.mode_for(lead_info) == "template":
+        return campaign.render(lead_info)
+    
+    prompt = build_email_prompt(business_data, lead_info)
+    
     try:
-        response = openai.ChatCompletion.create(
-            model="gpt-3.5-turbo",
-            messages=[{"role": "user", "content": prompt}]
-        )
-        
-        return response.choices[0].message.content
+        return chat_completion(prompt, stage="llm.email")
     except Exception as e:
-        print(f"Error generating email content: {e}")
-        
-        # Fallback email template
-        if is_lofai:
-            return f"""
-Subject: Partnership Opportunity with LOFAI
+        logger.warning("Error generating email content: %s", e)
+        return fallback_email(business_data, lead_info)
 
-Dear {lead_info['name']},
-
-I hope this email finds you well. I am reaching out on behalf of LOFAI, a fashion-tech platform that connects talented fashion professionals like yourself with potential clients.
-
-Given your background in {lead_info['description'].split(',')[0]}, we believe our AI-powered platform could help you {lead_info['relevance'].lower() if lead_info['relevance'].endswith('.') else lead_info['relevance'].lower() + '.'}
-
-Would you be available for a brief 15-minute call next week to discuss how LOFAI can help grow your business?
-
-Looking forward to hearing from you.
+def stream_email_content(business_data, lead_info, campaign=None):
+    """
+    Generate personalized email content for a specific lead, yielding text as it arrives
+    
+    Falls back to the fixed template if the LLM fails before sending anything.
+    A failure after the first chunk is re-raised, since the text yielded so
+    far is only part of an email (stream_draft's fallback handles it).
+    Leads in a template-mode segment of the campaign are rendered offline.
+    """
+    if campaign is not None and campaign.mode_for(lead_info) == "template":
+        yield campaign.render(lead_info)
+        return
+    
+    prompt = build_email_prompt(business_data, lead_info)
+    
+    started = False
+    try:
+        for chunk in stream_chat_completion(prompt, stage="llm.email"):
+            started = True
+            yield chunk
+    except Exception as e:
+        if started:
+            logger.warning("Email generation failed midway: %s", e)
+            raise
+        logger.warning("Error generating email content: %s", e)
+        yield fallback_email(business_data, lead_info)
 
-Best regards,
-Marketing Team
-LOFAI
-www.lofai.ng
-            """
-        else:
-            return f"""
+def fallback_email(business_data, lead_info):
+    """
+    Fixed email template used when the LLM is unavailable
+    """
+    business_name = business_data.get('business_name', 'our company')
+    taxonomy = get_taxonomy()
+    brand = next((taxonomy.brands[name] for name in taxonomy.brands_in(business_name)), None)
+    
+    # Fallback email template
+    if brand and brand.get("fallback_email"):
+        relevance = lead_info['relevance'].lower()
+        return "\n" + brand["fallback_email"].format(
+            name=lead_info['name'],
+            background=lead_info['description'].split(',')[0],
+            relevance=relevance if relevance.endswith('.') else relevance + '.'
+        ) + "\n        "
+    else:
+        return f"""
 Subject: Partnership Opportunity with {business_name}
 
 Dear {lead_info['name']},
@@ -343,4 +322,4 @@ Looking forward to your response.
 Best regards,
 Marketing Team
 {business_name}
-            """
+        """
@@ -0,0 +1,131 @@
+"""
+Shared OpenAI access for the LLM-backed utilities
+The openai package is only imported on the first LLM call so that the CLI tools
+start quickly and tools that never call the API never pay for the import.
+Requests go through the "llm" retry policy and the endpoint's circuit breaker.
+"""
+
+import time
+from config import OPENAI_API_KEY, OPENAI_API_BASE
+from utils import replay, resilience
+from utils.metrics import REGISTRY, span
+
+_openai = None
+
+# Circuit breaker key of the API endpoint in use
+ENDPOINT = "llm:" + (OPENAI_API_BASE or "https://api.openai.com/v1")
+
+# openai error classes worth retrying, matched by name so the package is not
+# imported to classify errors; request errors and auth failures are final
+_RETRYABLE_ERRORS = {"APIError", "APIConnectionError", "Timeout", "RateLimitError",
+                     "ServiceUnavailableError", "TryAgain"}
+
+def _retryable(error):
+    return type(error).__name__ in _RETRYABLE_ERRORS or isinstance(error, (ConnectionError, TimeoutError))
+
+def _create(**kwargs):
+    """ChatCompletion.create through the breaker and retry policy"""
+    def attempt():
+        left = resilience.remaining()
+        if left is not None:
+            kwargs["request_timeout"] = max(left, 0.001)
+        return get_openai().ChatCompletion.create(**kwargs)
+    return resilience.call(ENDPOINT, attempt, "llm", retryable=_retryable)
+
+def get_openai():
+    """Import and configure the openai module on first use"""
+    global _openai
+    if _openai is None:
+        import openai
+        openai.api_key = OPENAI_API_KEY
+        if OPENAI_API_BASE:
+            openai.api_base = OPENAI_API_BASE
+            # Local compatible servers don't check the key, but the client requires one
+            openai.api_key = OPENAI_API_KEY or "local"
+        _openai = openai
+    return _openai
+
+def chat_completion(prompt, model="gpt-3.5-turbo", stage="llm"):
+    """
+    Send a single user prompt to the chat completions API
+    
+    Args:
+        prompt: Prompt text
+        model: Chat model name
+        stage: Metrics stage name for this call (e.g., "llm.analyze")
+        
+    Returns:
+        String with the content of the first completion choice
+    """
+    with span(stage) as s:
+        reply = replay.replay_or_call(
+            "llm", replay.scoped_key(stage) or f"{model}\n{prompt}",
+            lambda: _create_completion(prompt, model)
+        )
+        
+        usage = reply["usage"]
+        s.add("prompt_tokens", usage.get("prompt_tokens", 0))
+        s.add("completion_tokens", usage.get("completion_tokens", 0))
+        
+        return reply["content"]
+
+def _create_completion(prompt, model):
+    response = _create(
+        model=model,
+        messages=[{"role": "user", "content": prompt}]
+    )
+    
+    return {
+        "content": response.choices[0].message.content,
+        "usage": dict(response.get("usage") or {})
+    }
+
+def stream_chat_completion(prompt, model="gpt-3.5-turbo", stage="llm"):
+    """
+    Send a single user prompt and yield the reply text as it is generated
+    
+    Time to the first chunk is recorded as the "<stage>.first_token" metric.
+    Streamed replies carry no usage data, so token counts are estimated.
+    
+    Args:
+        prompt: Prompt text
+        model: Chat model name
+        stage: Metrics stage name for this call (e.g., "llm.email")
+        
+    Yields:
+        Chunks of the reply text
+    """
+    from utils.prompt_budget import count_tokens
+    
+    start = time.perf_counter()
+    chunks = []
+    counters = {"prompt_tokens": count_tokens(prompt)}
+    try:
+        stream = replay.replay_stream(
+            "llm", replay.scoped_key(stage) or f"{model}\n{prompt}",
+            lambda: _create_stream(prompt, model)
+        )
+        for chunk in stream:
+            if not chunks:
+                REGISTRY.observe(f"{stage}.first_token", time.perf_counter() - start, {})
+            chunks.append(chunk)
+            yield chunk
+    except Exception:
+        counters["errors"] = 1
+        raise
+    finally:
+        counters["completion_tokens"] = count_tokens("".join(chunks))
+        REGISTRY.observe(stage, time.perf_counter() - start, counters)
+
+def _create_stream(prompt, model):
+    # Only opening the stream is retried; once chunks were yielded a retry would repeat them
+    response = _create(
+        model=model,
+        messages=[{"role": "user", "content": prompt}],
+        stream=True
+    )
+    
+    for event in response:
+        content = event.choices[0].delta.get("content")
+        if content:
+            yield content
@@ -0,0 +1,158 @@
+"""
+Parsing of JSON objects out of LLM responses
+Models sometimes wrap the requested JSON in prose or code fences. Instead of
+a greedy regex, extract_json() scans the text once, tracking brace depth and
+string literals, and tries each balanced top-level object in order. Parsed
+responses are returned as JSONText: a str (so it can be stored, logged and
+serialized as before) that also carries the decoded object in .obj, so
+downstream code calls as_object() instead of decoding the same text again.
+"""
+
+import json
+import logging
+import re
+from itertools import chain
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_STRUCTURE_RE = re.compile(r'[{}"]')
+_STRING_RE = re.compile(r'"(?:[^"\\]|\\.)*"', re.DOTALL)
+
+# Schemas map field names to accepted types; required fields must be present
+STRUCTURED_DATA_SCHEMA = {
+    "required": ("business_type",),
+    "fields": {"business_name": str, "business_type": str, "target_audience": str,
+               "services": (list, str), "value_proposition": str}
+}
+ANALYSIS_SCHEMA = {
+    "required": ("business_type", "lead_type"),
+    "fields": {"business_type": str, "lead_type": (list, str), "lead_search_keywords": (list, str),
+               "value_proposition_highlights": str}
+}
+LEADS_SCHEMA = {
+    "required": ("leads",),
+    "fields": {"leads": list}
+}
+
+# Values that stand in for missing data: fallback records and fields the model
+# marked as guesses, e.g. "Could not determine - insufficient data", "GUESS: ..."
+_PLACEHOLDER_RE = re.compile(r"^\s*(?:guess\s*:|could not determine|error in parsing|unknown\s*$|n/?a\s*$)",
+                             re.IGNORECASE)
+
+def is_placeholder(value: Any) -> bool:
+    """True for empty values and placeholders that must not be shown as real data"""
+    return not str(value or "").strip() or bool(_PLACEHOLDER_RE.match(str(value)))
+
+class JSONText(str):
+    """
+    JSON text with its decoded object attached
+
+    Treat .obj as read-only; it is shared by everyone holding the text.
+    .fallback is True for a stand-in built after the model call failed or
+    returned nothing usable, which must not be cached as a real result.
+    """
+    __slots__ = ("obj", "fallback")
+
+    def __new__(cls, text: str, obj: Any = None, fallback: bool = False):
+        self = super().__new__(cls, text)
+        self.obj = obj
+        self.fallback = fallback
+        return self
+
+    @classmethod
+    def from_object(cls, obj: Any, fallback: bool = False) -> "JSONText":
+        return cls(json.dumps(obj), obj, fallback)
+
+def is_fallback(value: Any) -> bool:
+    """True for a JSONText stand-in produced when the model call failed"""
+    return getattr(value, "fallback", False)
+
+def _balanced_objects(text: str) -> Iterator[Tuple[int, int]]:
+    """Yield (start, end) of each balanced top-level {...} span, in one pass"""
+    depth = 0
+    start = 0
+    match = _STRUCTURE_RE.search(text)
+    while match:
+        char = match.group()
+        position = match.end()
+        if char == '"':
+            # Braces inside string literals don't count
+            if depth > 0:
+                string = _STRING_RE.match(text, match.start())
+                if string is None:
+                    return
+                position = string.end()
+        elif char == "{":
+            if depth == 0:
+                start = match.start()
+            depth += 1
+        elif depth > 0:
+            depth -= 1
+            if depth == 0:
+                yield start, position
+        match = _STRUCTURE_RE.search(text, position)
+
+def schema_errors(obj: Any, schema: Dict[str, Any]) -> list:
+    """
+    Check a decoded object against a schema
+
+    Returns:
+        List of problems (empty if the object is valid)
+    """
+    if not isinstance(obj, dict):
+        return [f"expected an object, got {type(obj).__name__}"]
+    errors = [f"missing {field}" for field in schema.get("required", ()) if field not in obj]
+    for field, types in schema.get("fields", {}).items():
+        if field in obj and obj[field] is not None and not isinstance(obj[field], types):
+            errors.append(f"{field} has type {type(obj[field]).__name__}")
+    return errors
+
+def extract_json(text: str, schema: Optional[Dict[str, Any]] = None) -> Optional[JSONText]:
+    """
+    Find the JSON object in an LLM response
+
+    The whole response is tried first; otherwise each balanced {...} span,
+    in order, until one decodes (and matches schema, if given).
+
+    Args:
+        text: Model response
+        schema: Optional schema (see schema_errors) the object must match
+
+    Returns:
+        JSONText of the object's source text, or None if there is no valid object
+    """
+    if isinstance(text, JSONText) and (schema is None or not schema_errors(text.obj, schema)):
+        return text
+    text = str(text or "")
+
+    candidates = ((0, len(text)),) if text.lstrip().startswith("{") else ()
+    for start, end in chain(candidates, _balanced_objects(text)):
+        try:
+            obj = json.loads(text[start:end])
+        except ValueError:
+            continue
+        if schema is not None:
+            errors = schema_errors(obj, schema)
+            if errors:
+                logger.debug("Skipping JSON that doesn't match the schema: %s", ", ".join(errors))
+                continue
+        return JSONText(text[start:end].strip(), obj)
+    return None
+
+def as_object(value: Any) -> Dict[str, Any]:
+    """
+    Decoded object of a structured value
+
+    Accepts JSONText (no decoding), dictionaries, and JSON strings such as
+    values restored from caches or job payloads. Returns {} for anything else.
+    """
+    if isinstance(value, JSONText):
+        return value.obj if isinstance(value.obj, dict) else {}
+    if isinstance(value, dict):
+        return value
+    if isinstance(value, str):
+        parsed = extract_json(value)
+        if parsed is not None and isinstance(parsed.obj, dict):
+            return parsed.obj
+    return {}
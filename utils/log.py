@@ -0,0 +1,86 @@
+"""
+Structured logging for the lead generation utilities
+Log records are handed to a background thread through a queue so that logging
+on hot paths never blocks on terminal I/O. Output is either plain messages or
+one JSON object per line, with per-module levels taken from the environment.
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import time
+from typing import Dict, Optional
+
+# Attributes present on every LogRecord; anything else came from `extra=`
+_STANDARD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+class JsonFormatter(logging.Formatter):
+    """Format records as single-line JSON objects including any `extra` fields"""
+
+    def format(self, record):
+        entry = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage()
+        }
+        for key, value in vars(record).items():
+            if key not in _STANDARD_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+_listener = None
+
+def parse_module_levels(spec: Optional[str]) -> Dict[str, str]:
+    """Parse "utils.scraper=DEBUG,utils.email_handler=WARNING" into a dict"""
+    levels = {}
+    for item in (spec or "").split(","):
+        if "=" in item:
+            name, level = item.split("=", 1)
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+def configure_logging(level: Optional[str] = None, json_output: Optional[bool] = None,
+                      module_levels: Optional[Dict[str, str]] = None):
+    """
+    Install the queue-based log handler on the root logger
+
+    Arguments left as None are read from config (LOG_LEVEL, LOG_JSON, LOG_LEVELS).
+    Only the first call takes effect.
+
+    Args:
+        level: Root log level name (e.g., "INFO")
+        json_output: Emit JSON lines instead of plain messages
+        module_levels: Mapping of logger name to level name
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    import config
+    if level is None:
+        level = config.LOG_LEVEL
+    if json_output is None:
+        json_output = config.LOG_JSON
+    if module_levels is None:
+        module_levels = parse_module_levels(config.LOG_LEVELS)
+
+    stream_handler = logging.StreamHandler(sys.stderr)
+    stream_handler.setFormatter(JsonFormatter() if json_output else logging.Formatter("%(message)s"))
+
+    log_queue = queue.SimpleQueue()
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+    root = logging.getLogger()
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    root.setLevel(level.upper())
+
+    for name, module_level in module_levels.items():
+        logging.getLogger(name).setLevel(module_level)
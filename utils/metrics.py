@@ -0,0 +1,217 @@
+"""
+Per-stage timing and metrics instrumentation
+Pipeline stages are wrapped in spans that record wall time into a histogram
+registry along with counters such as bytes fetched, LLM token usage, cache hits
+and errors. The registry can be dumped as JSON or served in Prometheus text
+format.
+"""
+
+import atexit
+import contextvars
+import functools
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+# Histogram bucket upper bounds in seconds
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Number of recent durations kept per stage for percentile estimates
+SAMPLE_WINDOW = 2048
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+class StageStats:
+    """Duration histogram and event counters for a single stage"""
+
+    def __init__(self):
+        self.bucket_counts = [0] * len(BUCKETS)
+        self.count = 0
+        self.total = 0.0
+        self.samples = deque(maxlen=SAMPLE_WINDOW)
+        self.counters: Dict[str, float] = {}
+
+    def observe(self, duration: float, counters: Dict[str, float]):
+        for i, bound in enumerate(BUCKETS):
+            if duration <= bound:
+                self.bucket_counts[i] += 1
+                break
+        self.count += 1
+        self.total += duration
+        self.samples.append(duration)
+        for name, value in counters.items():
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def percentile(self, q: float) -> Optional[float]:
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+class MetricsRegistry:
+    """Thread-safe collection of StageStats keyed by stage name"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stages: Dict[str, StageStats] = {}
+
+    def observe(self, stage: str, duration: float, counters: Dict[str, float]):
+        with self._lock:
+            stats = self._stages.get(stage)
+            if stats is None:
+                stats = self._stages[stage] = StageStats()
+            stats.observe(duration, counters)
+
+    def reset(self):
+        with self._lock:
+            self._stages.clear()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return a JSON-serializable summary of every stage"""
+        with self._lock:
+            result = {}
+            for stage, stats in sorted(self._stages.items()):
+                result[stage] = {
+                    "count": stats.count,
+                    "total_seconds": round(stats.total, 6),
+                    "mean_seconds": round(stats.total / stats.count, 6) if stats.count else None,
+                    "p50_seconds": stats.percentile(0.50),
+                    "p90_seconds": stats.percentile(0.90),
+                    "p99_seconds": stats.percentile(0.99),
+                    "counters": dict(stats.counters)
+                }
+            return result
+
+    def to_prometheus(self, prefix: str = "leadgen") -> str:
+        """Render the registry in Prometheus text exposition format"""
+        lines = [
+            f"# HELP {prefix}_stage_duration_seconds Wall time spent in each pipeline stage",
+            f"# TYPE {prefix}_stage_duration_seconds histogram"
+        ]
+        counter_lines = []
+
+        with self._lock:
+            for stage, stats in sorted(self._stages.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(BUCKETS, stats.bucket_counts):
+                    cumulative += bucket_count
+                    lines.append(f'{prefix}_stage_duration_seconds_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+                lines.append(f'{prefix}_stage_duration_seconds_bucket{{stage="{stage}",le="+Inf"}} {stats.count}')
+                lines.append(f'{prefix}_stage_duration_seconds_sum{{stage="{stage}"}} {stats.total}')
+                lines.append(f'{prefix}_stage_duration_seconds_count{{stage="{stage}"}} {stats.count}')
+
+                for name, value in sorted(stats.counters.items()):
+                    counter_lines.append(f'{prefix}_stage_events_total{{stage="{stage}",event="{name}"}} {value}')
+
+        if counter_lines:
+            lines.append(f"# HELP {prefix}_stage_events_total Events recorded inside pipeline stages")
+            lines.append(f"# TYPE {prefix}_stage_events_total counter")
+            lines.extend(counter_lines)
+
+        return "\n".join(lines) + "\n"
+
+REGISTRY = MetricsRegistry()
+
+class Span:
+    """A timed stage in progress; counters added here are recorded when it ends"""
+
+    def __init__(self, stage: str):
+        self.stage = stage
+        self.counters: Dict[str, float] = {}
+
+    def add(self, name: str, value: float = 1):
+        self.counters[name] = self.counters.get(name, 0) + value
+
+@contextmanager
+def span(stage: str, registry: MetricsRegistry = REGISTRY):
+    """
+    Time a block of code as a pipeline stage
+
+    Exceptions raised inside the block are counted as errors and re-raised.
+
+    Args:
+        stage: Stage name (e.g., "scrape_static", "llm.analyze")
+        registry: Registry to record into
+    """
+    current = Span(stage)
+    token = _current_span.set(current)
+    start = time.perf_counter()
+    try:
+        yield current
+    except BaseException:
+        current.add("errors")
+        raise
+    finally:
+        registry.observe(stage, time.perf_counter() - start, current.counters)
+        _current_span.reset(token)
+
+def timed(stage: str):
+    """Decorator form of span()"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def record(name: str, value: float = 1):
+    """Add to a counter on the innermost active span (no-op outside a span)"""
+    current = _current_span.get()
+    if current is not None:
+        current.add(name, value)
+
+def dump_json(path: str, registry: MetricsRegistry = REGISTRY):
+    """Write the registry snapshot to a JSON file"""
+    with open(path, "w") as f:
+        json.dump(registry.snapshot(), f, indent=2)
+
+def start_metrics_server(port: int, registry: MetricsRegistry = REGISTRY):
+    """Serve the registry in Prometheus format on /metrics from a daemon thread"""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] == "/metrics.json":
+                body = json.dumps(registry.snapshot()).encode()
+                content_type = "application/json"
+            else:
+                body = registry.to_prometheus().encode()
+                content_type = "text/plain; version=0.0.4"
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+_configured = False
+
+def configure_metrics(metrics_file: Optional[str] = None, metrics_port: Optional[int] = None):
+    """
+    Enable metrics export for the current process
+
+    Safe to call from several entry points; only the first call takes effect.
+
+    Args:
+        metrics_file: Path to write a JSON snapshot to at exit
+        metrics_port: Port to serve Prometheus metrics on
+    """
+    global _configured
+    if _configured:
+        return
+    _configured = True
+
+    if metrics_file:
+        atexit.register(dump_json, metrics_file)
+    if metrics_port:
+        start_metrics_server(int(metrics_port))
@@ -0,0 +1,91 @@
+"""
+Process pool for CPU-bound work in bulk modes
+HTML extraction and industry scoring are pure Python/lxml work that holds the
+GIL, so with many scrape threads they run one at a time no matter how many
+cores the host has. In bulk modes (PARSE_PROCESSES > 0, or start() called by
+a bulk tool) run() sends such calls to a ProcessPoolExecutor instead: the
+calling thread waits on the result without holding the GIL, so the other
+threads keep fetching while pages are parsed on every core.
+
+Calls take raw page bytes and plain strings and return small dictionaries or
+lists, so little is pickled each way. Without a pool, run() calls the
+function in the current thread.
+"""
+
+import atexit
+import logging
+import multiprocessing
+import threading
+from typing import Any, Callable
+
+from config import PARSE_PROCESSES
+from utils.metrics import record
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_pool = None
+_processes = PARSE_PROCESSES
+
+def start(processes: int):
+    """
+    Enable offloading with the given number of worker processes (0 disables it)
+
+    Must be called before the first run() to take effect for the whole process.
+    """
+    global _processes
+    with _lock:
+        if _pool is not None and processes != _processes:
+            _shutdown_locked()
+        _processes = max(0, processes)
+
+def _get_pool():
+    global _pool
+    if _pool is None and _processes > 0:
+        with _lock:
+            if _pool is None and _processes > 0:
+                from concurrent.futures import ProcessPoolExecutor
+                # spawn: forking a process that already runs fetch threads can copy held locks
+                _pool = ProcessPoolExecutor(max_workers=_processes, mp_context=multiprocessing.get_context("spawn"))
+                atexit.register(shutdown)
+                logger.info("Offloading parsing to %d processes", _processes)
+    return _pool
+
+def active() -> bool:
+    return _processes > 0
+
+def run(fn: Callable[..., Any], *args) -> Any:
+    """
+    Call fn(*args) on the process pool in bulk mode, or inline otherwise
+
+    fn must be a module-level function and its arguments and result
+    picklable. If the pool breaks (a worker was killed), the call is
+    retried inline.
+    """
+    global _processes
+    pool = _get_pool()
+    if pool is None:
+        return fn(*args)
+    from concurrent.futures.process import BrokenProcessPool
+    try:
+        result = pool.submit(fn, *args).result()
+    except BrokenProcessPool:
+        # Don't keep respawning workers that die; parse in-process from now on
+        logger.warning("Parse process pool broke, running %s and later calls inline", fn.__name__)
+        with _lock:
+            _shutdown_locked()
+            _processes = 0
+        return fn(*args)
+    record("offloaded")
+    return result
+
+def _shutdown_locked():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+def shutdown():
+    """Stop the worker processes"""
+    with _lock:
+        _shutdown_locked()
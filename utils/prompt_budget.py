@@ -0,0 +1,171 @@
+"""
+Token-aware prompt budgeting and content compaction
+Scraped page text is full of repeated sentences and navigation/footer
+boilerplate. These helpers remove that noise, rank what is left by keyword
+density and fill a per-call token budget with the most relevant sentences,
+so prompts carry fewer input tokens without losing the useful content.
+"""
+
+import re
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+# tiktoken's encoding is loaded on first use: get_encoding() may download the
+# BPE file, which must not happen while a CLI tool is starting up
+_encoding = None
+_encoding_loaded = False
+
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+|\s*\n+\s*")
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+# Whole words only, so "fresh cookies" or "product catalog in" are kept
+BOILERPLATE_PATTERNS = re.compile(
+    r"\b(?:we use cookies|accept (?:all )?cookies|cookie (?:policy|settings|preferences|consent)"
+    r"|privacy policy|terms of (?:use|service)|all rights reserved|copyright"
+    r"|subscribe to our newsletter|sign up for our newsletter|skip to (?:main )?content"
+    r"|log ?in|sign ?in|sign up|my account|shopping cart|add to cart|follow us"
+    r"|back to top|javascript is disabled|enable javascript)\b|©",
+    re.IGNORECASE
+)
+
+# Sentences shorter than this are usually menu items or button labels
+MIN_SENTENCE_WORDS = 4
+
+def _get_encoding():
+    """The cl100k_base encoding, or None if tiktoken is not installed or can't load it"""
+    global _encoding, _encoding_loaded
+    if not _encoding_loaded:
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception:  # fall back to the approximate count
+            _encoding = None
+        _encoding_loaded = True
+    return _encoding
+
+def count_tokens(text: str) -> int:
+    """Count tokens with tiktoken when installed, otherwise approximate from words and punctuation"""
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return len(_TOKEN_RE.findall(text))
+
+def split_sentences(text: str) -> List[str]:
+    return [s.strip() for s in _SENTENCE_RE.split(text or "") if s and s.strip()]
+
+def clean_sentences(text: str) -> List[str]:
+    """Split text into sentences, dropping duplicates and boilerplate"""
+    seen = set()
+    sentences = []
+    for sentence in split_sentences(text):
+        normalized = " ".join(_WORD_RE.findall(sentence.lower()))
+        if not normalized or normalized in seen:
+            continue
+        seen.add(normalized)
+        if len(normalized.split()) < MIN_SENTENCE_WORDS or BOILERPLATE_PATTERNS.search(sentence):
+            continue
+        sentences.append(sentence)
+    return sentences
+
+def _truncate_to_tokens(text: str, max_tokens: int) -> str:
+    encoding = _get_encoding()
+    if encoding is not None:
+        return encoding.decode(encoding.encode(text, disallowed_special=())[:max_tokens])
+    matches = list(_TOKEN_RE.finditer(text))
+    if len(matches) <= max_tokens:
+        return text
+    return text[:matches[max_tokens - 1].end()] if max_tokens > 0 else ""
+
+def compact_text(text: str, max_tokens: int, keywords: Optional[Iterable[str]] = None) -> str:
+    """
+    Reduce text to at most max_tokens tokens
+
+    Without keywords, cleaned sentences are kept in page order until the budget
+    is full. With keywords, sentences are chosen by keyword density and then
+    put back in page order.
+
+    Args:
+        text: Raw scraped text
+        max_tokens: Token budget for the result
+        keywords: Terms that mark a sentence as relevant
+
+    Returns:
+        Compacted text
+    """
+    sentences = clean_sentences(text)
+    if not sentences:
+        # Nothing survived cleaning (e.g., a single unpunctuated blob)
+        return _truncate_to_tokens(" ".join((text or "").split()), max_tokens)
+
+    costs = [count_tokens(s) + 1 for s in sentences]
+    if sum(costs) <= max_tokens:
+        return " ".join(sentences)
+
+    order = range(len(sentences))
+    keyword_set = {k.lower() for k in keywords or [] if k}
+    if keyword_set:
+        def density(i):
+            words = _WORD_RE.findall(sentences[i].lower())
+            hits = sum(1 for w in words if w in keyword_set)
+            return hits / (len(words) or 1)
+        # Stable sort keeps earlier sentences first among equal scores
+        order = sorted(order, key=density, reverse=True)
+
+    chosen = []
+    used = 0
+    for i in order:
+        if used + costs[i] > max_tokens:
+            if not chosen:
+                # The best sentence alone overflows (e.g. a long run-on); keep as much of it as fits
+                return _truncate_to_tokens(sentences[i], max_tokens)
+            continue
+        chosen.append(i)
+        used += costs[i]
+
+    return " ".join(sentences[i] for i in sorted(chosen))
+
+def fit_sections(sections: Sequence[Tuple[str, str]], budget: int,
+                 keywords: Optional[Iterable[str]] = None) -> Dict[str, str]:
+    """
+    Share one token budget between several text sections
+
+    Each section is first allowed an equal share; whatever a short section does
+    not need is handed to the longer ones.
+
+    Args:
+        sections: (name, text) pairs
+        budget: Total token budget
+        keywords: Terms used to rank sentences
+
+    Returns:
+        Dictionary of section name to compacted text
+    """
+    keywords = list(keywords or [])
+    cleaned = {name: " ".join(clean_sentences(text)) or (text or "") for name, text in sections}
+    needs = {name: count_tokens(text) for name, text in cleaned.items()}
+
+    allocation = {}
+    remaining = budget
+    pending = sorted(needs, key=needs.get)
+    while pending:
+        share = remaining // len(pending)
+        name = pending.pop(0)
+        allocation[name] = min(needs[name], share)
+        remaining -= allocation[name]
+
+    return {name: compact_text(cleaned[name], allocation[name], keywords) for name, _ in sections}
+
+def relevance_keywords(business_data: Dict) -> List[str]:
+    """Collect ranking keywords from the industry taxonomy and the business's own name and description"""
+    from utils.taxonomy import get_taxonomy
+
+    keywords = set(get_taxonomy().keyword_words)
+
+    for field in ("business_name", "description"):
+        value = business_data.get(field) or ""
+        keywords.update(w for w in _WORD_RE.findall(str(value).lower()) if len(w) > 3)
+
+    keywords.update(["services", "products", "customers", "clients", "platform", "solutions", "mission"])
+    return sorted(keywords)
@@ -0,0 +1,300 @@
+"""
+Adaptive re-scrape scheduling by how often each site changes
+Every visit to a tracked site is recorded per domain: whether its content
+changed (SimHash fingerprint further than FINGERPRINT_MAX_DISTANCE bits from
+the previous visit, as in analysis_cache) and the HTTP validators (ETag,
+Last-Modified) of its landing page. From that history each site's change
+rate is estimated and its next visit is scheduled about one expected change
+later, between RECRAWL_MIN_HOURS and RECRAWL_MAX_HOURS. The interval grows
+at most RECRAWL_GROWTH-fold per unchanged visit so one quiet visit doesn't
+park a site at the maximum.
+
+A revisit of a site with validators starts with a conditional request; a
+304 Not Modified counts as an unchanged visit without scraping anything, and
+any other answer is the landing page itself, which the scrape then uses
+instead of downloading it again.
+
+The change rate uses the estimator for Poisson changes observed at
+intervals, -ln((n - X + 0.5) / (n + 0.5)) / (mean interval), over n visits
+with X detected changes, on counts that decay by HISTORY_DECAY per visit so
+sites that start (or stop) changing are picked up.
+
+Like the analysis cache, the store is not used while record/replay is active.
+"""
+
+import logging
+import math
+import os
+import sqlite3
+import time
+from collections import namedtuple
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from config import (FINGERPRINT_MAX_DISTANCE, RECRAWL_GROWTH, RECRAWL_MAX_HOURS, RECRAWL_MIN_HOURS,
+                    RECRAWL_PATH, SCRAPE_MAX_PARAGRAPHS)
+from utils import replay, resilience
+from utils.analysis_cache import fingerprint, hamming_distance
+from utils.metrics import record
+from utils.site_routes import domain_of
+
+logger = logging.getLogger(__name__)
+
+# Weight kept by older visits each time a new one is recorded
+HISTORY_DECAY = 0.9
+
+# Outcome of a revisit: status is "new", "changed", "unchanged", "not_modified" or "failed";
+# data is the scrape result (None when nothing was scraped)
+Visit = namedtuple("Visit", ["url", "status", "data"])
+
+def estimate_rate(checks: float, changes: float, observed_seconds: float) -> Optional[float]:
+    """
+    Estimated changes per second of a site
+
+    Args:
+        checks: (Decayed) number of visits compared with a previous one
+        changes: (Decayed) number of those that found a change
+        observed_seconds: (Decayed) total time between those visits
+
+    Returns:
+        Change rate, or None without history
+    """
+    if checks <= 0 or observed_seconds <= 0:
+        return None
+    ratio = (checks - changes + 0.5) / (checks + 0.5)
+    return -math.log(ratio) / (observed_seconds / checks)
+
+def next_interval(rate: Optional[float], previous: float,
+                  min_seconds: float = RECRAWL_MIN_HOURS * 3600,
+                  max_seconds: float = RECRAWL_MAX_HOURS * 3600) -> float:
+    """Seconds until the next visit: one expected change away, growing gradually, within the bounds"""
+    target = 1 / rate if rate else math.inf
+    return min(max(min(target, previous * RECRAWL_GROWTH), min_seconds), max_seconds)
+
+def _enabled() -> bool:
+    return bool(RECRAWL_PATH) and replay.get_mode() == "off"
+
+def _connect() -> sqlite3.Connection:
+    directory = os.path.dirname(RECRAWL_PATH)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    conn = sqlite3.connect(RECRAWL_PATH, timeout=30)
+    conn.row_factory = sqlite3.Row
+    conn.execute(
+        """CREATE TABLE IF NOT EXISTS sites (
+            domain TEXT PRIMARY KEY,
+            url TEXT NOT NULL,
+            fingerprint TEXT,
+            etag TEXT,
+            last_modified TEXT,
+            visits INTEGER NOT NULL DEFAULT 0,
+            checks REAL NOT NULL DEFAULT 0,
+            changes REAL NOT NULL DEFAULT 0,
+            observed_seconds REAL NOT NULL DEFAULT 0,
+            interval REAL NOT NULL,
+            last_visited REAL,
+            last_changed REAL,
+            next_due REAL NOT NULL
+        )"""
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS sites_next_due ON sites (next_due)")
+    return conn
+
+def track(urls: Iterable[str]) -> int:
+    """
+    Start tracking sites; their first visit is due now
+
+    Returns:
+        Number of sites that were not tracked yet
+    """
+    if not _enabled():
+        return 0
+    now = time.time()
+    conn = _connect()
+    try:
+        with conn:
+            cursor = conn.executemany(
+                "INSERT OR IGNORE INTO sites (domain, url, interval, next_due) VALUES (?, ?, ?, ?)",
+                ((domain_of(url), url, RECRAWL_MIN_HOURS * 3600, now) for url in urls)
+            )
+            return cursor.rowcount
+    finally:
+        conn.close()
+
+def due(limit: Optional[int] = None, now: Optional[float] = None) -> List[str]:
+    """URLs of tracked sites whose next visit is due, most overdue first"""
+    if not _enabled():
+        return []
+    conn = _connect()
+    try:
+        rows = conn.execute("SELECT url FROM sites WHERE next_due <= ? ORDER BY next_due LIMIT ?",
+                            (now or time.time(), -1 if limit is None else limit))
+        return [row["url"] for row in rows]
+    finally:
+        conn.close()
+
+def postpone(urls: Iterable[str], seconds: float = RECRAWL_MIN_HOURS * 3600):
+    """Push the next visit out (after a failed visit, or while a queued visit is pending)"""
+    if not _enabled():
+        return
+    conn = _connect()
+    try:
+        with conn:
+            conn.executemany("UPDATE sites SET next_due = ? WHERE domain = ?",
+                             ((time.time() + seconds, domain_of(url)) for url in urls))
+    finally:
+        conn.close()
+
+def _site(conn: sqlite3.Connection, url: str) -> Optional[sqlite3.Row]:
+    return conn.execute("SELECT * FROM sites WHERE domain = ?", (domain_of(url),)).fetchone()
+
+def _record_visit(conn: sqlite3.Connection, url: str, site: Optional[sqlite3.Row], changed: Optional[bool],
+                  now: float, updates: Dict[str, Any]):
+    """Fold one visit into a site's history and schedule the next; changed is None for a first visit"""
+    if site is None or site["last_visited"] is None or changed is None:
+        checks, changes, observed = (site["checks"], site["changes"], site["observed_seconds"]) if site else (0, 0, 0)
+    else:
+        checks = site["checks"] * HISTORY_DECAY + 1
+        changes = site["changes"] * HISTORY_DECAY + changed
+        observed = site["observed_seconds"] * HISTORY_DECAY + now - site["last_visited"]
+    previous = site["interval"] if site else RECRAWL_MIN_HOURS * 3600
+    interval = next_interval(estimate_rate(checks, changes, observed), previous) if checks else previous
+
+    values = dict(updates, url=url, visits=(site["visits"] if site else 0) + 1, checks=checks, changes=changes,
+                  observed_seconds=observed, interval=interval, last_visited=now, next_due=now + interval)
+    if changed is not False:
+        values["last_changed"] = now
+    if site is None:
+        values["domain"] = domain_of(url)
+        columns = ", ".join(values)
+        conn.execute(f"INSERT INTO sites ({columns}) VALUES ({', '.join('?' * len(values))})", tuple(values.values()))
+    else:
+        assignments = ", ".join(f"{column} = ?" for column in values)
+        conn.execute(f"UPDATE sites SET {assignments} WHERE domain = ?", (*values.values(), site["domain"]))
+
+def observe(url: str, scraped_data: Dict[str, Any], now: Optional[float] = None) -> str:
+    """
+    Record a scrape of a site and schedule its next visit
+
+    Args:
+        url: Site URL
+        scraped_data: Scrape result (its "validators" are kept for conditional revisits)
+        now: Visit time (default: now)
+
+    Returns:
+        "new", "changed" or "unchanged" ("failed" for a result without text)
+    """
+    current = fingerprint(scraped_data or {})
+    if not current:
+        return "failed"
+    if not _enabled():
+        return "new"
+    now = now or time.time()
+    validators = scraped_data.get("validators") or {}
+
+    conn = _connect()
+    try:
+        with conn:
+            site = _site(conn, url)
+            if site is None or site["fingerprint"] is None:
+                changed, status = None, "new"
+            else:
+                changed = hamming_distance(int(site["fingerprint"], 16), current) > FINGERPRINT_MAX_DISTANCE
+                status = "changed" if changed else "unchanged"
+            _record_visit(conn, url, site, changed, now, {
+                "fingerprint": format(current, "016x"),
+                "etag": validators.get("etag"),
+                "last_modified": validators.get("last_modified")
+            })
+    finally:
+        conn.close()
+    record(f"sites_{status}")
+    return status
+
+def _revalidate(url: str, etag: Optional[str], last_modified: Optional[str]):
+    """Conditional GET of the landing page; returns the scraper Page (status 304 with no body if unchanged)"""
+    from utils.scraper import fetch_page
+
+    headers = {}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+    return fetch_page(url, max_paragraphs=SCRAPE_MAX_PARAGRAPHS, headers=headers)
+
+def revisit(url: str, scrape_fn: Optional[Callable[..., Any]] = None) -> Visit:
+    """
+    Visit a tracked site: revalidate or scrape it, then schedule the next visit
+
+    Args:
+        url: Site URL
+        scrape_fn: Scrape function called as scrape_fn(url, page=...), where
+                   page is the landing page if the revalidation fetched it
+                   (default: scraper.scrape, which picks scrape_static or
+                   scrape_dynamic for the domain)
+
+    Returns:
+        Visit with the outcome and the scrape result, if one was made
+
+    Raises:
+        resilience.CircuitOpen: If the host has been failing
+    """
+    if scrape_fn is None:
+        from utils.scraper import scrape as scrape_fn
+
+    site = None
+    if _enabled():
+        conn = _connect()
+        try:
+            site = _site(conn, url)
+        finally:
+            conn.close()
+
+    page = None
+    if site is not None and site["fingerprint"] and (site["etag"] or site["last_modified"]):
+        try:
+            page = _revalidate(url, site["etag"], site["last_modified"])
+        except resilience.CircuitOpen:
+            raise
+        except Exception as e:
+            # Let the full scrape decide whether the site is reachable
+            logger.debug("Revalidating %s failed: %s", url, e, extra={"url": url})
+        if page is not None and page.status_code == 304:
+            conn = _connect()
+            try:
+                with conn:
+                    _record_visit(conn, url, site, False, time.time(), {})
+            finally:
+                conn.close()
+            record("not_modified")
+            return Visit(url, "not_modified", None)
+
+    data = scrape_fn(url, page=page)
+    status = observe(url, data) if data else "failed"
+    if status == "failed":
+        postpone([url])
+    return Visit(url, status, data)
+
+def stats(now: Optional[float] = None) -> Dict[str, float]:
+    """
+    Summary of the tracked sites
+
+    Returns:
+        Dictionary with sites, due (now), visits, fetches_per_day under the
+        adaptive schedule and fixed_fetches_per_day when every site is
+        visited every RECRAWL_MIN_HOURS
+    """
+    summary = {"sites": 0, "due": 0, "visits": 0, "fetches_per_day": 0.0, "fixed_fetches_per_day": 0.0}
+    if not _enabled():
+        return summary
+    conn = _connect()
+    try:
+        row = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(next_due <= ?), 0), COALESCE(SUM(visits), 0), "
+            "COALESCE(SUM(86400.0 / interval), 0) FROM sites",
+            (now or time.time(),)
+        ).fetchone()
+    finally:
+        conn.close()
+    summary.update(sites=row[0], due=row[1], visits=row[2], fetches_per_day=row[3],
+                   fixed_fetches_per_day=row[0] * 24 / RECRAWL_MIN_HOURS)
+    return summary
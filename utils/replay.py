@@ -0,0 +1,198 @@
+"""
+Record/replay of network interactions for offline runs and benchmarks
+In record mode, static HTTP fetches, dynamic (Playwright) scrape results and
+LLM completions are captured into a fixture bundle on disk. In replay mode the
+same calls are answered from the bundle with an optional injected latency, so
+the pipeline can run deterministically without live websites or an API key.
+
+Bundle layout:
+    <bundle>/sites.json          URLs recorded as pipeline inputs
+    <bundle>/<kind>/<sha1>.json  One entry per recorded call
+"""
+
+import contextvars
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, List, Optional
+
+import config
+
+MODES = ("off", "record", "replay")
+
+_mode = config.REPLAY_MODE
+_bundle = config.REPLAY_BUNDLE
+_latency = config.REPLAY_LATENCY_MS
+_lock = threading.Lock()
+_scope = contextvars.ContextVar("replay_scope", default=None)
+
+class ReplayMiss(KeyError):
+    """Raised in replay mode when the bundle has no entry for a call"""
+
+class ReplayedError(Exception):
+    """A failure that was recorded and is being reproduced in replay mode"""
+
+def configure(mode: Optional[str] = None, bundle: Optional[str] = None, latency_ms: Optional[str] = None):
+    """
+    Change the replay settings for this process
+
+    Args:
+        mode: "off", "record" or "replay"
+        bundle: Fixture bundle directory
+        latency_ms: Injected replay latency, either "50" or a "20-200" uniform range
+    """
+    global _mode, _bundle, _latency
+    if mode is not None:
+        if mode not in MODES:
+            raise ValueError(f"Unknown replay mode: {mode}")
+        _mode = mode
+    if bundle is not None:
+        _bundle = bundle
+    if latency_ms is not None:
+        _latency = latency_ms
+
+def get_mode() -> str:
+    return _mode
+
+@contextmanager
+def scope(name: str):
+    """
+    Key calls made inside the block by position instead of content
+
+    Prompts can contain randomly chosen leads and value propositions, so a
+    replay would miss if they were keyed by prompt text. Within a scope,
+    scoped_key() numbers calls per tag instead (e.g., the 2nd "llm.email" call
+    for a site), which is stable across runs and across threads.
+    """
+    token = _scope.set((name, {}))
+    try:
+        yield
+    finally:
+        _scope.reset(token)
+
+def scoped_key(tag: str) -> Optional[str]:
+    """Return the next positional key for tag in the active scope, or None"""
+    current = _scope.get()
+    if current is None:
+        return None
+    name, counters = current
+    counters[tag] = counters.get(tag, 0) + 1
+    return f"{name}\n{tag}\n{counters[tag]}"
+
+def _entry_path(kind: str, key: str) -> str:
+    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+    return os.path.join(_bundle, kind, f"{digest}.json")
+
+def _inject_latency():
+    if not _latency:
+        return
+    low, _, high = str(_latency).partition("-")
+    delay = random.uniform(float(low), float(high)) if high else float(low)
+    time.sleep(delay / 1000)
+
+def _save(kind: str, key: str, entry: dict):
+    path = _entry_path(kind, key)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    entry = dict(entry, kind=kind, key=key)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(entry, f)
+    os.replace(tmp_path, path)
+
+def replay_or_call(kind: str, key: str, call: Callable[[], Any],
+                   encode: Callable[[Any], Any] = lambda x: x,
+                   decode: Callable[[Any], Any] = lambda x: x) -> Any:
+    """
+    Run a network call through the record/replay layer
+
+    Args:
+        kind: Entry category ("http", "dynamic", "llm")
+        key: Stable identifier for the call (URL, prompt, ...)
+        call: Function performing the live call
+        encode: Converts the live result to JSON-serializable data
+        decode: Converts recorded data back to a result
+
+    Returns:
+        The live result (off/record) or the recorded result (replay)
+    """
+    if _mode == "replay":
+        path = _entry_path(kind, key)
+        try:
+            with open(path) as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            raise ReplayMiss(f"No recorded {kind} entry for {key[:80]!r}")
+        _inject_latency()
+        if "error" in entry:
+            raise ReplayedError(entry["error"])
+        return decode(entry["data"])
+
+    if _mode == "record":
+        try:
+            result = call()
+        except Exception as e:
+            _save(kind, key, {"error": str(e)})
+            raise
+        _save(kind, key, {"data": encode(result)})
+        return result
+
+    return call()
+
+def replay_stream(kind: str, key: str, stream: Callable[[], Iterator[str]]) -> Iterator[str]:
+    """
+    Streaming counterpart of replay_or_call for generators of text chunks
+
+    In record mode the chunks are passed through as they arrive and saved once
+    the stream completes; in replay mode the recorded chunks are yielded after
+    the injected latency.
+    """
+    if _mode == "replay":
+        path = _entry_path(kind, key)
+        try:
+            with open(path) as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            raise ReplayMiss(f"No recorded {kind} entry for {key[:80]!r}")
+        _inject_latency()
+        if "error" in entry:
+            raise ReplayedError(entry["error"])
+        yield from entry["data"]
+        return
+
+    if _mode == "record":
+        chunks = []
+        try:
+            for chunk in stream():
+                chunks.append(chunk)
+                yield chunk
+        except Exception as e:
+            _save(kind, key, {"error": str(e)})
+            raise
+        _save(kind, key, {"data": chunks})
+        return
+
+    yield from stream()
+
+def record_site(url: str):
+    """Add a pipeline input URL to the bundle's site list (record mode only)"""
+    if _mode != "record":
+        return
+    with _lock:
+        sites = load_sites()
+        if url not in sites:
+            sites.append(url)
+            os.makedirs(_bundle, exist_ok=True)
+            with open(os.path.join(_bundle, "sites.json"), "w") as f:
+                json.dump(sites, f, indent=2)
+
+def load_sites() -> List[str]:
+    """Return the URLs recorded in the current bundle"""
+    try:
+        with open(os.path.join(_bundle, "sites.json")) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return []
@@ -0,0 +1,278 @@
+"""
+Retries, deadlines and circuit breakers for network calls
+Every outbound call in utils/ (page fetches per scraped host, the OpenAI
+endpoint, the SMTP server) goes through call(), which retries transient
+errors with exponential backoff and full jitter under a named policy.
+
+Each endpoint has a circuit breaker: after BREAKER_FAILURE_THRESHOLD
+consecutive failures it opens and calls raise CircuitOpen immediately for
+BREAKER_RESET_SECONDS, so a dead host or a down API costs a worker slot
+microseconds instead of a series of timeouts. Then one probe call is let
+through; success closes the circuit, failure opens it again.
+
+A deadline set with deadline() applies to everything the current context
+(and contexts copied from it) calls: retries stop, backoff sleeps are cut
+short and timeout() shrinks per-request timeouts to the time that is left.
+"""
+
+import contextvars
+import logging
+import random
+import socket
+import sys
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from contextlib import contextmanager
+from typing import Any, Callable, Optional
+
+from config import BREAKER_FAILURE_THRESHOLD, BREAKER_RESET_SECONDS, RETRY_MAX_DELAY
+from utils.metrics import record
+
+logger = logging.getLogger(__name__)
+
+# attempts includes the first call; delays are in seconds
+RetryPolicy = namedtuple("RetryPolicy", ["attempts", "base_delay", "max_delay"])
+
+POLICIES = {
+    "http": RetryPolicy(3, 1.0, 8.0),
+    "dynamic": RetryPolicy(2, 2.0, 8.0),
+    "robots": RetryPolicy(1, 0.0, 0.0),
+    "llm": RetryPolicy(4, 1.0, 20.0),
+    "smtp": RetryPolicy(3, 2.0, 30.0),
+}
+
+# Breakers are kept for this many recently used endpoints
+MAX_ENDPOINTS = 10000
+
+class CircuitOpen(Exception):
+    """Raised instead of calling an endpoint whose circuit is open"""
+
+    def __init__(self, endpoint: str, retry_after: float):
+        super().__init__(f"Circuit open for {endpoint}, retry in {retry_after:.0f}s")
+        self.endpoint = endpoint
+        self.retry_after = retry_after
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when the current deadline has passed before a call could start"""
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker for one endpoint
+
+    Args:
+        failure_threshold: Consecutive failures that open the circuit
+        reset_seconds: Seconds the circuit stays open before a probe is allowed
+    """
+
+    def __init__(self, failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+                 reset_seconds: float = BREAKER_RESET_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._lock = threading.Lock()
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at < self.reset_seconds:
+            return "open"
+        return "half-open"
+
+    def retry_after(self) -> Optional[float]:
+        """Seconds until the circuit lets a call through, or None if it would now"""
+        opened_at = self.opened_at
+        if opened_at is None:
+            return None
+        wait = opened_at + self.reset_seconds - time.monotonic()
+        if wait > 0:
+            return wait
+        return self.reset_seconds if self._probing else None
+
+    def acquire(self) -> Optional[float]:
+        """
+        Ask to make a call
+
+        Returns:
+            None if the call may go ahead, else seconds until the next probe
+        """
+        if self.opened_at is None:
+            return None
+        with self._lock:
+            if self.opened_at is None:
+                return None
+            wait = self.opened_at + self.reset_seconds - time.monotonic()
+            if wait > 0:
+                return wait
+            if self._probing:
+                # One probe at a time; the rest keep failing fast until it reports back
+                return self.reset_seconds
+            self._probing = True
+            return None
+
+    def release(self):
+        """Give back a probe that acquire() granted but was not used"""
+        self._probing = False
+
+    def success(self):
+        if self.failures or self.opened_at is not None:
+            with self._lock:
+                self.failures = 0
+                self.opened_at = None
+                self._probing = False
+
+    def failure(self) -> bool:
+        """Record a failed call; returns True if the circuit is (now) open"""
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self.opened_at is not None or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+                return True
+            return False
+
+_breakers_lock = threading.Lock()
+_breakers: "OrderedDict[str, CircuitBreaker]" = OrderedDict()
+
+def breaker(endpoint: str) -> CircuitBreaker:
+    """The circuit breaker of an endpoint (e.g. "http:example.com", "smtp:smtp.gmail.com")"""
+    with _breakers_lock:
+        circuit = _breakers.get(endpoint)
+        if circuit is None:
+            circuit = _breakers[endpoint] = CircuitBreaker()
+            if len(_breakers) > MAX_ENDPOINTS:
+                _breakers.popitem(last=False)
+        else:
+            _breakers.move_to_end(endpoint)
+        return circuit
+
+def check(endpoint: str):
+    """Raise CircuitOpen if calls to endpoint would fail fast right now"""
+    wait = breaker(endpoint).retry_after()
+    if wait is not None:
+        raise CircuitOpen(endpoint, wait)
+
+def reset():
+    """Forget all breaker state"""
+    with _breakers_lock:
+        _breakers.clear()
+
+_deadline: contextvars.ContextVar = contextvars.ContextVar("resilience_deadline", default=None)
+
+@contextmanager
+def deadline(seconds: Optional[float]):
+    """
+    Limit the time calls made in this block may take
+
+    Nested deadlines never extend an outer one. None leaves the current
+    deadline unchanged.
+    """
+    if seconds is None:
+        yield
+        return
+    at = time.monotonic() + seconds
+    current = _deadline.get()
+    token = _deadline.set(at if current is None else min(at, current))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+def remaining() -> Optional[float]:
+    """Seconds left before the current deadline, or None without one"""
+    at = _deadline.get()
+    return None if at is None else at - time.monotonic()
+
+def timeout(default: float) -> float:
+    """A per-request timeout: default, or less if the deadline is closer"""
+    left = remaining()
+    if left is None:
+        return default
+    return max(min(default, left), 0.001)
+
+def backoff(policy: RetryPolicy, attempt: int) -> float:
+    """Full-jitter delay before retry number attempt (0 for the first retry)"""
+    cap = min(policy.max_delay, RETRY_MAX_DELAY)
+    return random.uniform(0, min(cap, policy.base_delay * 2 ** attempt))
+
+def transient(error: Exception) -> bool:
+    """
+    Default retry test: connection errors, timeouts, HTTP 429 and 5xx
+
+    HTTP errors with other statuses mean the endpoint answered, so they are
+    neither retried nor counted against its breaker. Neither are other
+    OSErrors: every requests exception is one, malformed URLs included.
+    """
+    if isinstance(error, (CircuitOpen, DeadlineExceeded)):
+        return False
+    status = getattr(getattr(error, "response", None), "status_code", None)
+    if status is not None:
+        return status == 429 or status >= 500
+    # Looked up rather than imported: an error from requests means it is loaded
+    requests_errors = sys.modules.get("requests.exceptions")
+    if requests_errors is not None and isinstance(error, requests_errors.RequestException):
+        return isinstance(error, (requests_errors.ConnectionError, requests_errors.Timeout,
+                                  requests_errors.ChunkedEncodingError))
+    return isinstance(error, (ConnectionError, TimeoutError, socket.gaierror, socket.herror))
+
+def call(endpoint: str, fn: Callable[[], Any], policy: str = "http",
+         retryable: Optional[Callable[[Exception], bool]] = None, attempts: Optional[int] = None) -> Any:
+    """
+    Call fn() with the endpoint's breaker, the retry policy and the current deadline
+
+    Args:
+        endpoint: Breaker key, e.g. "http:example.com"
+        fn: Function making one attempt
+        policy: Name of a retry policy in POLICIES
+        retryable: Predicate for errors worth retrying (default: transient)
+        attempts: Override the policy's number of attempts
+
+    Returns:
+        fn()'s result
+
+    Raises:
+        CircuitOpen: If the endpoint's circuit is open
+        DeadlineExceeded: If the deadline passed before the first attempt
+        The last error from fn() once retries are exhausted or not worthwhile
+    """
+    rules = POLICIES[policy]
+    retryable = retryable or transient
+    attempts = max(attempts or rules.attempts, 1)
+    circuit = breaker(endpoint)
+
+    for attempt in range(attempts):
+        wait = circuit.acquire()
+        if wait is not None:
+            record("circuit_open")
+            raise CircuitOpen(endpoint, wait)
+        left = remaining()
+        if left is not None and left <= 0:
+            # Nothing was sent, so don't leave a half-open probe claimed
+            circuit.release()
+            raise DeadlineExceeded(f"Deadline passed before calling {endpoint}")
+
+        try:
+            result = fn()
+        except Exception as e:
+            if not retryable(e):
+                circuit.success()
+                raise
+            if circuit.failure():
+                if circuit.failures == circuit.failure_threshold:
+                    logger.warning("Circuit for %s opened after %d failures: %s", endpoint, circuit.failures, e)
+                raise
+            if attempt + 1 >= attempts:
+                raise
+            delay = backoff(rules, attempt)
+            left = remaining()
+            if left is not None and left <= delay:
+                raise
+            record("retries")
+            logger.debug("Retrying %s in %.1fs after: %s", endpoint, delay, e)
+            time.sleep(delay)
+        else:
+            circuit.success()
+            return result
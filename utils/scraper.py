@@ -1,112 +1,448 @@
-from bs4 import BeautifulSoup
-import requests
-from playwright.sync_api import sync_playwright
 from time import sleep
+import atexit
+import base64
+import contextvars
+import logging
 import re
-import openai
 import json
-from config import OPENAI_API_KEY
+from collections import namedtuple
+from utils import offload, replay, resilience, site_routes
+from utils.llm import chat_completion
+from utils.llm_json import STRUCTURED_DATA_SCHEMA, JSONText, extract_json
+from utils.metrics import timed, record
+from utils.prompt_budget import compact_text, fit_sections, relevance_keywords
+from config import (EXTRACT_TOKEN_BUDGET, SCRAPE_CONTENT_TOKENS, PREFETCH_WORKERS,
+                    SCRAPE_MAX_BYTES, SCRAPE_MAX_PARAGRAPHS, RESPECT_ROBOTS)
 
-openai.api_key = OPENAI_API_KEY
+logger = logging.getLogger(__name__)
 
-# Static scraping (BeautifulSoup)
-def scrape_static(url, max_retries=3):
-    for _ in range(max_retries):
-        try:
-            response = requests.get(
-                url,
-                headers={
-                    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-                },
-                timeout=10
-            )
+# requests, lxml and Playwright are imported inside the scraping
+# functions so importing this module stays cheap for the CLI tools
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+
+# Conventional about page locations, fetched speculatively alongside the landing page
+ABOUT_CANDIDATE_PATHS = ("/about", "/about-us", "/company", "/team")
+PREFETCH_TIMEOUT = 5
+
+# Only these content types are read; anything else is rejected from the headers
+HTML_CONTENT_TYPES = ("text/html", "application/xhtml+xml")
+ABOUT_PAGE_PARAGRAPHS = 10
+_PARAGRAPH_END_RE = re.compile(rb"</p\s*>", re.IGNORECASE)
+
+class UnsupportedContent(Exception):
+    """Raised when a URL does not serve an HTML page"""
+
+# Shared HTTP session and browser, kept warm for the lifetime of the process
+_session = None
+_playwright = None
+_browser = None
+_prefetch_pool = None
+
+def get_session():
+    """Return the shared requests session, creating it on first use"""
+    global _session
+    if _session is None:
+        import requests
+        _session = requests.Session()
+        _session.headers.update({"User-Agent": USER_AGENT})
+    return _session
+
+def get_browser():
+    """Return the shared headless Chromium browser, launching it on first use"""
+    global _playwright, _browser
+    if _browser is None or not _browser.is_connected():
+        if _playwright is None:
+            from playwright.sync_api import sync_playwright
+            _playwright = sync_playwright().start()
+            atexit.register(close_browser)
+        
+        # Use Chromium with specific options for better compatibility
+        _browser = _playwright.chromium.launch(
+            headless=True,
+            args=['--disable-web-security', '--disable-features=IsolateOrigins', '--disable-site-isolation-trials']
+        )
+    return _browser
+
+def close_browser():
+    """Close the shared browser and stop Playwright"""
+    global _playwright, _browser
+    try:
+        if _browser is not None:
+            _browser.close()
+        if _playwright is not None:
+            _playwright.stop()
+    except Exception:
+        pass
+    _browser = None
+    _playwright = None
+
+class Page(namedtuple("Page", ["url", "status_code", "headers", "content", "encoding"])):
+    """A fetched HTTP response body with the fields the scraper needs"""
+    __slots__ = ()
+    
+    @property
+    def text(self):
+        return self.content.decode(self.encoding or "utf-8", errors="replace")
+
+def _encode_page(page):
+    return {
+        "url": page.url,
+        "status_code": page.status_code,
+        "headers": page.headers,
+        "content": base64.b64encode(page.content).decode("ascii"),
+        "encoding": page.encoding
+    }
+
+def _decode_page(data):
+    return Page(data["url"], data["status_code"], data["headers"], base64.b64decode(data["content"]), data["encoding"])
+
+def _read_body(response, max_bytes, max_paragraphs):
+    """Read a streamed body up to max_bytes, stopping early after max_paragraphs closing </p> tags"""
+    chunks = []
+    size = 0
+    paragraphs = 0
+    tail = b""
+    for chunk in response.iter_content(chunk_size=16384):
+        chunks.append(chunk)
+        size += len(chunk)
+        if size >= max_bytes:
+            record("truncated_pages")
+            break
+        if max_paragraphs:
+            # Keep the last bytes of the previous chunk so a tag split across chunks is still seen
+            paragraphs += len(_PARAGRAPH_END_RE.findall(tail + chunk))
+            if paragraphs >= max_paragraphs:
+                break
+            tail = chunk[-3:]
+    return b"".join(chunks)[:max_bytes]
+
+def _fetch_live(url, timeout, check_status, max_paragraphs, headers=None):
+    response = get_session().get(url, headers=headers, timeout=timeout, stream=True)
+    try:
+        if check_status:
             response.raise_for_status()
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Extract basic info
-            business_name = soup.title.string if soup.title else "N/A"
-            description = soup.find("meta", attrs={"name": "description"})
-            description = description["content"] if description else "N/A"
-            
-            # Extract main content text
-            main_content = ""
-            
-            # Common content containers
-            content_elements = soup.select("main, article, .content, #content, .main, #main")
-            if not content_elements:
-                # Fallback to body text if no specific content containers
-                paragraphs = soup.find_all("p")
-                main_content = " ".join([p.get_text().strip() for p in paragraphs[:10]]) # First 10 paragraphs
-            else:
-                for element in content_elements[:1]:  # Use first main content element
-                    paragraphs = element.find_all("p")
-                    main_content = " ".join([p.get_text().strip() for p in paragraphs])
-            
-            # Try to extract about page URL
-            about_links = []
-            for a in soup.find_all("a", href=True):
-                if re.search(r'about|company|team|who we are', a.get_text().lower()):
-                    about_url = a['href']
-                    # Handle relative URLs
-                    if not about_url.startswith('http'):
-                        if about_url.startswith('/'):
-                            base_url = '/'.join(url.split('/')[:3])  # http(s)://domain.com
-                            about_url = base_url + about_url
-                        else:
-                            about_url = url.rstrip('/') + '/' + about_url
-                    about_links.append(about_url)
-            
-            result = {
-                "business_name": business_name,
-                "description": description,
-                "main_content": main_content,
-                "about_links": about_links[:1] if about_links else []  # Only use first about link
-            }
-            
-            # If we have an about page, try to scrape it too
-            if about_links:
-                try:
-                    about_response = requests.get(
-                        about_links[0],
-                        headers={
-                            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-                        },
-                        timeout=10
-                    )
-                    about_soup = BeautifulSoup(about_response.text, 'html.parser')
-                    about_paragraphs = about_soup.find_all("p")
-                    about_content = " ".join([p.get_text().strip() for p in about_paragraphs[:10]])
-                    result["about_content"] = about_content
-                except Exception as e:
-                    print(f"Error scraping about page: {e}")
-            
-            return result
-            
+        
+        content_type = response.headers.get("Content-Type", "")
+        if content_type and content_type.split(";")[0].strip().lower() not in HTML_CONTENT_TYPES:
+            raise UnsupportedContent(f"{url} is {content_type}, not HTML")
+        
+        content = _read_body(response, SCRAPE_MAX_BYTES, max_paragraphs)
+    finally:
+        # Also drops the connection if the body was not read to the end
+        response.close()
+    
+    return Page(
+        response.url,
+        response.status_code,
+        dict(response.headers),
+        content,
+        # Without a declared charset, leave detection to the parser
+        response.encoding if "charset" in content_type.lower() else None
+    )
+
+def host_endpoint(url):
+    """Circuit breaker key shared by every engine that fetches from a host"""
+    return "http:" + site_routes.domain_of(url)
+
+def fetch_page(url, timeout=10, check_status=True, max_paragraphs=None, attempts=None, headers=None):
+    """
+    Fetch a URL with the shared session (or from the replay bundle)
+    
+    The body is streamed and at most SCRAPE_MAX_BYTES are kept. Responses that
+    declare a non-HTML content type are rejected before the body is read.
+    Connection errors, timeouts, 429 and 5xx responses are retried under the
+    "http" policy and count against the host's circuit breaker.
+    
+    Args:
+        url: URL to fetch
+        timeout: Request timeout in seconds (less if the current deadline is closer)
+        check_status: Raise for 4xx/5xx responses
+        max_paragraphs: Stop reading after this many paragraphs (None or 0 reads the whole page)
+        attempts: Override the number of attempts (1 for speculative fetches)
+        headers: Extra request headers, e.g. If-None-Match for a conditional request
+        
+    Returns:
+        Page with the response body and metadata (an empty body for 304 Not Modified)
+        
+    Raises:
+        UnsupportedContent: If the response is not an HTML page
+        resilience.CircuitOpen: If the host has been failing
+    """
+    # Requests with different headers may get different answers, so they are recorded apart
+    key = "\n".join([url] + [f"{name}: {value}" for name, value in sorted((headers or {}).items())])
+    page = replay.replay_or_call(
+        "http", key,
+        lambda: resilience.call(
+            host_endpoint(url),
+            lambda: _fetch_live(url, resilience.timeout(timeout), check_status, max_paragraphs, headers),
+            "http", attempts=attempts
+        ),
+        encode=_encode_page,
+        decode=_decode_page
+    )
+    record("bytes", len(page.content))
+    return page
+
+def _base_url(url):
+    return '/'.join(url.split('/')[:3])  # http(s)://domain.com
+
+def _normalize_url(url):
+    base = _base_url(url)
+    return (base.lower() + url[len(base):].split('#')[0]).rstrip('/')
+
+def _get_prefetch_pool():
+    global _prefetch_pool
+    if _prefetch_pool is None:
+        from concurrent.futures import ThreadPoolExecutor
+        _prefetch_pool = ThreadPoolExecutor(max_workers=max(PREFETCH_WORKERS, 1), thread_name_prefix="prefetch")
+    return _prefetch_pool
+
+class PrefetchSkipped(Exception):
+    """Raised for a candidate that robots.txt rules out for speculative fetching"""
+
+class AboutPrefetch:
+    """
+    Speculative fetches of the conventional about page paths of a site
+    
+    The candidates are requested with the shared session on a bounded thread
+    pool while the landing page is still loading. They go one at a time per
+    site and only where robots.txt allows them; a site whose robots.txt sets
+    a Crawl-delay gets no speculative requests at all. Once the real about
+    link is known, take() hands over the matching response (if any) and
+    discard() cancels the rest.
+    
+    One instance serves a whole scrape, static and dynamic attempts alike.
+    """
+    
+    def __init__(self, url):
+        from concurrent.futures import Future
+        
+        self._futures = {}
+        if PREFETCH_WORKERS <= 0:
+            return
+        pending = []
+        for path in ABOUT_CANDIDATE_PATHS:
+            candidate = _base_url(url) + path
+            future = self._futures[_normalize_url(candidate)] = Future()
+            pending.append((candidate, future))
+        # Run in a copy of the caller's context so bytes count towards its span
+        _get_prefetch_pool().submit(contextvars.copy_context().run, self._fetch_all, pending)
+    
+    @staticmethod
+    def _fetch_all(pending):
+        robots = None
+        if RESPECT_ROBOTS:
+            from utils.crawl import shared_robots
+            robots = shared_robots()
+        for candidate, future in pending:
+            if not future.set_running_or_notify_cancel():
+                continue  # discarded, or taken before it started
+            try:
+                if robots is not None and (robots.crawl_delay(candidate) or not robots.allowed(candidate)):
+                    raise PrefetchSkipped(f"robots.txt rules out prefetching {candidate}")
+                future.set_result(fetch_page(candidate, PREFETCH_TIMEOUT,
+                                             max_paragraphs=ABOUT_PAGE_PARAGRAPHS, attempts=1))
+            except Exception as e:
+                future.set_exception(e)
+    
+    def take(self, url):
+        """Return the prefetched Page for url, or None if it was not a candidate, not fetched yet or failed"""
+        future = self._futures.pop(_normalize_url(url), None)
+        if future is None or future.cancel():
+            # A candidate still queued behind others is quicker to fetch directly
+            return None
+        try:
+            page = future.result()
         except Exception as e:
-            print(f"Retry {_ + 1}: Error scraping {url} - {str(e)}")
-            sleep(2)
+            logger.debug("Prefetch of %s failed: %s", url, e, extra={"url": url})
+            return None
+        record("prefetch_hits")
+        return page
     
-    # Static scraping failed, but return None to allow fallback to dynamic
-    print("Static scraping failed after all retries")
-    return None
+    def discard(self):
+        """Cancel candidates that have not started; a running one finishes in the background"""
+        for future in self._futures.values():
+            future.cancel()
+        if self._futures:
+            record("prefetch_discarded", len(self._futures))
+        self._futures.clear()
 
-# Dynamic scraping (Playwright)
-def scrape_dynamic(url):
+# Static scraping (requests + lxml)
+
+# Returned by a static attempt that dynamic rendering would not get any further with
+_SKIP = object()
+
+def scrape_static(url, max_retries=3, prefetch=None, page=None):
+    """
+    Scrape a page with requests and lxml
+    
+    prefetch is the scrape's AboutPrefetch, if it has one, and page the
+    landing page if it was already fetched (e.g. by a revalidation).
+    """
+    result = _static_attempt(url, max_retries, prefetch, page)
+    return None if result is _SKIP else result
+
+@timed("scrape_static")
+def _static_attempt(url, max_retries=3, prefetch=None, page=None):
+    own_prefetch = prefetch is None
+    if own_prefetch:
+        prefetch = AboutPrefetch(url)
+    try:
+        return _scrape_static(url, max_retries, prefetch, page)
+    finally:
+        if own_prefetch:
+            prefetch.discard()
+
+def _scrape_static(url, max_retries, prefetch, landing_page=None):
+    from utils.html_extract import extract_page, text_blocks
+    
     try:
-        with sync_playwright() as p:
-            # Use Chromium with specific options for better compatibility
-            browser = p.chromium.launch(
-                headless=True,
-                args=['--disable-web-security', '--disable-features=IsolateOrigins', '--disable-site-isolation-trials']
+        # Transient errors are retried with backoff inside fetch_page
+        response = landing_page or fetch_page(url, max_paragraphs=SCRAPE_MAX_PARAGRAPHS, attempts=max_retries)
+    except resilience.CircuitOpen as e:
+        # The host keeps failing; don't spend a worker slot (or a browser) waiting on it
+        record("errors")
+        logger.warning("Skipping %s: %s", url, e, extra={"url": url})
+        return _SKIP
+    except UnsupportedContent as e:
+        # Neither retrying nor rendering changes the content type
+        record("errors")
+        logger.warning("Skipping %s: %s", url, e, extra={"url": url})
+        return _SKIP
+    except Exception as e:
+        # Static scraping failed, but return None to allow fallback to dynamic
+        record("errors")
+        logger.error("Static scraping of %s failed: %s", url, e, extra={"url": url})
+        return None
+    
+    # Title, meta description, main content paragraphs and about links in one pass
+    # (on the parse process pool in bulk mode)
+    page = offload.run(extract_page, response.content, url, response.encoding)
+    if page["needs_javascript"]:
+        # An app shell won't get better with retries; hand over to Playwright now
+        record("app_shells")
+        site_routes.remember_javascript(url, "app shell")
+        logger.info("%s is a JavaScript app shell, needs dynamic rendering", url, extra={"url": url})
+        return None
+    
+    about_links = page["about_links"]
+    
+    result = {
+        "business_name": page["title"],
+        "description": page["description"],
+        "main_content": page["main_content"],
+        "about_links": about_links[:1] if about_links else []  # Only use first about link
+    }
+    
+    # HTTP validators let a later revisit ask whether the page changed (see utils.recrawl)
+    headers = {name.lower(): value for name, value in response.headers.items()}
+    validators = {"etag": headers.get("etag"), "last_modified": headers.get("last-modified")}
+    if any(validators.values()):
+        result["validators"] = validators
+    
+    # If we have an about page, try to scrape it too
+    if about_links:
+        try:
+            about_response = prefetch.take(about_links[0]) or fetch_page(
+                about_links[0], check_status=False, max_paragraphs=ABOUT_PAGE_PARAGRAPHS, attempts=1
             )
-            
-            context = browser.new_context(
-                viewport={"width": 1920, "height": 1080},
-                user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+            result["about_content"] = " ".join(
+                offload.run(text_blocks, about_response.content, about_response.encoding, ("p",), 10)
             )
-            
+        except Exception as e:
+            record("errors")
+            logger.warning("Error scraping about page %s: %s", about_links[0], e, extra={"url": about_links[0]})
+    
+    return result
+
+def scrape(url, page=None):
+    """
+    Scrape a website with the engine it needs
+    
+    Domains remembered as needing JavaScript go straight to Playwright. Other
+    sites are scraped statically first; an app shell or a failed static
+    scrape falls back to dynamic rendering, and a dynamic success after a
+    static failure is remembered for the domain. A host whose circuit is
+    open or a URL that is not an HTML page is not rendered either.
+    
+    Args:
+        url: Website URL
+        page: Landing page Page already fetched (e.g. by a revalidation), so
+              the static scrape doesn't download it again
+        
+    Returns:
+        Scraped data dictionary, or None if both engines failed
+    """
+    # Both engines share one set of speculative about page fetches
+    prefetch = AboutPrefetch(url)
+    try:
+        return _scrape(url, prefetch, page)
+    finally:
+        prefetch.discard()
+
+def _scrape(url, prefetch, page):
+    if site_routes.needs_javascript(url):
+        logger.info("Rendering %s dynamically (remembered for its domain)", url, extra={"url": url})
+        result = scrape_dynamic(url, prefetch)
+        if result:
+            return result
+        # The verdict may be stale or the browser unavailable
+        site_routes.forget(url)
+        return scrape_static(url, prefetch=prefetch, page=page)
+    
+    result = _static_attempt(url, prefetch=prefetch, page=page)
+    if result is _SKIP:
+        # A failing host or a non-HTML URL won't render either
+        return None
+    if result:
+        return result
+    
+    logger.info("Static scraping failed for %s, trying dynamic rendering", url, extra={"url": url})
+    result = scrape_dynamic(url, prefetch)
+    if result and not site_routes.needs_javascript(url):
+        site_routes.remember_javascript(url, "static scrape failed")
+    return result
+
+# Dynamic scraping (Playwright)
+@timed("scrape_dynamic")
+def scrape_dynamic(url, prefetch=None):
+    """Render a page with the shared browser; recorded and replayed as a whole result"""
+    return replay.replay_or_call("dynamic", url, lambda: _render_dynamic(url, prefetch))
+
+def _prefetched_about_text(page):
+    """Visible-text equivalent of the dynamic about page extraction, from static HTML"""
+    from utils.html_extract import text_blocks
+    
+    tags = ("p", "h1", "h2", "h3", "h4", "h5", "h6", "li")
+    return " ".join(text_blocks(page.content, page.encoding, tags=tags, min_length=20))
+
+def _navigation_failed(error):
+    """Retry test for Playwright navigation: its timeouts and network errors"""
+    return isinstance(error, OSError) or type(error).__module__.startswith("playwright")
+
+def _goto(page, url, timeout, attempts=None):
+    """Navigate with the host's circuit breaker and the "dynamic" retry policy"""
+    resilience.call(
+        host_endpoint(url),
+        lambda: page.goto(url, timeout=resilience.timeout(timeout) * 1000),
+        "dynamic", retryable=_navigation_failed, attempts=attempts
+    )
+
+def _render_dynamic(url, prefetch=None):
+    own_prefetch = prefetch is None
+    if own_prefetch:
+        prefetch = AboutPrefetch(url)
+    try:
+        # Each scrape gets its own context on the shared browser
+        context = get_browser().new_context(
+            viewport={"width": 1920, "height": 1080},
+            user_agent=USER_AGENT
+        )
+        
+        try:
             page = context.new_page()
-            page.goto(url, timeout=30000)  # 30-second timeout
+            _goto(page, url, 30)  # 30-second timeout per attempt
             
             # Wait longer for page to fully load
             page.wait_for_selector("body")
@@ -114,7 +450,7 @@ def scrape_dynamic(url):
             
             # Get page source
             page_source = page.content()
-            soup = BeautifulSoup(page_source, 'html.parser')
+            record("bytes", len(page_source.encode()))
             
             # Extract basic info
             business_name = page.title()
@@ -155,13 +491,14 @@ def scrape_dynamic(url):
                         continue
             
             # Look for about page links
+            from utils.html_extract import ABOUT_LINK_RE
             about_links = []
             links = page.query_selector_all("a")
             for link in links:
                 try:
                     text = page.evaluate("el => el.textContent", link)
                     href = page.evaluate("el => el.href", link)
-                    if text and href and re.search(r'about|company|team|who we are', text.lower()):
+                    if text and href and ABOUT_LINK_RE.search(text.lower()):
                         about_links.append(href)
                 except:
                     continue
@@ -191,17 +528,22 @@ def scrape_dynamic(url):
             result = {
                 "business_name": business_name,
                 "description": description,
-                "main_content": main_content[:5000],  # Limit to avoid overly large content
+                "main_content": compact_text(main_content, SCRAPE_CONTENT_TOKENS),  # Deduplicated, boilerplate-free and capped
                 "about_links": about_links[:1] if about_links else [],
                 "images_alt_text": images[:10],  # First 10 images with alt text
                 "possible_services": services[:10]  # First 10 possible services
             }
             
-            # Visit about page if found
-            if about_links:
+            # Use the prefetched about page when its HTML already has the text,
+            # otherwise render it in a second page
+            prefetched = prefetch.take(about_links[0]) if about_links else None
+            about_content = _prefetched_about_text(prefetched) if prefetched else ""
+            if about_content:
+                result["about_content"] = compact_text(about_content, SCRAPE_CONTENT_TOKENS)
+            elif about_links:
                 try:
                     about_page = context.new_page()
-                    about_page.goto(about_links[0], timeout=15000)
+                    _goto(about_page, about_links[0], 15, attempts=1)
                     about_page.wait_for_selector("body")
                     sleep(2)  # Give time for JS to execute
                     
@@ -223,10 +565,10 @@ def scrape_dynamic(url):
                         except:
                             continue
                     
-                    result["about_content"] = about_content[:5000]  # Limit size
+                    result["about_content"] = compact_text(about_content, SCRAPE_CONTENT_TOKENS)
                     about_page.close()
                 except Exception as e:
-                    print(f"Error scraping about page: {e}")
+                    logger.warning("Error scraping about page %s: %s", about_links[0], e, extra={"url": about_links[0]})
             
             # Take a screenshot for debugging or content analysis
             try:
@@ -235,20 +577,29 @@ def scrape_dynamic(url):
             except:
                 pass
             
-            browser.close()
-            
             # Log the scraped contents for debugging
             with open("output/scrape_result.json", "w") as f:
                 json.dump(result, f, indent=2)
                 
             return result
+        finally:
+            context.close()
             
     except Exception as e:
-        print(f"Dynamic scraping failed: {e}")
+        record("errors")
+        logger.error("Dynamic scraping failed for %s: %s", url, e, extra={"url": url})
         return None
+    finally:
+        prefetch.discard()
 
 def extract_structured_data(scrape_results):
-    """Use LLM to extract structured data from scraped content"""
+    """
+    Use LLM to extract structured data from scraped content
+    
+    Returns:
+        JSONText (a JSON string with the decoded object in .obj, and .fallback
+        set when the model call failed), or {} without input
+    """
     if not scrape_results:
         return {}
     
@@ -274,17 +625,24 @@ def extract_structured_data(scrape_results):
     if scrape_results.get('possible_services'):
         all_content += f"Possible Services/Features: {', '.join(scrape_results.get('possible_services'))}\n\n"
     
+    # Fit about and main content into the token budget, keeping the most relevant sentences
+    page_text = fit_sections(
+        [("about", scrape_results.get('about_content') or ""), ("main", scrape_results.get('main_content') or "")],
+        EXTRACT_TOKEN_BUDGET,
+        relevance_keywords(scrape_results)
+    )
+    
     # Add about content if available
-    if scrape_results.get('about_content'):
-        all_content += f"About Content: {scrape_results.get('about_content', 'N/A')[:1500]}\n\n"
+    if page_text["about"]:
+        all_content += f"About Content: {page_text['about']}\n\n"
     
-    # Add main content (limited to avoid token limits)
-    if scrape_results.get('main_content'):
-        all_content += f"Main Content: {scrape_results.get('main_content', 'N/A')[:1500]}\n\n"
+    # Add main content
+    if page_text["main"]:
+        all_content += f"Main Content: {page_text['main']}\n\n"
     
     # Fallback to simpler analysis if we don't have enough data
     if len(all_content) < 100:
-        return json.dumps({
+        return JSONText.from_object({
             "business_name": scrape_results.get('business_name', 'N/A'),
             "business_type": "Could not determine - insufficient data",
             "target_audience": "Could not determine - insufficient data",
@@ -317,45 +675,31 @@ def extract_structured_data(scrape_results):
     """
     
     try:
-        response = openai.ChatCompletion.create(
-            model="gpt-3.5-turbo",
-            messages=[{"role": "user", "content": prompt}]
-        )
+        result = chat_completion(prompt, stage="llm.extract")
         
-        result = response.choices[0].message.content
-        
-        # Try to parse JSON to verify it's valid
-        try:
-            parsed = json.loads(result)
-            return result
-        except json.JSONDecodeError as e:
-            print(f"Invalid JSON returned from OpenAI: {e}")
-            # Try to extract just the JSON part if there's extra text
-            match = re.search(r'({.+})', result.replace('\n', ' '), re.DOTALL)
-            if match:
-                try:
-                    json_str = match.group(1)
-                    parsed = json.loads(json_str)
-                    return json_str
-                except:
-                    pass
+        # Parse and validate the JSON, skipping any extra text around it
+        parsed = extract_json(result, STRUCTURED_DATA_SCHEMA)
+        if parsed is not None:
+            return parsed
+        else:
+            logger.warning("No valid structured data JSON returned from OpenAI")
             
             # Fallback to manual structure
-            return json.dumps({
+            return JSONText.from_object({
                 "business_name": scrape_results.get('business_name', 'N/A'),
                 "business_type": "Error in parsing LLM response",
                 "target_audience": "Error in parsing LLM response",
                 "services": ["Error in parsing LLM response"],
                 "value_proposition": "Error in parsing LLM response"
-            })
+            }, fallback=True)
             
     except Exception as e:
-        print(f"Error extracting structured data: {e}")
+        logger.error("Error extracting structured data: %s", e)
         # Return manual structure with the data we have
-        return json.dumps({
+        return JSONText.from_object({
             "business_name": scrape_results.get('business_name', 'N/A'),
             "business_type": "GUESS: Based on name, possibly a fashion or AI platform",
             "target_audience": "GUESS: Fashion consumers or businesses",
             "services": ["GUESS: Fashion services", "GUESS: AI-assisted recommendations"],
             "value_proposition": "GUESS: Integration of fashion and AI technology"
-        })
\ No newline at end of file
+        }, fallback=True)
\ No newline at end of file
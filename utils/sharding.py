@@ -0,0 +1,103 @@
+"""
+Consistent-hash sharding of pipeline work by registrable domain
+Every domain maps to one of SHARD_BUCKETS buckets, and a hash ring assigns
+buckets to workers. All jobs for a domain therefore land on the same worker,
+whose per-host state (shared HTTP session, robots.txt cache, politeness
+slots, static/dynamic verdicts) stays local and warm. When a worker joins or
+leaves, only the buckets next to it on the ring move.
+
+tldextract is used for registrable domains when installed; otherwise a
+built-in list of common multi-label suffixes covers the usual cases.
+"""
+
+import bisect
+import hashlib
+from functools import lru_cache
+from typing import FrozenSet, Iterable, List, Optional, Set
+from urllib.parse import urlsplit
+
+from config import SHARD_BUCKETS, SHARD_VNODES
+
+try:
+    import tldextract
+    # Use the bundled suffix list snapshot; never fetch it over the network
+    _extract = tldextract.TLDExtract(suffix_list_urls=())
+except Exception:  # tldextract is optional
+    _extract = None
+
+# Second-level public suffixes under which names are registered (example.co.uk)
+MULTI_LABEL_SUFFIXES = {
+    "co.uk", "org.uk", "ac.uk", "gov.uk", "me.uk", "ltd.uk", "plc.uk",
+    "com.au", "net.au", "org.au", "edu.au", "gov.au",
+    "co.nz", "org.nz", "co.za", "org.za", "co.jp", "ne.jp", "or.jp",
+    "co.in", "net.in", "org.in", "firm.in", "gen.in", "ind.in",
+    "com.br", "net.br", "org.br", "com.mx", "com.ar", "com.co",
+    "com.ng", "org.ng", "com.gh", "co.ke", "or.ke", "co.tz", "co.ug",
+    "com.cn", "net.cn", "org.cn", "com.hk", "com.sg", "com.my", "com.tr",
+    "co.kr", "or.kr", "co.il", "co.id", "com.ph", "com.pk", "com.eg", "com.sa"
+}
+
+def registrable_domain(url_or_host: str) -> str:
+    """
+    Return the registrable domain of a URL or hostname
+
+    "https://shop.example.co.uk/about" -> "example.co.uk". IP addresses and
+    single-label hosts are returned unchanged.
+    """
+    host = urlsplit(url_or_host).hostname if "://" in url_or_host else url_or_host.split(":")[0]
+    host = (host or url_or_host).lower().rstrip(".")
+    labels = host.split(".")
+    if len(labels) <= 2 or labels[-1].isdigit():
+        return host
+
+    if _extract is not None:
+        parts = _extract(host)
+        if parts.domain and parts.suffix:
+            return f"{parts.domain}.{parts.suffix}"
+
+    if ".".join(labels[-2:]) in MULTI_LABEL_SUFFIXES:
+        return ".".join(labels[-3:])
+    return ".".join(labels[-2:])
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.sha1(value.encode("utf-8")).digest()[:8], "big")
+
+def shard_of(url_or_host: str, buckets: int = SHARD_BUCKETS) -> int:
+    """Bucket number of a URL's registrable domain"""
+    return _hash(registrable_domain(url_or_host)) % buckets
+
+class HashRing:
+    """
+    Consistent hash ring of worker names
+
+    Args:
+        nodes: Worker names
+        vnodes: Points per worker on the ring (more points spread buckets more evenly)
+    """
+
+    def __init__(self, nodes: Iterable[str], vnodes: int = SHARD_VNODES):
+        self.nodes = sorted(set(nodes))
+        points = sorted((_hash(f"{node}#{i}"), node) for node in self.nodes for i in range(vnodes))
+        self._keys = [key for key, _ in points]
+        self._owners = [node for _, node in points]
+
+    def owner(self, bucket: int) -> Optional[str]:
+        """Worker that owns a bucket (the first ring point clockwise of its hash)"""
+        if not self._keys:
+            return None
+        index = bisect.bisect(self._keys, _hash(f"bucket:{bucket}")) % len(self._keys)
+        return self._owners[index]
+
+    def buckets_of(self, node: str, buckets: int = SHARD_BUCKETS) -> Set[int]:
+        """All buckets a worker owns"""
+        return {bucket for bucket in range(buckets) if self.owner(bucket) == node}
+
+@lru_cache(maxsize=32)
+def owned_buckets(node: str, nodes: FrozenSet[str]) -> FrozenSet[int]:
+    """Buckets owned by node for a given worker set (cached per membership)"""
+    return frozenset(HashRing(nodes | {node}).buckets_of(node))
+
+def moved_buckets(before: Iterable[str], after: Iterable[str]) -> List[int]:
+    """Buckets whose owner changes between two worker sets (for rebalancing reports)"""
+    old, new = HashRing(before), HashRing(after)
+    return [bucket for bucket in range(SHARD_BUCKETS) if old.owner(bucket) != new.owner(bucket)]
@@ -0,0 +1,80 @@
+"""
+Per-domain memory of which scraping engine a site needs
+When a static fetch returns a JavaScript app shell, or only Playwright manages
+to scrape a site, the domain is remembered as needing JavaScript so later
+visits go straight to dynamic rendering. Verdicts expire after
+SCRAPE_ROUTE_TTL_DAYS so sites that change are probed again.
+
+Verdicts are kept in memory only while record/replay is active, so recorded
+bundles always contain the full static-then-dynamic sequence.
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+from config import SCRAPE_ROUTES_FILE, SCRAPE_ROUTE_TTL_DAYS
+from utils import replay
+
+_lock = threading.Lock()
+_routes: Optional[Dict[str, dict]] = None
+
+def domain_of(url: str) -> str:
+    """Return the lowercase host of a URL without a leading "www." """
+    host = (urlsplit(url).hostname or url).lower()
+    return host[4:] if host.startswith("www.") else host
+
+def _persistent() -> bool:
+    return bool(SCRAPE_ROUTES_FILE) and replay.get_mode() == "off"
+
+def _load() -> Dict[str, dict]:
+    global _routes
+    if _routes is None:
+        _routes = {}
+        if _persistent():
+            try:
+                with open(SCRAPE_ROUTES_FILE) as f:
+                    _routes = json.load(f)
+            except (FileNotFoundError, json.JSONDecodeError):
+                pass
+    return _routes
+
+def _save():
+    if not _persistent():
+        return
+    directory = os.path.dirname(SCRAPE_ROUTES_FILE)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{SCRAPE_ROUTES_FILE}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(_routes, f, indent=2)
+    os.replace(tmp_path, SCRAPE_ROUTES_FILE)
+
+def needs_javascript(url: str) -> bool:
+    """Return True if the site's domain has a current "needs JavaScript" verdict"""
+    with _lock:
+        route = _load().get(domain_of(url))
+    if not route:
+        return False
+    return time.time() - route["updated"] < SCRAPE_ROUTE_TTL_DAYS * 86400
+
+def remember_javascript(url: str, reason: str):
+    """
+    Record that a site's domain needs dynamic rendering
+
+    Args:
+        url: Any URL on the site
+        reason: Short explanation kept with the verdict (e.g., "app shell")
+    """
+    with _lock:
+        _load()[domain_of(url)] = {"engine": "dynamic", "reason": reason, "updated": time.time()}
+        _save()
+
+def forget(url: str):
+    """Drop the verdict for a site's domain"""
+    with _lock:
+        if _load().pop(domain_of(url), None) is not None:
+            _save()
@@ -0,0 +1,222 @@
+"""
+Suppression list of addresses that must not be emailed (again)
+Addresses that opted out, bounced or were added by hand are never mailed,
+and addresses that were already contacted are not mailed twice. The list
+lives in SQLite; a Bloom filter over it (about 1.8 bytes per address at a
+0.1% false positive rate) answers "definitely not suppressed" without
+touching the database, and only possible hits are confirmed with an exact
+lookup. The filter is saved next to the database and catches up with rows
+added by other processes every SUPPRESSION_SYNC_SECONDS.
+
+The saved filter records the random id of the database it was built from
+and the last rowid it covers; if the database was replaced (a different
+id, or fewer rows than the filter has seen) the filter is rebuilt from it
+rather than trusted.
+"""
+
+import atexit
+import hashlib
+import math
+import os
+import sqlite3
+import struct
+import threading
+import time
+import uuid
+from typing import Dict, Iterable, Optional
+
+from config import SUPPRESSION_DB, SUPPRESSION_CAPACITY, SUPPRESSION_SYNC_SECONDS
+
+# Reasons that block every send; "sent" only blocks repeat outreach
+DO_NOT_CONTACT = ("unsubscribed", "bounced", "complained", "manual")
+SENT = "sent"
+
+_HEADER = struct.Struct("<4sQIQQ16s")  # magic, bits, hashes, count, synced rowid, source database id
+_MAGIC = b"BLM2"
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter of strings
+
+    Args:
+        capacity: Number of items the filter is sized for
+        error_rate: False positive rate at capacity
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        self.capacity = max(capacity, 1)
+        self.size = max(8, math.ceil(-self.capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / self.capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str):
+        # Double hashing: k positions from two 64-bit halves of one digest
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, item: str):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+    def save(self, path: str, synced_rowid: int, source: bytes = b""):
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(_HEADER.pack(_MAGIC, self.size, self.hashes, self.count, synced_rowid, source))
+            f.write(self.bits)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str):
+        """Return (filter, synced rowid, source id) from a saved file, or (None, 0, None) if unusable"""
+        try:
+            with open(path, "rb") as f:
+                magic, size, hashes, count, synced_rowid, source = _HEADER.unpack(f.read(_HEADER.size))
+                bits = bytearray(f.read())
+        except (OSError, struct.error):
+            return None, 0, None
+        if magic != _MAGIC or len(bits) != (size + 7) // 8:
+            return None, 0, None
+        bloom = cls.__new__(cls)
+        bloom.size, bloom.hashes, bloom.count, bloom.bits = size, hashes, count, bits
+        bloom.capacity = max(1, round(size * math.log(2) ** 2 / -math.log(0.001)))
+        return bloom, synced_rowid, source
+
+_lock = threading.RLock()
+_local = threading.local()
+_bloom: Optional[BloomFilter] = None
+_synced_rowid = 0
+_source_id: Optional[bytes] = None  # id of the database the filter was built from
+_last_sync = 0.0
+
+def normalize(email: str) -> str:
+    return (email or "").strip().lower()
+
+def _db() -> sqlite3.Connection:
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        directory = os.path.dirname(SUPPRESSION_DB)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(SUPPRESSION_DB, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS suppressed (email TEXT PRIMARY KEY, reason TEXT NOT NULL, added_at REAL NOT NULL)"
+        )
+        # A random id per database file, so a saved filter can tell it is looking at a new one
+        conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value BLOB NOT NULL)")
+        with conn:
+            conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('id', ?)", (uuid.uuid4().bytes,))
+        _local.conn = conn
+    return conn
+
+def _bloom_path() -> str:
+    return SUPPRESSION_DB + ".bloom"
+
+def _sync(force: bool = False):
+    """Load or build the filter and add rows inserted since the last sync"""
+    global _bloom, _synced_rowid, _source_id, _last_sync
+    with _lock:
+        if not force and _bloom is not None and time.monotonic() - _last_sync < SUPPRESSION_SYNC_SECONDS:
+            return
+        if _bloom is None:
+            _bloom, _synced_rowid, _source_id = BloomFilter.load(_bloom_path())
+            atexit.register(save)
+
+        conn = _db()
+        database_id, max_rowid = conn.execute(
+            "SELECT (SELECT value FROM meta WHERE key = 'id'), (SELECT COALESCE(MAX(rowid), 0) FROM suppressed)"
+        ).fetchone()
+        if _bloom is None or _source_id != database_id or _synced_rowid > max_rowid:
+            # No usable saved filter, or one built from a database that has since been replaced:
+            # its rowids say nothing about this one, so start over rather than miss rows
+            _rebuild(_bloom.capacity if _bloom is not None else SUPPRESSION_CAPACITY)
+        else:
+            rows = conn.execute("SELECT rowid, email FROM suppressed WHERE rowid > ? ORDER BY rowid", (_synced_rowid,))
+            for rowid, email in rows:
+                _bloom.add(email)
+                _synced_rowid = rowid
+
+        if _bloom.count > _bloom.capacity:
+            _rebuild(_bloom.capacity * 2)
+        _last_sync = time.monotonic()
+
+def _rebuild(capacity: int):
+    """Replace the filter with one of the given capacity (at least the configured one) built from the database"""
+    global _bloom, _synced_rowid, _source_id
+    conn = _db()
+    source_id = conn.execute("SELECT value FROM meta WHERE key = 'id'").fetchone()[0]
+    bloom = BloomFilter(max(capacity, SUPPRESSION_CAPACITY))
+    rowid = 0
+    for rowid, email in conn.execute("SELECT rowid, email FROM suppressed ORDER BY rowid"):
+        bloom.add(email)
+    _bloom, _synced_rowid, _source_id = bloom, rowid, source_id
+    save()
+
+def save():
+    """Persist the filter so the next process doesn't rebuild it"""
+    with _lock:
+        if _bloom is not None:
+            _bloom.save(_bloom_path(), _synced_rowid, _source_id or b"")
+
+def lookup(email: str) -> Optional[str]:
+    """Return the suppression reason for an address, or None if it may be emailed"""
+    email = normalize(email)
+    _sync()
+    with _lock:
+        if email not in _bloom:
+            return None
+    row = _db().execute("SELECT reason FROM suppressed WHERE email = ?", (email,)).fetchone()
+    return row[0] if row else None
+
+def is_suppressed(email: str, allow_repeat: bool = False) -> bool:
+    """
+    Check whether an address must not be emailed
+
+    Args:
+        email: Recipient address
+        allow_repeat: Only honor do-not-contact entries, not previous sends
+                      (for test messages)
+
+    Returns:
+        True if the address is suppressed
+    """
+    reason = lookup(email)
+    if reason is None:
+        return False
+    return not (allow_repeat and reason == SENT)
+
+def suppress(email: str, reason: str = "manual"):
+    """Add an address; a do-not-contact reason replaces an earlier "sent" entry"""
+    suppress_many([email], reason)
+
+def suppress_many(emails: Iterable[str], reason: str = "manual") -> int:
+    """
+    Add many addresses in one transaction
+
+    Returns:
+        Number of addresses added or upgraded to a do-not-contact reason
+    """
+    now = time.time()
+    conn = _db()
+    with conn:
+        before = conn.total_changes
+        conn.executemany(
+            "INSERT INTO suppressed (email, reason, added_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(email) DO UPDATE SET reason = excluded.reason, added_at = excluded.added_at "
+            "WHERE suppressed.reason = 'sent' AND excluded.reason != 'sent'",
+            ((normalize(email), reason, now) for email in emails if normalize(email))
+        )
+        added = conn.total_changes - before
+    _sync(force=True)
+    return added
+
+def stats() -> Dict[str, int]:
+    """Suppressed address counts by reason"""
+    return dict(_db().execute("SELECT reason, COUNT(*) FROM suppressed GROUP BY reason").fetchall())
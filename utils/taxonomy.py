@@ -0,0 +1,221 @@
+"""
+Industry taxonomy loaded from data files and compiled into a keyword index
+Industries (business types, lead categories, value propositions, indicator
+terms, synthetic lead data) and brand special cases live in versioned JSON or
+YAML files under TAXONOMY_PATH instead of code. When loaded, every phrase is
+tokenized once into an index keyed by its first word, with the weight each
+match adds to each industry precomputed. Classifying a text is then one pass
+over its words with a dictionary lookup per word, so the cost does not grow
+with the number of industries.
+
+Files are checked for changes at most every TAXONOMY_RELOAD_SECONDS and
+reloaded without a restart; a file that fails to load keeps the previous
+taxonomy in use.
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+import time
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+from config import TAXONOMY_PATH, TAXONOMY_RELOAD_SECONDS
+
+logger = logging.getLogger(__name__)
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+TAXONOMY_EXTENSIONS = (".json", ".yaml", ".yml")
+
+# Score weight of a direct industry name mention relative to one business type phrase
+NAME_WEIGHT = 3
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase words of a text; phrases and texts are matched on these"""
+    return _WORD_RE.findall(str(text or "").lower())
+
+class Taxonomy:
+    """
+    Compiled industry taxonomy
+
+    Args:
+        documents: (source, data) pairs; industries and brands in later
+                   documents replace same-named ones in earlier documents
+    """
+
+    def __init__(self, documents: Iterable[Tuple[str, Dict[str, Any]]]):
+        self.industries: Dict[str, Dict[str, Any]] = {}
+        self.brands: Dict[str, Dict[str, Any]] = {}
+        self.default_industry = None
+        versions = []
+        for source, data in documents:
+            versions.append(f"{os.path.basename(source)}@{data.get('version', 0)}")
+            self.default_industry = data.get("default_industry", self.default_industry)
+            self.industries.update(data.get("industries") or {})
+            self.brands.update(data.get("brands") or {})
+        if not self.industries:
+            raise ValueError("Taxonomy defines no industries")
+        if self.default_industry not in self.industries:
+            self.default_industry = next(iter(self.industries))
+        self.version = ",".join(versions)
+
+        # phrase -> [(kind, name, weight)], grouped by first word
+        entries: Dict[Tuple[str, ...], List[Tuple[str, str, float]]] = {}
+        def add(phrase, kind, name, weight=0.0):
+            words = tuple(tokenize(phrase))
+            if words:
+                entries.setdefault(words, []).append((kind, name, weight))
+
+        keyword_words: Set[str] = set()
+        for industry, data in self.industries.items():
+            business_types = data.get("business_types") or []
+            # Scores are normalized by the number of business types so
+            # industries with long lists don't win by volume
+            unit = 10 / max(len(business_types), 1)
+            for phrase in business_types:
+                add(phrase, "type", industry, unit)
+            add(industry, "type", industry, NAME_WEIGHT * unit)
+            for term in data.get("indicators") or []:
+                add(term, "indicator", industry)
+            for phrase in business_types + (data.get("search_keywords") or []):
+                keyword_words.update(tokenize(phrase))
+        for brand in self.brands:
+            add(brand, "brand", brand)
+
+        self._index: Dict[str, List[Tuple[Tuple[str, ...], List[Tuple[str, str, float]]]]] = {}
+        for words, phrase_entries in entries.items():
+            self._index.setdefault(words[0], []).append((words, phrase_entries))
+        self.keyword_words: FrozenSet[str] = frozenset(keyword_words)
+
+    def industry(self, name: Optional[str]) -> Dict[str, Any]:
+        """An industry's data, or the default industry's for unknown names"""
+        return self.industries.get(name) or self.industries[self.default_industry]
+
+    def _matches(self, text: str) -> Dict[Tuple[str, ...], List[Tuple[str, str, float]]]:
+        """Distinct taxonomy phrases that occur in text"""
+        words = tokenize(text)
+        found = {}
+        for i, word in enumerate(words):
+            for phrase, phrase_entries in self._index.get(word, ()):
+                if tuple(words[i:i + len(phrase)]) == phrase:
+                    found[phrase] = phrase_entries
+        return found
+
+    def score_industries(self, text: str) -> Dict[str, float]:
+        """
+        Score industries by the business type phrases and industry names in text
+
+        Brand mentions raise their industries to at least the brand's scores.
+
+        Returns:
+            Industry -> score for industries that matched, in taxonomy order
+        """
+        totals: Dict[str, float] = {}
+        brands = []
+        for phrase_entries in self._matches(text).values():
+            for kind, name, weight in phrase_entries:
+                if kind == "type":
+                    totals[name] = totals.get(name, 0) + weight
+                elif kind == "brand":
+                    brands.append(name)
+        for brand in brands:
+            for industry, score in (self.brands[brand].get("scores") or {}).items():
+                totals[industry] = max(totals.get(industry, 0), score)
+        return {industry: totals[industry] for industry in self.industries if totals.get(industry)}
+
+    def indicator_terms(self, text: str) -> Dict[str, Set[str]]:
+        """Indicator terms found in text, by industry"""
+        terms: Dict[str, Set[str]] = {}
+        for phrase, phrase_entries in self._matches(text).items():
+            for kind, name, _ in phrase_entries:
+                if kind == "indicator":
+                    terms.setdefault(name, set()).add(" ".join(phrase))
+        return terms
+
+    def brands_in(self, text: str) -> List[str]:
+        """Brands mentioned in text"""
+        return [name for phrase_entries in self._matches(text).values()
+                for kind, name, _ in phrase_entries if kind == "brand"]
+
+    def classify(self, text: str) -> Optional[str]:
+        """
+        Best industry for a short text (an analysis, a business type)
+
+        A brand mention decides first; otherwise the industry with the most
+        indicator terms wins, earlier industries on ties.
+
+        Returns:
+            Industry name, or None if nothing matched
+        """
+        for brand in self.brands_in(text):
+            if self.brands[brand].get("industry") in self.industries:
+                return self.brands[brand]["industry"]
+        terms = self.indicator_terms(text)
+        if not terms:
+            return None
+        return max((industry for industry in self.industries if industry in terms), key=lambda i: len(terms[i]))
+
+def _read(path: str) -> Dict[str, Any]:
+    with open(path, encoding="utf-8") as f:
+        if path.endswith(".json"):
+            return json.load(f)
+        import yaml  # only needed for YAML taxonomies
+        return yaml.safe_load(f) or {}
+
+def taxonomy_files(path: str = TAXONOMY_PATH) -> List[str]:
+    """Taxonomy files at path (a file, or a directory loaded in name order)"""
+    if os.path.isdir(path):
+        return sorted(os.path.join(path, name) for name in os.listdir(path) if name.endswith(TAXONOMY_EXTENSIONS))
+    return [path]
+
+def load(path: str = TAXONOMY_PATH) -> Taxonomy:
+    """Load and compile the taxonomy files at path"""
+    return Taxonomy((file, _read(file)) for file in taxonomy_files(path))
+
+_lock = threading.Lock()
+_current: Optional[Taxonomy] = None
+_signature = None
+_last_check = 0.0
+
+def _file_signature(path: str):
+    signature = []
+    for file in taxonomy_files(path):
+        try:
+            stat = os.stat(file)
+            signature.append((file, stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            signature.append((file, None, None))
+    return tuple(signature)
+
+def get_taxonomy() -> Taxonomy:
+    """
+    The current taxonomy, reloaded when its files changed
+
+    Raises:
+        The load error if the taxonomy can't be loaded and none was loaded before
+    """
+    global _current, _signature, _last_check
+    now = time.monotonic()
+    if _current is not None and (TAXONOMY_RELOAD_SECONDS <= 0 or now - _last_check < TAXONOMY_RELOAD_SECONDS):
+        return _current
+
+    with _lock:
+        if _current is not None and now - _last_check < TAXONOMY_RELOAD_SECONDS:
+            return _current
+        _last_check = now
+        signature = _file_signature(TAXONOMY_PATH)
+        if _current is not None and signature == _signature:
+            return _current
+        try:
+            taxonomy = load(TAXONOMY_PATH)
+        except Exception as e:
+            if _current is None:
+                raise
+            logger.warning("Keeping taxonomy %s: reloading %s failed: %s", _current.version, TAXONOMY_PATH, e)
+            _signature = signature
+            return _current
+        if _current is not None:
+            logger.info("Reloaded taxonomy %s (%d industries)", taxonomy.version, len(taxonomy.industries))
+        _current, _signature = taxonomy, signature
+        return _current
@@ -0,0 +1,159 @@
+"""
+Deterministic offline template engine for outreach emails
+Templates are compiled once per campaign: the business name, value propositions
+from the industry taxonomy and other campaign constants are baked into format
+strings, leaving only lead fields to fill per email. Rendering makes no
+network calls, so bulk low-touch segments can skip the LLM entirely while
+other segments keep LLM drafting.
+"""
+
+import zlib
+from typing import Any, Dict, List, Optional
+
+from config import EMAIL_DRAFT_MODE
+from utils.industry_matcher import identify_industry
+from utils.llm_json import as_object, is_placeholder
+from utils.taxonomy import get_taxonomy
+
+DRAFT_MODES = ("llm", "template")
+
+# Email skeletons; {business}, {business_type} and {value_prop} are campaign
+# constants, the remaining fields are filled from each lead
+SKELETONS = [
+    """Subject: Partnership Opportunity with {business}
+
+Dear {{name}},
+
+I'm reaching out from {business}{business_type}. Given your work as {{description}}, I think there's a real fit: {value_prop}.
+
+{{relevance_line}}
+
+Would you be open to a 15-minute call next week to explore it?
+
+Best regards,
+Marketing Team
+{business}
+""",
+    """Subject: Partnership Opportunity with {business}
+
+Hi {{first_name}},
+
+I came across your work as {{description}} and wanted to introduce {business}{business_type}. {value_prop}.
+
+{{relevance_line}}
+
+Do you have 15 minutes next week for a quick call?
+
+Best regards,
+Marketing Team
+{business}
+"""
+]
+
+def _escape(value: str) -> str:
+    return str(value).replace("{", "{{").replace("}", "}}")
+
+def _sentence(value: str) -> str:
+    value = str(value).strip().rstrip(".")
+    return value[:1].upper() + value[1:] if value else value
+
+def _clause(value: str) -> str:
+    value = str(value).split(',')[0].strip()
+    # Lowercase a leading capital unless it starts an acronym ("CTO of ...")
+    if value[:1].isupper() and not value[1:2].isupper():
+        value = value[0].lower() + value[1:]
+    return value
+
+class CampaignTemplates:
+    """
+    Outreach email templates compiled for one business
+
+    Args:
+        business_data: Business information (as passed to generate_email_content)
+        modes: Segment -> draft mode mapping; "*" is the default segment
+    """
+
+    def __init__(self, business_data: Dict[str, Any], modes: Optional[Dict[str, str]] = None):
+        self.business_name = business_data.get('business_name') or 'our company'
+        self.modes = modes if modes is not None else parse_draft_modes(EMAIL_DRAFT_MODE)
+
+        # Fallback extractions hold placeholders ("Could not determine ...",
+        # "GUESS: ...") that must never reach an email; treat them as missing
+        structured = as_object(business_data.get('structured_data'))
+        business_type = structured.get('business_type', '')
+        value_prop = structured.get('value_proposition', '')
+        if not isinstance(business_type, str) or is_placeholder(business_type):
+            business_type = ''
+        if not isinstance(value_prop, str) or is_placeholder(value_prop):
+            value_prop = ''
+
+        try:
+            self.industry, _ = identify_industry(business_data)
+        except Exception:
+            self.industry = "service"
+
+        value_props = [value_prop] if value_prop else get_taxonomy().industry(self.industry)["value_props"]
+        type_clause = f", a {business_type.strip().rstrip('.')}" if business_type else ""
+
+        self.variants: List[str] = [
+            skeleton.format(
+                business=_escape(self.business_name),
+                business_type=_escape(type_clause),
+                value_prop=_escape(_sentence(prop))
+            )
+            for skeleton in SKELETONS
+            for prop in value_props
+        ]
+
+    def render(self, lead: Dict[str, Any]) -> str:
+        """Render the email body for one lead; the same lead always gets the same variant"""
+        name = lead.get('name') or 'there'
+        email = lead.get('email') or name
+        relevance = _sentence(lead.get('relevance') or '')
+
+        variant = self.variants[zlib.crc32(email.encode("utf-8")) % len(self.variants)]
+        return variant.format(
+            name=name,
+            first_name=name.split()[0],
+            description=_clause(lead.get('description') or 'a professional in your field'),
+            relevance_line=f"{relevance}, and that's exactly what we focus on." if relevance else ""
+        )
+
+    def mode_for(self, lead: Dict[str, Any]) -> str:
+        """Return "llm" or "template" for a lead based on its segment"""
+        if len(self.modes) == 1 and "*" in self.modes:
+            return self.modes["*"]
+        return self.modes.get(lead_segment(lead), self.modes.get("*", "llm"))
+
+def lead_segment(lead: Dict[str, Any]) -> str:
+    """A lead's segment: its own "segment" field, or the industry of its description"""
+    if lead.get('segment'):
+        return str(lead['segment']).strip().lower()
+    industry, _ = identify_industry(f"{lead.get('description', '')} {lead.get('relevance', '')}")
+    return industry
+
+def parse_draft_modes(spec: Optional[str]) -> Dict[str, str]:
+    """
+    Parse a draft mode setting
+
+    "llm" or "template" applies to every lead; "fashion=llm,*=template" picks
+    the mode per segment with "*" as the default.
+    """
+    spec = (spec or "llm").strip().lower()
+    if "=" not in spec:
+        if spec not in DRAFT_MODES:
+            raise ValueError(f"Unknown email draft mode: {spec}")
+        return {"*": spec}
+
+    modes = {}
+    for item in spec.split(","):
+        segment, _, mode = item.partition("=")
+        mode = mode.strip()
+        if mode not in DRAFT_MODES:
+            raise ValueError(f"Unknown email draft mode for {segment.strip()}: {mode}")
+        modes[segment.strip()] = mode
+    return modes
+
+def compile_campaign(business_data: Dict[str, Any], modes: Optional[str] = None) -> CampaignTemplates:
+    """Compile outreach templates for a campaign (modes default to EMAIL_DRAFT_MODE)"""
+    return CampaignTemplates(business_data, parse_draft_modes(modes) if modes is not None else None)
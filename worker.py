@@ -0,0 +1,300 @@
+"""
+Queue worker for the lead generation pipeline
+
+Each stage of the app.py pipeline is a job type, and finishing a job queues
+the next stage:
+
+    scrape (url) -> analyze (scraped data) -> draft (one per lead) -> send
+
+Run any number of workers against the same queue database; each one leases
+jobs, and jobs of a worker that dies are picked up again once their lease
+expires. Delivery is at least once, so a retried job may queue its follow-up
+jobs twice.
+
+Jobs run under a deadline just short of the lease, which bounds retries and
+request timeouts inside them. A job whose host, LLM endpoint or SMTP server
+has an open circuit breaker is put back until the breaker's next probe
+instead of waiting on the endpoint or using up an attempt.
+
+Scrape, analyze and draft jobs are sharded by the site's registrable domain,
+so one worker handles all work for a domain and no per-host state is shared.
+Shards move when workers join or leave (or are listed in SHARD_WORKERS).
+
+Usage:
+    python worker.py --enqueue urls.txt [--send] [--track]   # queue scrape jobs
+    python worker.py [--name w1] [--kinds scrape,analyze] [--once]
+    python worker.py --stats | --dead | --requeue-dead
+"""
+
+import argparse
+import json
+import logging
+import os
+import threading
+import time
+
+from config import (GMAIL_USER, GMAIL_PASSWORD, JOB_QUEUE_PATH, METRICS_FILE, METRICS_PORT, RESPECT_ROBOTS,
+                    SHARD_WORKERS, SHARD_WORKER_TTL)
+from utils import resilience
+from utils.crawl import HostThrottle, shared_robots
+from utils.jobqueue import JobQueue, worker_id
+from utils.log import configure_logging
+from utils.metrics import configure_metrics, span
+from utils.sharding import owned_buckets, shard_of
+
+logger = logging.getLogger("worker")
+
+_throttle = HostThrottle()
+_robots = shared_robots() if RESPECT_ROBOTS else None
+
+class PermanentFailure(Exception):
+    """A job failure that retrying won't fix; the job is dead-lettered at once"""
+
+def handle_scrape(queue, job):
+    from utils import recrawl
+    from utils.scraper import host_endpoint, scrape
+
+    payload = job.payload
+    url = payload["url"]
+    resilience.check(host_endpoint(url))
+    if _robots is not None and not _robots.allowed(url):
+        raise PermanentFailure(f"robots.txt disallows {url}")
+    _throttle.acquire(url, _robots.crawl_delay(url) if _robots is not None else None)
+
+    if payload.get("revisit"):
+        # Scheduled by rescrape.py; unchanged sites stop here instead of being analyzed again
+        visit = recrawl.revisit(url)
+        if visit.status in ("unchanged", "not_modified"):
+            logger.info("%s has not changed since the last visit (%s)", url, visit.status)
+            return
+        scraped_data = visit.data
+    else:
+        scraped_data = scrape(url)
+        if scraped_data and payload.get("track"):
+            # Opted in with --enqueue --track: later visits come from rescrape.py
+            recrawl.observe(url, scraped_data)
+    if not scraped_data:
+        raise RuntimeError(f"Scraping failed for {url}")
+    queue.enqueue("analyze", {"url": url, "scraped_data": scraped_data, "send": payload.get("send", False)},
+                  shard=shard_of(url))
+
+def handle_analyze(queue, job):
+    from utils import analysis_cache
+    from utils.analyzer import analyze_business
+    from utils.industry_matcher import identify_industry
+    from utils.lead_finder import generate_leads
+    from utils.llm import ENDPOINT
+    from utils.llm_json import as_object, is_fallback
+    from utils.scraper import extract_structured_data
+
+    payload = job.payload
+    # Wait for the API to recover rather than store fallback analyses
+    resilience.check(ENDPOINT)
+    scraped_data = payload["scraped_data"]
+    cached = analysis_cache.lookup(payload["url"], scraped_data)
+    if cached:
+        logger.info("Reusing stored analysis for %s (content unchanged)", payload["url"])
+        if cached["structured_data"]:
+            scraped_data['structured_data'] = cached["structured_data"]
+        analysis_json = cached["analysis"]
+    else:
+        industry, confidence = identify_industry(scraped_data)
+        structured_data = extract_structured_data(scraped_data)
+        if structured_data:
+            scraped_data['structured_data'] = structured_data
+
+        analysis_json = analyze_business(scraped_data)
+        # Stand-ins from a failed model call would be reused as if they were real
+        if not (is_fallback(structured_data) or is_fallback(analysis_json)):
+            analysis_cache.store(payload["url"], scraped_data, {
+                "industry": industry,
+                "confidence": confidence,
+                "structured_data": structured_data,
+                "analysis": analysis_json
+            })
+    analysis = dict(as_object(analysis_json))
+    if analysis:
+        analysis['business_data'] = scraped_data
+    else:
+        analysis = analysis_json
+
+    leads = generate_leads(analysis)
+    if not leads:
+        raise RuntimeError(f"No leads generated for {payload['url']}")
+    for lead in leads:
+        queue.enqueue("draft", {"url": payload["url"], "business": scraped_data, "lead": lead,
+                                "send": payload.get("send", False)}, shard=shard_of(payload["url"]))
+
+def handle_draft(queue, job):
+    from utils.drafts import stream_draft
+    from utils.lead_finder import generate_email_content
+    from utils.suppression import is_suppressed
+    from utils.templates import compile_campaign
+
+    payload = job.payload
+    business, lead = payload["business"], payload["lead"]
+    if is_suppressed(lead['email']):
+        logger.info("Skipping draft for suppressed address %s", lead['email'])
+        return
+    subject = f"Partnership Opportunity with {business['business_name']}"
+    body = generate_email_content(business, lead, compile_campaign(business))
+
+    os.makedirs("output", exist_ok=True)
+    stream_draft(f"output/email_job{job.id}.txt", lead['email'], subject, [body])
+
+    if payload.get("send") and GMAIL_USER and GMAIL_PASSWORD:
+        queue.enqueue("send", {"to": lead['email'], "subject": subject, "body": body})
+
+def handle_send(queue, job):
+    import smtplib
+
+    from utils.email_handler import SMTP_ENDPOINT, deliver
+    from utils.suppression import lookup
+
+    payload = job.payload
+    # The suppression list doubles as the send log: a job redelivered after its
+    # lease expired mid-send finds its address marked "sent" and is done
+    reason = lookup(payload["to"])
+    if reason is not None:
+        logger.info("Not sending to %s: already on the suppression list (%s)", payload["to"], reason)
+        return
+    if not GMAIL_USER or not GMAIL_PASSWORD:
+        raise PermanentFailure("Missing Gmail credentials (GMAIL_USER, GMAIL_PASSWORD)")
+    resilience.check(SMTP_ENDPOINT)
+    try:
+        deliver(payload["to"], payload["subject"], payload["body"])
+    except smtplib.SMTPRecipientsRefused as e:
+        raise PermanentFailure(f"Recipient refused: {e.recipients}")
+    except smtplib.SMTPResponseException as e:
+        # 5xx replies (bad address, rejected content, failed login) won't change on retry
+        if e.smtp_code >= 500:
+            raise PermanentFailure(f"SMTP server refused the message: {e}")
+        raise
+
+HANDLERS = {
+    "scrape": handle_scrape,
+    "analyze": handle_analyze,
+    "draft": handle_draft,
+    "send": handle_send
+}
+
+def run_job(queue, job):
+    """Run one leased job and complete, retry or dead-letter it"""
+    handler = HANDLERS.get(job.kind)
+    try:
+        if handler is None:
+            raise PermanentFailure(f"Unknown job type: {job.kind}")
+        with span(f"job.{job.kind}"), resilience.deadline(queue.visibility_timeout * 0.9):
+            handler(queue, job)
+    except resilience.CircuitOpen as e:
+        logger.info("Job %d (%s) deferred %.0fs: %s", job.id, job.kind, e.retry_after, e)
+        queue.defer(job, e.retry_after, str(e))
+    except PermanentFailure as e:
+        logger.error("Job %d (%s) dead-lettered: %s", job.id, job.kind, e)
+        queue.fail(job, str(e), retry=False)
+    except Exception as e:
+        logger.warning("Job %d (%s) attempt %d failed: %s", job.id, job.kind, job.attempts, e)
+        queue.fail(job, f"{type(e).__name__}: {e}")
+    else:
+        if not queue.complete(job):
+            logger.warning("Job %d (%s) finished after its lease expired", job.id, job.kind)
+
+def current_shards(queue, name):
+    """Shards this worker owns under the current worker set"""
+    workers = SHARD_WORKERS or queue.live_workers(SHARD_WORKER_TTL)
+    return owned_buckets(name, frozenset(workers))
+
+def _heartbeat(queue, name, stop):
+    while not stop.wait(SHARD_WORKER_TTL / 3):
+        try:
+            queue.heartbeat(name)
+        except Exception as e:
+            logger.warning("Heartbeat failed: %s", e)
+
+def work(queue, kinds=None, once=False, poll_interval=1.0, name=None):
+    """
+    Lease and run jobs until interrupted
+
+    Args:
+        queue: JobQueue to pull from
+        kinds: Only run these job types
+        once: Return when no job is available instead of polling
+        poll_interval: Seconds to wait when the queue is empty
+        name: Stable worker name (keeps its shards across restarts); random by default
+    """
+    name = name or worker_id()
+    if SHARD_WORKERS and name not in SHARD_WORKERS:
+        raise ValueError(f"Worker name {name} is not in SHARD_WORKERS")
+    
+    queue.heartbeat(name)
+    stop = threading.Event()
+    threading.Thread(target=_heartbeat, args=(queue, name, stop), daemon=True).start()
+    logger.info("Worker %s started", name)
+    
+    shards = None
+    try:
+        while True:
+            owned = current_shards(queue, name)
+            if owned != shards:
+                logger.info("Worker %s owns %d shards", name, len(owned))
+                shards = owned
+            
+            job = queue.lease(name, kinds, shards)
+            if job is None:
+                if once:
+                    return
+                time.sleep(poll_interval)
+                continue
+            run_job(queue, job)
+    finally:
+        stop.set()
+        queue.leave(name)
+
+def main():
+    parser = argparse.ArgumentParser(description="Pipeline queue worker")
+    parser.add_argument("--queue", default=JOB_QUEUE_PATH, help="Job queue database")
+    parser.add_argument("--name", help="Stable worker name for domain sharding (default: host:pid:random)")
+    parser.add_argument("--kinds", help="Comma-separated job types to run (default: all)")
+    parser.add_argument("--once", action="store_true", help="Exit when the queue has no available jobs")
+    parser.add_argument("--enqueue", metavar="URLS_FILE", help="Queue a scrape job per URL and exit")
+    parser.add_argument("--send", action="store_true", help="With --enqueue: also send the drafted emails")
+    parser.add_argument("--track", action="store_true", help="With --enqueue: also track the sites for rescrape.py")
+    parser.add_argument("--stats", action="store_true", help="Print job counts and exit")
+    parser.add_argument("--dead", action="store_true", help="Print dead-lettered jobs and exit")
+    parser.add_argument("--requeue-dead", action="store_true", help="Retry all dead-lettered jobs and exit")
+    args = parser.parse_args()
+
+    configure_logging()
+    queue = JobQueue(args.queue)
+
+    if args.enqueue:
+        with open(args.enqueue) as f:
+            urls = [line.strip() for line in f if line.strip() and not line.startswith("#")]
+        for url in urls:
+            if not url.startswith(('http://', 'https://')):
+                url = 'https://' + url
+            queue.enqueue("scrape", {"url": url, "send": args.send, "track": args.track}, shard=shard_of(url))
+        print(f"✅ Queued {len(urls)} scrape jobs in {args.queue}")
+        return
+
+    if args.stats:
+        print(json.dumps(queue.stats(), indent=2))
+        return
+
+    if args.dead:
+        for job in queue.dead_letters():
+            print(f"#{job['id']} {job['kind']} after {job['attempts']} attempts: {job['error']}")
+        return
+
+    if args.requeue_dead:
+        print(f"✅ Requeued {queue.requeue_dead()} dead-lettered jobs")
+        return
+
+    configure_metrics(METRICS_FILE, METRICS_PORT)
+    try:
+        work(queue, args.kinds.split(",") if args.kinds else None, once=args.once, name=args.name)
+    except KeyboardInterrupt:
+        print("\nWorker stopped")
+
+if __name__ == "__main__":
+    main()